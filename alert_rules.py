@@ -0,0 +1,217 @@
+import csv
+from dataclasses import dataclass, field
+from typing import List, Mapping, Optional
+
+from alerts import Severity
+
+# Display name and unit of each vital sign field
+FIELD_LABELS = {
+    'systolic': ('Systolic', 'mmHg'),
+    'diastolic': ('Diastolic', 'mmHg'),
+    'heart_rate': ('Heart Rate', 'bpm'),
+    'temperature': ('Temperature', '°C'),
+    'oxygen_saturation': ('Oxygen Saturation', '%'),
+    'respiratory_rate': ('Respiratory Rate', 'breaths/min'),
+}
+
+# Per-patient statistics computed by trends.TrendTracker, available to rules
+# as '<field>_<statistic>' fields, e.g. 'systolic_slope'
+TREND_STATISTICS = {
+    'ewma': ('Average', ''),
+    'mean': ('Window Mean', ''),
+    'std': ('Std Dev', ''),
+    'slope': ('Trend', '/h'),
+}
+FIELD_LABELS.update({
+    f'{field_name}_{statistic}': (f'{label} {statistic_label}', f'{unit}{unit_suffix}')
+    for field_name, (label, unit) in list(FIELD_LABELS.items())
+    for statistic, (statistic_label, unit_suffix) in TREND_STATISTICS.items()
+})
+
+# Columns of a threshold table; rows sharing a rule name must all match
+RULE_TABLE_FIELDS = ['rule', 'severity', 'title', 'action', 'field', 'low', 'high']
+
+# Built-in threshold table, the same content as data/alert_rules.csv
+DEFAULT_RULE_TABLE = [
+    ('moderate_hypertension', 'MODERATE', 'MODERATE HYPERTENSION ALERT',
+     'See a doctor or GP as soon as possible', 'systolic', 160, 179),
+    ('moderate_hypertension', 'MODERATE', 'MODERATE HYPERTENSION ALERT',
+     'See a doctor or GP as soon as possible', 'diastolic', 100, 109),
+    ('hypertensive_emergency', 'EMERGENCY', 'HYPERTENSIVE EMERGENCY ALERT',
+     'Requires immediate medical attention. Go to hospital.', 'systolic', 180, None),
+    ('hypertensive_emergency', 'EMERGENCY', 'HYPERTENSIVE EMERGENCY ALERT',
+     'Requires immediate medical attention. Go to hospital.', 'diastolic', 110, None),
+    ('tachycardia', 'MODERATE', 'TACHYCARDIA ALERT',
+     'Check patient and record an ECG', 'heart_rate', 120, None),
+    ('bradycardia', 'MODERATE', 'BRADYCARDIA ALERT',
+     'Check patient and record an ECG', 'heart_rate', None, 45),
+    ('hypoxemia', 'EMERGENCY', 'LOW OXYGEN SATURATION ALERT',
+     'Give oxygen and assess immediately', 'oxygen_saturation', None, 89),
+    ('fever', 'MODERATE', 'FEVER ALERT',
+     'Assess for infection', 'temperature', 38.5, None),
+    ('hypothermia', 'MODERATE', 'HYPOTHERMIA ALERT',
+     'Warm patient and recheck temperature', 'temperature', None, 35.0),
+    ('tachypnea', 'MODERATE', 'HIGH RESPIRATORY RATE ALERT',
+     'Assess breathing', 'respiratory_rate', 25, None),
+    ('bradypnea', 'EMERGENCY', 'LOW RESPIRATORY RATE ALERT',
+     'Assess airway and breathing immediately', 'respiratory_rate', None, 8),
+    ('rising_systolic', 'MODERATE', 'RISING BLOOD PRESSURE ALERT',
+     'Recheck blood pressure and review treatment', 'systolic_slope', 20, None),
+    ('rising_systolic', 'MODERATE', 'RISING BLOOD PRESSURE ALERT',
+     'Recheck blood pressure and review treatment', 'systolic_ewma', 135, None),
+    ('rising_diastolic', 'MODERATE', 'RISING BLOOD PRESSURE ALERT',
+     'Recheck blood pressure and review treatment', 'diastolic_slope', 10, None),
+    ('rising_diastolic', 'MODERATE', 'RISING BLOOD PRESSURE ALERT',
+     'Recheck blood pressure and review treatment', 'diastolic_ewma', 85, None),
+]
+
+# A bound on one field; None means unbounded on that side (bounds are inclusive)
+@dataclass
+class Condition:
+    field: str
+    low: Optional[float] = None
+    high: Optional[float] = None
+
+    def matches(self, value) -> bool:
+        return (self.low is None or value >= self.low) and (self.high is None or value <= self.high)
+
+@dataclass
+class AlertRule:
+    name: str
+    severity: Severity
+    title: str
+    action: str
+    conditions: List[Condition] = field(default_factory=list)
+
+    @property
+    def fields(self) -> List[str]:
+        return [condition.field for condition in self.conditions]
+
+# Rule hits of a batch evaluation as parallel arrays, one entry per hit
+@dataclass
+class RuleHits:
+    row: object  # index of the reading in the batch
+    patient_id: object
+    rule: object  # index into RuleSet.rules
+    severity: object
+
+    def __len__(self):
+        return len(self.row)
+
+class RuleSet:
+    """Evaluate threshold rules against single readings or whole batches."""
+
+    def __init__(self, rules: List[AlertRule]):
+        self.rules = rules
+
+    def evaluate(self, reading: Mapping) -> List[AlertRule]:
+        """
+        Return the rules matched by one reading.
+
+        Rules that need a field missing from the reading are skipped, so a
+        blood pressure only reading is checked against the blood pressure rules.
+        """
+        return [rule for rule in self.rules
+                if all(c.field in reading and c.matches(reading[c.field]) for c in rule.conditions)]
+
+    def evaluate_batch(self, batch) -> RuleHits:
+        """
+        Evaluate every rule over column arrays with vectorized comparisons.
+
+        Args:
+            batch: A VitalsBatch or a mapping of field name to array, which
+                must include a patient_id column
+
+        Returns:
+            RuleHits: Hits ordered by rule, then by row
+        """
+        import numpy as np
+
+        def column(name):
+            return batch.get(name) if isinstance(batch, Mapping) else getattr(batch, name, None)
+
+        patient_ids = np.asarray(column('patient_id'))
+        rows, rule_indexes = [], []
+        for index, rule in enumerate(self.rules):
+            columns = [column(c.field) for c in rule.conditions]
+            if any(values is None for values in columns):
+                continue
+            mask = np.ones(len(patient_ids), dtype=bool)
+            for condition, values in zip(rule.conditions, columns):
+                if condition.low is not None:
+                    mask &= values >= condition.low
+                if condition.high is not None:
+                    mask &= values <= condition.high
+            hit_rows = np.flatnonzero(mask)
+            rows.append(hit_rows)
+            rule_indexes.append(np.full(len(hit_rows), index, dtype=np.int16))
+
+        row = np.concatenate(rows) if rows else np.empty(0, dtype=np.intp)
+        rule = np.concatenate(rule_indexes) if rule_indexes else np.empty(0, dtype=np.int16)
+        severities = np.array([int(r.severity) for r in self.rules], dtype=np.int8)
+        return RuleHits(row, patient_ids[row], rule, severities[rule])
+
+    def count_by_rule(self, hits: RuleHits) -> dict:
+        import numpy as np
+        counts = np.bincount(hits.rule, minlength=len(self.rules)) if len(hits) else [0] * len(self.rules)
+        return {rule.name: int(count) for rule, count in zip(self.rules, counts)}
+
+def _parse_bound(value) -> Optional[float]:
+    if value is None or value == '':
+        return None
+    number = float(value)
+    return int(number) if number.is_integer() else number
+
+def build_rules(rows) -> RuleSet:
+    """Build a RuleSet from threshold table rows, grouping rows by rule name."""
+    rules = {}
+    for name, severity, title, action, field_name, low, high in rows:
+        if field_name not in FIELD_LABELS:
+            raise ValueError(f"Unknown vital sign field in rule {name}: {field_name}")
+        if name not in rules:
+            rules[name] = AlertRule(name, Severity[severity.strip().upper()], title, action)
+        rules[name].conditions.append(Condition(field_name, _parse_bound(low), _parse_bound(high)))
+    return RuleSet(list(rules.values()))
+
+# Load a threshold table from CSV, or the built-in table if no file is given
+def load_rules(filename=None) -> RuleSet:
+    if filename is None:
+        return build_rules(DEFAULT_RULE_TABLE)
+    with open(filename, newline='') as csvfile:
+        reader = csv.DictReader(csvfile)
+        return build_rules([row[column] for column in RULE_TABLE_FIELDS] for row in reader)
+
+# Save a threshold table to CSV
+def save_rules_to_csv(rule_set: RuleSet, filename="alert_rules.csv"):
+    with open(filename, 'w', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(RULE_TABLE_FIELDS)
+        for rule in rule_set.rules:
+            for c in rule.conditions:
+                writer.writerow([rule.name, rule.severity.name, rule.title, rule.action, c.field,
+                                 '' if c.low is None else c.low, '' if c.high is None else c.high])
+    print(f"Alert rules saved to {filename}")
+
+def _field_values(rule: AlertRule, reading: Mapping) -> List[tuple]:
+    fields = rule.fields
+    values = []
+    if 'systolic' in fields and 'diastolic' in fields:
+        values.append(('Blood Pressure', f"{reading['systolic']}/{reading['diastolic']}", 'mmHg'))
+        fields = [f for f in fields if f not in ('systolic', 'diastolic')]
+    for field_name in dict.fromkeys(fields):
+        label, unit = FIELD_LABELS[field_name]
+        values.append((label, reading[field_name], unit))
+    return values
+
+# Full alert text sent when a doctor has a single alert
+def format_alert(rule: AlertRule, patient, reading: Mapping) -> str:
+    lines = [rule.title, f"Patient: {patient.name} {patient.surname} (ID: {patient.id})"]
+    lines += [f"{label}: {value} {unit}" for label, value, unit in _field_values(rule, reading)]
+    lines.append(f"Action: {rule.action}")
+    return "\n".join(lines)
+
+# One-line alert text used when several alerts are batched into one SMS
+def format_summary(rule: AlertRule, patient, reading: Mapping) -> str:
+    title = rule.title[:-len(' ALERT')] if rule.title.endswith(' ALERT') else rule.title
+    values = ", ".join(f"{value} {unit}" for _, value, unit in _field_values(rule, reading))
+    return f"{title} {patient.name} {patient.surname} (ID {patient.id}) {values}"
@@ -0,0 +1,475 @@
+import heapq
+import itertools
+import re
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Dict, List, Optional, Tuple
+
+from metrics import SMS_DROPPED, SMS_GIVEN_UP, SMS_QUEUE_DEPTH, SMS_SEND_FAILURES, SMS_SEND_SECONDS, SMS_SENT
+
+# GSM 03.38 characters that take two septets (escape + character)
+GSM7_EXTENDED_CHARS = set('^{}\\[~]|€\f')
+
+# Septets available in a single SMS and in each part of a multi-part SMS
+SMS_SINGLE_SEPTETS = 160
+SMS_PART_SEPTETS = 153
+
+# Doctor replies such as "ACK 4" or "ack #4" acknowledge the alerts of patient 4
+ACKNOWLEDGEMENT_PATTERN = re.compile(r'^\s*ACK\s*#?\s*(\d+)\b', re.IGNORECASE)
+
+# Returned by AlertDispatcher._next_alert when the idle task is due
+_IDLE = object()
+
+# Alert severities, higher values are more urgent
+class Severity(IntEnum):
+    MODERATE = 1
+    EMERGENCY = 2
+
+# An SMS notification waiting to be delivered to a responsible person
+@dataclass
+class Alert:
+    phone_number: str
+    message: str
+    severity: Severity
+    patient_id: Optional[int] = None
+    summary: Optional[str] = None  # one-line form used when alerts are batched
+    rule: Optional[str] = None  # name of the rule that raised the alert
+    created: float = field(default_factory=time.monotonic)
+    attempts: int = 0
+    not_before: float = 0.0  # monotonic time before which a retry is not attempted
+    batch: Tuple['Alert', ...] = ()  # alerts listed in a batched message, which has no patient_id
+
+    def covers(self, patient_id: int) -> bool:
+        """True if the message is about the patient, alone or in a batch."""
+        return self.patient_id == patient_id or any(alert.patient_id == patient_id for alert in self.batch)
+
+# Counters reported by the AlertDispatcher
+@dataclass
+class DispatcherStats:
+    enqueued: int = 0
+    sent: int = 0
+    retried: int = 0
+    failed: int = 0  # gave up after max_attempts
+    dropped: int = 0  # rejected or evicted because the queue was full
+    cancelled: int = 0  # removed from the queue after an acknowledgement
+
+class AlertDispatcher:
+    """
+    Deliver alerts on a background thread so monitoring never waits on the modem.
+
+    Alerts are kept in a bounded priority queue: more severe alerts are sent
+    first and alerts of equal severity go out in submission order. Failed
+    sends are retried with exponential backoff.
+
+    Args:
+        sms_engine: Object with a ``send_sms(phone_number, message)`` method
+        max_queue (int): Maximum number of queued alerts, including retries
+        max_attempts (int): Send attempts before an alert is given up
+        backoff (float): Seconds before the first retry, doubled on each retry
+        max_backoff (float): Upper bound for the retry delay
+        workers (int): Number of sending threads, one per modem in a ModemPool
+        idle_task: Callable run by the first worker every `idle_interval`
+            seconds, between sends, e.g. to read replies from the same modem
+        idle_interval (float): Seconds between idle_task runs
+    """
+
+    def __init__(self, sms_engine, max_queue: int = 100, max_attempts: int = 3,
+                 backoff: float = 2.0, max_backoff: float = 60.0, workers: int = 1,
+                 idle_task=None, idle_interval: float = 1.0):
+        self.sms_engine = sms_engine
+        self.workers = workers
+        self.idle_task = idle_task
+        self.idle_interval = idle_interval
+        self.max_queue = max_queue
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.stats = DispatcherStats()
+        self._ready = []  # heap of (-severity, sequence, alert)
+        self._delayed = []  # heap of (not_before, sequence, alert)
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._running = False
+        self._threads = []
+        self._next_idle = 0.0
+
+    def start(self):
+        self._running = True
+        SMS_QUEUE_DEPTH.track(self._depth)
+        self._threads = [threading.Thread(target=self._run, args=(i,), name=f"alert-dispatcher-{i}",
+                                          daemon=True)
+                         for i in range(self.workers)]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self, drain: bool = True, timeout: Optional[float] = None):
+        """
+        Stop the worker thread.
+
+        Args:
+            drain (bool): Wait for queued alerts to be delivered first
+            timeout (float): Maximum seconds to wait for the queue to drain
+        """
+        with self._condition:
+            if drain:
+                deadline = None if timeout is None else time.monotonic() + timeout
+                while self._ready or self._delayed or self._in_flight:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+            self._running = False
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join()
+        SMS_QUEUE_DEPTH.untrack(self._depth)
+
+    def submit(self, alert: Alert) -> bool:
+        """Queue an alert without blocking. Returns False if it was dropped."""
+        with self._condition:
+            if self.depth >= self.max_queue and not self._evict_below(alert.severity):
+                self.stats.dropped += 1
+                SMS_DROPPED.inc()
+                return False
+            heapq.heappush(self._ready, (-alert.severity, next(self._sequence), alert))
+            self.stats.enqueued += 1
+            self._condition.notify_all()
+            return True
+
+    def cancel(self, patient_id: int, phone_number: Optional[str] = None) -> int:
+        """
+        Remove a patient's queued alerts, optionally only those to one phone number.
+
+        A batched message listing the patient is re-packed without it, or
+        removed if the patient was all it listed. Returns the number of the
+        patient's alerts removed.
+        """
+        with self._condition:
+            cancelled = 0
+            for heap in (self._ready, self._delayed):
+                keep, repacked = [], []
+                for entry in heap:
+                    alert = entry[2]
+                    if not alert.covers(patient_id) or (phone_number is not None
+                                                        and alert.phone_number != phone_number):
+                        keep.append(entry)
+                    elif not alert.batch:
+                        cancelled += 1
+                    else:
+                        remaining = [a for a in alert.batch if a.patient_id != patient_id]
+                        cancelled += len(alert.batch) - len(remaining)
+                        repacked.extend(self._repack(alert, remaining, heap is self._ready))
+                heap[:] = keep + repacked
+                heapq.heapify(heap)
+            self.stats.cancelled += cancelled
+            self._condition.notify_all()
+            return cancelled
+
+    def _repack(self, alert: Alert, remaining: List[Alert], ready: bool) -> list:
+        # Heap entries replacing a batched message, keeping its retry state
+        entries = []
+        for message in pack_alerts(alert.phone_number, remaining) if remaining else []:
+            message.created, message.attempts, message.not_before = alert.created, alert.attempts, alert.not_before
+            key = -message.severity if ready else message.not_before
+            entries.append((key, next(self._sequence), message))
+        return entries
+
+    @property
+    def depth(self) -> int:
+        return len(self._ready) + len(self._delayed)
+
+    def _depth(self) -> int:
+        # Source of the sms_queue_depth gauge while the dispatcher runs
+        return self.depth
+
+    @property
+    def oldest_age(self) -> float:
+        """Seconds since the oldest queued alert was created, 0 if the queue is empty."""
+        with self._condition:
+            queued = [entry[2].created for entry in itertools.chain(self._ready, self._delayed)]
+        return time.monotonic() - min(queued) if queued else 0.0
+
+    def _evict_below(self, severity: Severity) -> bool:
+        # Make room by dropping the newest of the least severe queued alerts
+        candidates = [(entry[2].severity, entry[1], heap, entry)
+                      for heap in (self._ready, self._delayed) for entry in heap]
+        if not candidates:
+            return False
+        lowest_severity, _, heap, entry = min(candidates, key=lambda c: (c[0], -c[1]))
+        if lowest_severity >= severity:
+            return False
+        heap.remove(entry)
+        heapq.heapify(heap)
+        self.stats.dropped += 1
+        SMS_DROPPED.inc()
+        return True
+
+    def _next_alert(self, worker: int):
+        with self._condition:
+            while self._running:
+                now = time.monotonic()
+                # The idle task also runs while alerts are queued so replies are
+                # still read during an alert storm
+                runs_idle_task = worker == 0 and self.idle_task is not None
+                if runs_idle_task and now >= self._next_idle:
+                    self._next_idle = now + self.idle_interval
+                    return _IDLE
+                while self._delayed and self._delayed[0][0] <= now:
+                    _, sequence, alert = heapq.heappop(self._delayed)
+                    heapq.heappush(self._ready, (-alert.severity, sequence, alert))
+                if self._ready:
+                    self._in_flight += 1
+                    return heapq.heappop(self._ready)[2]
+                wait = self._delayed[0][0] - now if self._delayed else None
+                if runs_idle_task:
+                    wait = self._next_idle - now if wait is None else min(wait, self._next_idle - now)
+                self._condition.wait(wait)
+            return None
+
+    def _run(self, worker: int = 0):
+        while True:
+            alert = self._next_alert(worker)
+            if alert is None:
+                return
+            if alert is _IDLE:
+                try:
+                    self.idle_task()
+                except Exception as ex:
+                    print(f"Error in dispatcher idle task: {ex}")
+                continue
+            alert.attempts += 1
+            start = time.perf_counter()
+            try:
+                sent = self.sms_engine.send_sms(alert.phone_number, alert.message)
+            except Exception as ex:
+                print(f"Error dispatching alert: {ex}")
+                sent = False
+            SMS_SEND_SECONDS.observe(time.perf_counter() - start)
+            if not sent:
+                SMS_SEND_FAILURES.inc()
+            with self._condition:
+                self._in_flight -= 1
+                if sent:
+                    self.stats.sent += 1
+                    SMS_SENT.inc()
+                elif alert.attempts < self.max_attempts:
+                    delay = min(self.max_backoff, self.backoff * 2 ** (alert.attempts - 1))
+                    alert.not_before = time.monotonic() + delay
+                    heapq.heappush(self._delayed, (alert.not_before, next(self._sequence), alert))
+                    self.stats.retried += 1
+                else:
+                    self.stats.failed += 1
+                    SMS_GIVEN_UP.inc()
+                    print(f"Giving up on alert to {alert.phone_number} after {alert.attempts} attempts")
+                self._condition.notify_all()
+
+# Number of GSM 7-bit septets needed to encode text
+def gsm7_length(text: str) -> int:
+    return sum(2 if char in GSM7_EXTENDED_CHARS else 1 for char in text)
+
+def _split_septets(text: str, budget: int) -> List[str]:
+    chunks, current, used = [], '', 0
+    for char in text:
+        size = gsm7_length(char)
+        if used + size > budget:
+            chunks.append(current)
+            current, used = '', 0
+        current += char
+        used += size
+    return chunks + [current] if current else chunks
+
+def _pack_lines(lines: List[str], budget: int) -> List[Tuple[str, List[int]]]:
+    # Parts of at most `budget` septets and the indexes of the lines in each
+    parts, current, indexes = [], None, []
+    for index, line in enumerate(lines):
+        for piece in _split_septets(line, budget) if gsm7_length(line) > budget else [line]:
+            candidate = piece if current is None else f"{current}\n{piece}"
+            if gsm7_length(candidate) <= budget:
+                current = candidate
+            else:
+                parts.append((current, indexes))
+                current, indexes = piece, []
+            if index not in indexes:
+                indexes.append(index)
+    return parts + [(current, indexes)] if current is not None else parts
+
+def _pack_parts(lines: List[str]) -> List[Tuple[str, List[int]]]:
+    single = _pack_lines(lines, SMS_SINGLE_SEPTETS)
+    if len(single) <= 1:
+        return single
+    # Reserve room for the "(i/n) " part header, widening it until the part
+    # count fits, e.g. "(100/120) " once there are more than 99 parts
+    width = len("(99/99) ")
+    parts = _pack_lines(lines, SMS_PART_SEPTETS - width)
+    while len(f"({len(parts)}/{len(parts)}) ") > width:
+        width = len(f"({len(parts)}/{len(parts)}) ")
+        parts = _pack_lines(lines, SMS_PART_SEPTETS - width)
+    return [(f"({i}/{len(parts)}) {part}", indexes) for i, (part, indexes) in enumerate(parts, 1)]
+
+def pack_sms(lines: List[str]) -> List[str]:
+    """
+    Pack text lines into as few SMS messages as possible.
+
+    A message that fits one SMS is returned unchanged. Longer content is split
+    at line boundaries into parts of at most SMS_PART_SEPTETS septets, each
+    prefixed with its position such as "(1/3) ".
+    """
+    return [part for part, _ in _pack_parts(lines)]
+
+def pack_alerts(phone_number: str, alerts: List[Alert]) -> List[Alert]:
+    """
+    Pack one doctor's alerts into one Alert per SMS message.
+
+    A single alert keeps its full message. Several alerts are listed by their
+    summaries, most severe first, and each message records the alerts it lists
+    in `batch` so an acknowledgement can find them.
+    """
+    if len(alerts) == 1:
+        alert = alerts[0]
+        return [Alert(phone_number, body, alert.severity, alert.patient_id) for body in pack_sms([alert.message])]
+    ordered = sorted(alerts, key=lambda alert: alert.severity, reverse=True)
+    severity = ordered[0].severity
+    return [Alert(phone_number, body, severity, batch=tuple(ordered[i] for i in indexes))
+            for body, indexes in _pack_parts([alert.summary or alert.message for alert in ordered])]
+
+class AlertCoalescer:
+    """
+    Suppress repeated alerts and batch the remaining ones per doctor.
+
+    An alert is suppressed if the same rule already alerted for the same
+    patient within the cooldown; other rules of the patient still get through,
+    whatever their severity. Alerts without a rule name share a cooldown per
+    severity.
+    Accepted alerts are held per phone number until flush(), which packs each
+    doctor's alerts into as few SMS messages as possible.
+
+    Once the responsible doctor acknowledges a patient's alert, alerts of the
+    same or a lower severity are suppressed until resolve() reports the
+    patient back in range. A more severe alert still gets through.
+
+    Args:
+        cooldown (float): Seconds during which a repeat alert is suppressed
+        clock: Function returning the current time in seconds
+    """
+
+    def __init__(self, cooldown: float = 300.0, clock=time.monotonic):
+        self.cooldown = cooldown
+        self.clock = clock
+        self.suppressed = 0
+        self._last_sent: Dict[Tuple[int, object], float] = {}  # (patient, rule name or severity) -> time
+        self._pending: Dict[str, List[Alert]] = defaultdict(list)
+        self._open: Dict[int, Tuple[str, Severity]] = {}  # patient -> (phone number, highest severity)
+        self._acknowledged: Dict[int, Severity] = {}
+        self._lock = threading.Lock()
+
+    def offer(self, alert: Alert) -> bool:
+        """Accept an alert for batching. Returns False if it was suppressed."""
+        now = self.clock()
+        with self._lock:
+            if alert.patient_id is not None:
+                acknowledged = self._acknowledged.get(alert.patient_id)
+                if acknowledged is not None and alert.severity <= acknowledged:
+                    self.suppressed += 1
+                    return False
+                key = (alert.patient_id, alert.rule if alert.rule is not None else alert.severity)
+                last = self._last_sent.get(key)
+                if last is not None and now - last < self.cooldown:
+                    self.suppressed += 1
+                    return False
+                self._last_sent[key] = now
+                _, highest = self._open.get(alert.patient_id, (None, alert.severity))
+                self._open[alert.patient_id] = (alert.phone_number, max(highest, alert.severity))
+            self._pending[alert.phone_number].append(alert)
+            return True
+
+    def acknowledge(self, phone_number: str, patient_id: int) -> bool:
+        """
+        Record a doctor's acknowledgement of a patient's open alert.
+
+        Returns False if the patient has no open alert sent to that number.
+        """
+        with self._lock:
+            entry = self._open.get(patient_id)
+            if entry is None or not same_phone_number(entry[0], phone_number):
+                return False
+            self._acknowledged[patient_id] = entry[1]
+            pending = self._pending.get(entry[0], [])
+            pending[:] = [alert for alert in pending if alert.patient_id != patient_id]
+            return True
+
+    def open_patients(self) -> set:
+        """Ids of the patients with open alerts."""
+        with self._lock:
+            return set(self._open)
+
+    def resolve(self, patient_id: int):
+        """Close a patient's alerts once the readings are back in range."""
+        with self._lock:
+            self._open.pop(patient_id, None)
+            self._acknowledged.pop(patient_id, None)
+
+    def discard_pending(self) -> int:
+        """Drop the pending alerts without sending them, e.g. in a dry run. Returns how many."""
+        with self._lock:
+            count = sum(len(alerts) for alerts in self._pending.values())
+            self._pending.clear()
+            return count
+
+    def flush(self) -> List[Alert]:
+        """Return the pending alerts as one Alert per SMS message to send."""
+        with self._lock:
+            pending = [(phone, alerts) for phone, alerts in self._pending.items() if alerts]
+            self._pending.clear()
+        return [message for phone_number, alerts in pending for message in pack_alerts(phone_number, alerts)]
+
+# Compare phone numbers ignoring formatting and international/national prefixes
+def same_phone_number(first: str, second: str) -> bool:
+    first_digits, second_digits = re.sub(r'\D', '', first), re.sub(r'\D', '', second)
+    return bool(first_digits) and first_digits[-8:] == second_digits[-8:]
+
+# Patient id acknowledged by an SMS reply, None if the text is not an acknowledgement
+def parse_acknowledgement(text: str) -> Optional[int]:
+    match = ACKNOWLEDGEMENT_PATTERN.match(text)
+    return int(match.group(1)) if match else None
+
+class AcknowledgementHandler:
+    """
+    Close alerts acknowledged by SMS replies such as "ACK 4".
+
+    The number is the patient id shown in the alert. Only the phone number
+    the alert was sent to can acknowledge it. Acknowledged alerts are removed
+    from the dispatcher queue, batched messages are re-packed without the
+    patient, and repeats are suppressed by the coalescer.
+
+    Args:
+        coalescer (AlertCoalescer): Tracks the open alerts
+        dispatcher (AlertDispatcher): Queue to remove acknowledged alerts from
+    """
+
+    def __init__(self, coalescer: AlertCoalescer, dispatcher: Optional[AlertDispatcher] = None):
+        self.coalescer = coalescer
+        self.dispatcher = dispatcher
+        self.acknowledged = 0
+
+    def handle(self, message) -> bool:
+        """Apply one received SMSMessage. Returns True if it acknowledged an alert."""
+        patient_id = parse_acknowledgement(message.body)
+        if patient_id is None:
+            return False
+        if not self.coalescer.acknowledge(message.sender, patient_id):
+            print(f"Ignoring acknowledgement for patient {patient_id} from {message.sender}: no open alert")
+            return False
+        if self.dispatcher:
+            self.dispatcher.cancel(patient_id)
+        self.acknowledged += 1
+        print(f"Alert for patient {patient_id} acknowledged by {message.sender}")
+        return True
+
+    def handle_messages(self, messages):
+        for message in messages:
+            self.handle(message)
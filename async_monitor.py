@@ -0,0 +1,96 @@
+import asyncio
+import datetime
+import time
+
+from alert_rules import load_rules
+from metrics import READINGS
+from patient_monitoring import AlertChannel, Patient, patients, print_tick_stats, simulate_blood_pressure
+from scheduling import TickScheduler, TickStats
+
+# Readings a tick waits for at most at the same time
+DEFAULT_CONCURRENCY = 100
+
+async def simulated_reading(patient: Patient) -> dict:
+    systolic, diastolic = simulate_blood_pressure(patient.id)
+    return {'systolic': systolic, 'diastolic': diastolic}
+
+async def _read_all(monitored_patients, read_reading, timeout: float, concurrency: int) -> list:
+    limit = asyncio.Semaphore(concurrency)
+
+    async def read(patient):
+        async with limit:
+            try:
+                return patient, await asyncio.wait_for(read_reading(patient), timeout)
+            except asyncio.TimeoutError:
+                print(f"No reading from patient {patient.id} within {timeout} s")
+            except Exception as ex:
+                print(f"Error reading patient {patient.id}: {ex}")
+            return patient, None
+
+    return await asyncio.gather(*(read(patient) for patient in monitored_patients))
+
+async def monitor_blood_pressure_async(duration_minutes=5, interval_seconds=20, com_port=None,
+                                       alert_cooldown_seconds=300, rules=None, registry=None,
+                                       read_reading=simulated_reading, concurrency=DEFAULT_CONCURRENCY,
+                                       coalesce=True, trends=None, clock=time.monotonic,
+                                       sleep=asyncio.sleep) -> TickStats:
+    """
+    Monitor blood pressure with asyncio on a drift-free schedule.
+
+    Ticks are due every interval_seconds on the monotonic clock. Each tick
+    reads all patients concurrently, so one slow sensor only delays its own
+    reading, and a reading that takes longer than the interval is dropped for
+    that tick. Ticks missed after an overrun are coalesced into one or skipped.
+    Alerts go through the same AlertChannel as monitor_blood_pressure.
+
+    Args:
+        duration_minutes (float): How long to monitor
+        interval_seconds (float): Seconds between ticks
+        com_port: Serial port, list of ports or ModemService for SMS alerts
+        alert_cooldown_seconds (int): Cooldown for repeated alerts of a patient
+        rules (RuleSet): Threshold rules, the built-in table if None
+        registry (PatientRegistry): Patients to monitor, the built-in list if None
+        read_reading: Coroutine function returning a patient's reading as a dict
+        concurrency (int): Maximum readings in progress at once
+        coalesce (bool): Run one late tick for missed ticks instead of skipping them
+        trends (TrendTracker): Adds per-patient trend statistics for the trend rules
+        clock: Monotonic time source of the schedule
+        sleep: Coroutine function waiting a number of seconds on that clock
+
+    Returns:
+        TickStats: Jitter and overrun statistics of the run
+    """
+    rules = rules or load_rules()
+    alerts = await asyncio.to_thread(AlertChannel(com_port, alert_cooldown_seconds).open)
+
+    scheduler = TickScheduler(interval_seconds, coalesce=coalesce, clock=clock)
+    end = scheduler.next_tick + duration_minutes * 60
+    try:
+        while scheduler.next_tick < end:
+            await sleep(scheduler.delay())
+            scheduler.start_tick()
+
+            monitored_patients = registry.patients() if registry is not None else patients
+            readings = await _read_all(monitored_patients, read_reading, interval_seconds, concurrency)
+            alert_count = 0
+            for patient, reading in readings:
+                if reading is None:
+                    continue
+                READINGS.inc()
+                if trends is not None:
+                    reading.update(trends.update(patient.id, reading))
+                alert_count += len(alerts.check(patient, reading, rules))
+            alerts.flush()
+
+            print(f"Tick {scheduler.stats.ticks} - {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}: "
+                  f"{sum(r is not None for _, r in readings)} readings, {alert_count} alerts")
+            skipped = scheduler.finish_tick()
+            if skipped:
+                print(f"Tick overran the {interval_seconds} s interval, {skipped} skipped")
+    finally:
+        await asyncio.to_thread(alerts.close)
+        print_tick_stats(scheduler.stats)
+    return scheduler.stats
+
+if __name__ == "__main__":
+    asyncio.run(monitor_blood_pressure_async(duration_minutes=1, interval_seconds=5))
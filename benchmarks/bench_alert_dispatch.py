@@ -0,0 +1,56 @@
+"""
+Compare monitoring iteration time with inline SMS sends and with the AlertDispatcher.
+
+A slow pty-backed fake modem stands in for the GSM modem. Run from the
+repository root:
+    python -m benchmarks.bench_alert_dispatch
+"""
+import argparse
+import contextlib
+import io
+import time
+
+from alerts import Alert, AlertDispatcher, Severity
+from fake_modem import FakeModem
+from patient_monitoring import SMSEngine, simulate_blood_pressure
+
+def run_iteration(patient_count: int, alert_count: int, send) -> float:
+    start = time.perf_counter()
+    for patient_id in range(1, patient_count + 1):
+        simulate_blood_pressure(patient_id)
+        if patient_id <= alert_count:
+            send(patient_id)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--patients', type=int, default=50)
+    parser.add_argument('--send-delay', type=float, default=0.2)
+    args = parser.parse_args()
+
+    print(f"{'alerts':>6} {'inline ms':>10} {'queued ms':>10}")
+    with FakeModem(send_delay=args.send_delay) as modem, \
+            contextlib.redirect_stdout(io.StringIO()) as quiet:
+        engine = SMSEngine()
+        engine.open_port(modem.port_name)
+        alert_counts = (0, 1, 2, 5, 10)
+        inline = [run_iteration(args.patients, n,
+                                lambda pid: engine.send_sms("+38344922805", f"Alert for patient {pid}"))
+                  for n in alert_counts]
+
+        # The dispatcher thread is the only user of the port from here on
+        dispatcher = AlertDispatcher(engine, max_queue=1000).start()
+        queued = [run_iteration(args.patients, n,
+                                lambda pid: dispatcher.submit(Alert("+38344922805", f"Alert for patient {pid}",
+                                                                    Severity.MODERATE, pid)))
+                  for n in alert_counts]
+        results = zip(alert_counts, inline, queued)
+        dispatcher.stop(drain=True)
+        engine.close_port()
+        quiet.truncate(0)
+    for alert_count, inline, queued in results:
+        print(f"{alert_count:>6} {inline * 1000:>10.1f} {queued * 1000:>10.3f}")
+    print(f"Dispatcher delivered {dispatcher.stats.sent} alerts in the background")
+
+if __name__ == "__main__":
+    main()
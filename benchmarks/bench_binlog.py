@@ -0,0 +1,78 @@
+"""
+Compare file size and full-scan time of the vital signs CSV and the binary log.
+
+Run from the repository root:
+    python -m benchmarks.bench_binlog
+"""
+import argparse
+import csv
+import datetime
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from patient_monitoring import VitalSignsCSVWriter
+from vitals_binlog import BinaryVitalsReader, csv_to_binlog
+from vitals_simulator import simulate_vital_signs_batch
+
+def scan_csv(filename: str) -> float:
+    total = count = 0
+    with open(filename, newline='') as csvfile:
+        reader = csv.reader(csvfile)
+        next(reader)
+        for row in reader:
+            total += int(row[2])
+            count += 1
+    return total / count
+
+def scan_binlog(directory: str) -> float:
+    total = count = 0
+    for _, records in BinaryVitalsReader(directory).scan():
+        total += int(records['systolic'].sum(dtype=np.int64))
+        count += len(records)
+    return total / count
+
+def directory_size(directory: str) -> int:
+    return sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--patients', type=int, default=1000)
+    parser.add_argument('--ticks', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        csv_file = os.path.join(workdir, "vital_signs.csv")
+        log_dir = os.path.join(workdir, "vitals_log")
+        start_time = datetime.datetime(2025, 3, 22, 13, 36, 7)
+        with VitalSignsCSVWriter(csv_file, flush_rows=100_000) as writer:
+            for tick in range(args.ticks):
+                batch = simulate_vital_signs_batch(range(1, args.patients + 1), args.seed + tick)
+                writer.write_many(batch.to_vital_signs(start_time + datetime.timedelta(seconds=20 * tick)))
+
+        start = time.perf_counter()
+        rows = csv_to_binlog(csv_file, log_dir)
+        convert_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        csv_mean = scan_csv(csv_file)
+        csv_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        log_mean = scan_binlog(log_dir)
+        log_time = time.perf_counter() - start
+        assert csv_mean == log_mean
+
+        csv_size, log_size = os.path.getsize(csv_file), directory_size(log_dir)
+        print(f"rows:       {rows}")
+        print(f"conversion: {convert_time:.2f} s")
+        print(f"size:       CSV {csv_size / rows:.1f} B/row, binary {log_size / rows:.1f} B/row "
+              f"({csv_size / log_size:.1f}x smaller)")
+        print(f"full scan:  CSV {csv_time * 1000:.0f} ms, binary {log_time * 1000:.1f} ms "
+              f"({csv_time / log_time:.0f}x faster)")
+
+if __name__ == "__main__":
+    main()
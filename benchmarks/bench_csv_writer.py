@@ -0,0 +1,56 @@
+"""
+Compare save_vital_signs_to_csv called every tick with a long-lived VitalSignsCSVWriter.
+
+Run from the repository root:
+    python -m benchmarks.bench_csv_writer
+"""
+import argparse
+import contextlib
+import datetime
+import filecmp
+import io
+import os
+import tempfile
+import time
+
+from patient_monitoring import VitalSignsCSVWriter, save_vital_signs_to_csv
+from vitals_simulator import simulate_vital_signs_batch
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--patients', type=int, default=1000)
+    parser.add_argument('--ticks', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    start_time = datetime.datetime(2025, 3, 22, 13, 36, 7)
+    ticks = [simulate_vital_signs_batch(range(1, args.patients + 1), args.seed + tick)
+             .to_vital_signs(start_time + datetime.timedelta(seconds=20 * tick))
+             for tick in range(args.ticks)]
+    rows = args.patients * args.ticks
+
+    with tempfile.TemporaryDirectory() as directory:
+        function_file = os.path.join(directory, "function.csv")
+        writer_file = os.path.join(directory, "writer.csv")
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for readings in ticks:
+                save_vital_signs_to_csv(readings, function_file)
+        function_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with VitalSignsCSVWriter(writer_file, fsync_interval=1.0) as writer:
+            for readings in ticks:
+                writer.write_many(readings)
+        writer_time = time.perf_counter() - start
+
+        assert filecmp.cmp(function_file, writer_file, shallow=False)
+
+    print(f"rows:                    {rows}")
+    print(f"save_vital_signs_to_csv: {rows / function_time:>12,.0f} rows/s")
+    print(f"VitalSignsCSVWriter:     {rows / writer_time:>12,.0f} rows/s")
+    print(f"speedup:                 {function_time / writer_time:>12.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Measure ingestion throughput on localhost with the included load generator.
+
+The generator runs in a separate process; the consumer takes batches from
+the Ingestor, evaluates the alert rules and stores the readings.
+
+Run from the repository root:
+    python -m benchmarks.bench_ingestion
+"""
+import argparse
+import multiprocessing
+import time
+
+from alert_rules import load_rules
+from benchmarks.load_generator import generate_load
+from ingestion import Ingestor, TCPSource, UDPSource
+from vitals_store import VitalsStore
+
+def measure(transport: str, protocol: str, rate: float, duration: float) -> tuple:
+    source = (TCPSource if transport == 'tcp' else UDPSource)('127.0.0.1', 0, protocol)
+    rules, store = load_rules(), VitalsStore(capacity=1_000_000)
+    consumed = 0
+    with Ingestor([source]) as ingestor:
+        generator = multiprocessing.Process(target=generate_load,
+                                            args=('127.0.0.1', source.address[1], transport, protocol,
+                                                  rate, duration))
+        generator.start()
+        first = last = None
+        # Drain until the generator is done and the source has gone quiet
+        while True:
+            batch = ingestor.get(timeout=0.5)
+            if batch is None:
+                if not generator.is_alive():
+                    break
+                continue
+            first = first or time.perf_counter()
+            rules.evaluate_batch(batch)
+            store.extend(batch)
+            consumed += len(batch)
+            last = time.perf_counter()
+        generator.join()
+    elapsed = (last - first) if first and last > first else float('inf')
+    return consumed / elapsed, source.stats
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--rate', type=float, default=50_000, help="offered readings per second, 0 for no limit")
+    args = parser.parse_args()
+
+    print(f"{'source':<14} {'offered/s':>10} {'ingested/s':>11} {'dropped':>8} {'errors':>7}")
+    for transport, protocol in (('tcp', 'binary'), ('udp', 'binary'), ('tcp', 'line')):
+        rate, stats = measure(transport, protocol, args.rate, args.duration)
+        offered = f"{args.rate:,.0f}" if args.rate else "max"
+        print(f"{transport + '/' + protocol:<14} {offered:>10} {rate:>11,.0f} {stats.dropped:>8} {stats.errors:>7}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Measure SMS throughput of a ModemPool as the number of fake modems grows.
+
+Run from the repository root:
+    python -m benchmarks.bench_modem_pool
+"""
+import argparse
+import contextlib
+import io
+import time
+
+from alerts import Alert, AlertDispatcher, Severity
+from fake_modem import FakeModem
+from modem_pool import ModemPool
+from patient_monitoring import SMSEngine
+
+def measure(modem_count: int, messages: int, send_delay: float) -> float:
+    modems = [FakeModem(send_delay=send_delay).start() for _ in range(modem_count)]
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            pool = ModemPool([m.port_name for m in modems], SMSEngine)
+            pool.open()
+            dispatcher = AlertDispatcher(pool, max_queue=messages, workers=modem_count)
+            for i in range(messages):
+                dispatcher.submit(Alert("+38344922805", f"Message {i}", Severity.MODERATE))
+            start = time.perf_counter()
+            dispatcher.start()
+            dispatcher.stop(drain=True)
+            elapsed = time.perf_counter() - start
+            pool.close()
+        assert dispatcher.stats.sent == messages
+        return messages / elapsed
+    finally:
+        for modem in modems:
+            modem.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--messages', type=int, default=40)
+    parser.add_argument('--send-delay', type=float, default=0.1)
+    args = parser.parse_args()
+
+    print(f"{'modems':>6} {'sms/s':>8} {'speedup':>8}")
+    baseline = None
+    for modem_count in (1, 2, 4, 8):
+        rate = measure(modem_count, args.messages, args.send_delay)
+        baseline = baseline or rate
+        print(f"{modem_count:>6} {rate:>8.1f} {rate / baseline:>7.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Compare opening the modem per operation with sharing it through a ModemService.
+
+Three clients (alert sender, message receiver, caller) each run the same
+number of operations against one fake modem.
+
+Run from the repository root:
+    python -m benchmarks.bench_modem_service
+"""
+import argparse
+import contextlib
+import io
+import threading
+import time
+
+from fake_modem import FakeModem
+from modem_service import ModemService
+from patient_monitoring import SMSEngine
+
+# One operation per client, each run against an SMSEngine
+CLIENT_OPERATIONS = [
+    lambda engine: engine.send_sms("+38344922805", "Test alert"),
+    lambda engine: engine.poll_messages(),
+    lambda engine: engine.make_call("+38344922805") and engine.end_call(),
+]
+
+def run_clients(operations_per_client, rounds: int) -> float:
+    start = time.perf_counter()
+    threads = [threading.Thread(target=lambda op=op: [op() for _ in range(rounds)])
+               for op in operations_per_client]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
+
+def measure_exclusive(modem: FakeModem, rounds: int) -> float:
+    # Clients take turns opening the port, like separate scripts would
+    port_lock = threading.Lock()
+
+    def exclusive(operation):
+        def run():
+            with port_lock:
+                engine = SMSEngine()
+                engine.open_port(modem.port_name)
+                operation(engine)
+                engine.close_port()
+        return run
+
+    return run_clients([exclusive(operation) for operation in CLIENT_OPERATIONS], rounds)
+
+def measure_shared(modem: FakeModem, rounds: int) -> float:
+    with ModemService(modem.port_name, SMSEngine) as service:
+        return run_clients([lambda operation=operation: service.call(operation)
+                            for operation in CLIENT_OPERATIONS], rounds)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--response-delay', type=float, default=0.005)
+    args = parser.parse_args()
+
+    with FakeModem(response_delay=args.response_delay) as modem, \
+            contextlib.redirect_stdout(io.StringIO()):
+        exclusive = measure_exclusive(modem, args.rounds)
+        commands_exclusive = len(modem.commands)
+        shared = measure_shared(modem, args.rounds)
+        commands_shared = len(modem.commands) - commands_exclusive
+
+    operations = len(CLIENT_OPERATIONS) * args.rounds
+    print(f"{'mode':<22} {'ops/s':>8} {'AT commands':>12}")
+    print(f"{'open per operation':<22} {operations / exclusive:>8.1f} {commands_exclusive:>12}")
+    print(f"{'shared ModemService':<22} {operations / shared:>8.1f} {commands_shared:>12}")
+
+if __name__ == "__main__":
+    main()
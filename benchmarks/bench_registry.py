@@ -0,0 +1,67 @@
+"""
+Measure PatientRegistry load time and lookup speed for a large patient file.
+
+Run from the repository root:
+    python -m benchmarks.bench_registry
+"""
+import argparse
+import csv
+import os
+import random
+import tempfile
+import time
+
+from registry import PatientRegistry
+
+def write_files(directory: str, patient_count: int, doctor_count: int, seed: int):
+    rng = random.Random(seed)
+    doctors_file = os.path.join(directory, "responsible_persons.csv")
+    patients_file = os.path.join(directory, "patients.csv")
+    with open(doctors_file, 'w', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(['id', 'name', 'surname', 'phone_number'])
+        for doctor_id in range(1, doctor_count + 1):
+            writer.writerow([doctor_id, f"Doctor{doctor_id}", "Test", f"+383449{doctor_id:05d}"])
+    with open(patients_file, 'w', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(['id', 'name', 'surname', 'date_of_birth', 'room_number', 'responsible_person_id'])
+        for patient_id in range(1, patient_count + 1):
+            writer.writerow([patient_id, f"Patient{patient_id}", "Test",
+                             f"{rng.randint(1930, 2005)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+                             100 * rng.randint(1, 20) + rng.randint(1, 50), rng.randint(1, doctor_count)])
+    return patients_file, doctors_file
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--patients', type=int, default=100000)
+    parser.add_argument('--doctors', type=int, default=500)
+    parser.add_argument('--lookups', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        patients_file, doctors_file = write_files(directory, args.patients, args.doctors, args.seed)
+        registry = PatientRegistry(patients_file, doctors_file, check_interval=60)
+
+        start = time.perf_counter()
+        count = len(registry)
+        load_time = time.perf_counter() - start
+
+        ids = [random.randint(1, args.patients) for _ in range(args.lookups)]
+        start = time.perf_counter()
+        for patient_id in ids:
+            registry.patient(patient_id)
+        lookup_time = (time.perf_counter() - start) / args.lookups
+
+        start = time.perf_counter()
+        for doctor_id in range(1, args.doctors + 1):
+            registry.patients_of(doctor_id)
+        doctor_time = (time.perf_counter() - start) / args.doctors
+
+    print(f"patients loaded:     {count}")
+    print(f"load time:           {load_time * 1000:.0f} ms")
+    print(f"lookup by id:        {lookup_time * 1e9:.0f} ns")
+    print(f"patients of doctor:  {doctor_time * 1e9:.0f} ns")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Replay simulated ward histories through the alert rules and report the speed.
+
+Run from the repository root:
+    python -m benchmarks.bench_replay --rows 1000000 --files 2
+"""
+import argparse
+import datetime
+import os
+import tempfile
+import time
+
+from patient_monitoring import VitalSignsCSVWriter
+from replay import replay_file, replay_files
+from vitals_binlog import csv_to_binlog
+from vitals_simulator import simulate_ward_batch
+
+def write_history(filename: str, rows: int, patients: int, seed: int):
+    start_time = datetime.datetime(2025, 3, 22, 13, 36, 7)
+    with VitalSignsCSVWriter(filename, flush_rows=100_000) as writer:
+        for tick in range(rows // patients):
+            batch = simulate_ward_batch(range(1, patients + 1), seed + tick)
+            writer.write_many(batch.to_vital_signs(start_time + datetime.timedelta(seconds=20 * tick)))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=1_000_000, help="readings per file")
+    parser.add_argument('--files', type=int, default=2)
+    parser.add_argument('--patients', type=int, default=1000)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        paths = [os.path.join(workdir, f"vital_signs_{index}.csv") for index in range(args.files)]
+        for index, path in enumerate(paths):
+            write_history(path, args.rows, args.patients, args.seed + index * args.rows)
+        log_dir = os.path.join(workdir, "vitals_log")
+        csv_to_binlog(paths[0], log_dir)
+
+        for label, path in (("CSV", paths[0]), ("binary log", log_dir)):
+            result = replay_file(path)
+            print(f"{label:<11} {result.readings} readings in {result.elapsed:.2f} s "
+                  f"({result.rate:,.0f} readings/s), {sum(r.hits for r in result.rules)} hits, "
+                  f"{sum(r.alerts for r in result.rules)} alerts")
+
+        result = replay_file(log_dir, trend_window=90)
+        print(f"{'trends':<11} {result.readings} readings in {result.elapsed:.2f} s "
+              f"({result.rate:,.0f} readings/s)")
+
+        start = time.perf_counter()
+        results = replay_files(paths, workers=args.workers)
+        elapsed = time.perf_counter() - start
+        readings = sum(result.readings for result in results)
+        print(f"{len(paths)} CSV files in parallel: {readings} readings in {elapsed:.2f} s "
+              f"({readings / elapsed:,.0f} readings/s, {os.cpu_count()} CPU cores)")
+
+if __name__ == "__main__":
+    main()
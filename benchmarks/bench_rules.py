@@ -0,0 +1,45 @@
+"""
+Compare per-reading rule evaluation with vectorized batch evaluation.
+
+Run from the repository root:
+    python -m benchmarks.bench_rules
+"""
+import argparse
+import time
+
+import numpy as np
+
+from alert_rules import load_rules
+from vitals_simulator import simulate_blood_pressure_batch, simulate_vital_signs_batch
+
+FIELDS = ['systolic', 'diastolic', 'heart_rate', 'temperature', 'oxygen_saturation', 'respiratory_rate']
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--readings', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rules = load_rules()
+    rng = np.random.default_rng(args.seed)
+    print(f"{'readings':>9} {'hits':>6} {'loop ms':>9} {'batch ms':>9} {'speedup':>8}")
+    for count in args.readings:
+        batch = simulate_vital_signs_batch(np.arange(count), rng)
+        batch.systolic, batch.diastolic = simulate_blood_pressure_batch(count, rng)
+
+        rows = [dict(zip(FIELDS, values))
+                for values in zip(*(getattr(batch, name).tolist() for name in FIELDS))]
+        start = time.perf_counter()
+        loop_hits = sum(len(rules.evaluate(row)) for row in rows)
+        loop_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        hits = rules.evaluate_batch(batch)
+        batch_time = time.perf_counter() - start
+
+        assert len(hits) == loop_hits
+        print(f"{count:>9} {len(hits):>6} {loop_time * 1000:>9.1f} {batch_time * 1000:>9.2f} "
+              f"{loop_time / batch_time:>7.0f}x")
+
+if __name__ == "__main__":
+    main()
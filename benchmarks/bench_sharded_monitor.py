@@ -0,0 +1,51 @@
+"""
+Measure readings per second of the ShardedMonitor at 1, 2, 4 and 8 workers.
+
+Workers acquire and evaluate their shard; the coordinator appends every
+reading to a VitalsStore. Alerts are counted, not sent.
+
+Run from the repository root:
+    python -m benchmarks.bench_sharded_monitor
+"""
+import argparse
+import datetime
+import os
+import time
+
+from patient_monitoring import Patient, responsible_persons
+from sharded_monitor import ShardedMonitor
+from vitals_store import VitalsStore
+
+def make_cohort(count: int, floors: int) -> list:
+    return [Patient(i, "Patient", str(i), datetime.date(1970, 1, 1), 100 * (i % floors + 1) + i % 50,
+                    responsible_persons[i % len(responsible_persons)])
+            for i in range(1, count + 1)]
+
+def measure(cohort: list, workers: int, ticks: int) -> float:
+    store = VitalsStore(capacity=len(cohort) * 2)
+    with ShardedMonitor(cohort, workers, stores=[store], seed=42) as monitor:
+        monitor.tick()  # warm up the workers
+        start = time.perf_counter()
+        for _ in range(ticks):
+            monitor.tick()
+        elapsed = time.perf_counter() - start
+    return len(cohort) * ticks / elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--patients', type=int, default=200_000)
+    parser.add_argument('--floors', type=int, default=40)
+    parser.add_argument('--ticks', type=int, default=10)
+    args = parser.parse_args()
+
+    cohort = make_cohort(args.patients, args.floors)
+    print(f"{args.patients} patients on {args.floors} floors, {os.cpu_count()} CPU cores")
+    print(f"{'workers':>7} {'readings/s':>12} {'speedup':>8}")
+    baseline = None
+    for workers in (1, 2, 4, 8):
+        rate = measure(cohort, workers, args.ticks)
+        baseline = baseline or rate
+        print(f"{workers:>7} {rate:>12,.0f} {rate / baseline:>7.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Compare the per-patient simulators with the vectorized NumPy batch simulator.
+
+Run from the repository root:
+    python -m benchmarks.bench_simulator
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from patient_monitoring import simulate_blood_pressure, simulate_vital_signs
+from vitals_simulator import simulate_blood_pressure_batch, simulate_vital_signs_batch
+
+def best_of(repeats: int, func) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--patients', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    rng = np.random.default_rng(args.seed)
+    print(f"{'patients':>9} {'stage':>15} {'loop ms':>9} {'batch ms':>9} {'speedup':>8}")
+    for count in args.patients:
+        ids = list(range(1, count + 1))
+        stages = [
+            ("vital signs", lambda: [simulate_vital_signs(pid) for pid in ids],
+             lambda: simulate_vital_signs_batch(ids, rng)),
+            ("blood pressure", lambda: [simulate_blood_pressure(pid) for pid in ids],
+             lambda: simulate_blood_pressure_batch(count, rng)),
+        ]
+        for name, loop, batch in stages:
+            loop_time = best_of(args.repeats, loop)
+            batch_time = best_of(args.repeats, batch)
+            print(f"{count:>9} {name:>15} {loop_time * 1000:>9.1f} {batch_time * 1000:>9.2f} "
+                  f"{loop_time / batch_time:>7.0f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Measure SMSEngine.send_sms latency against a pty-backed fake modem.
+
+Run from the repository root:
+    python -m benchmarks.bench_sms_latency
+"""
+import argparse
+import contextlib
+import io
+import time
+
+from fake_modem import FakeModem
+from patient_monitoring import SMSEngine
+
+def measure(response_delay: float, send_delay: float, messages: int) -> dict:
+    with FakeModem(response_delay=response_delay, send_delay=send_delay, echo=True) as modem:
+        engine = SMSEngine()
+        engine.open_port(modem.port_name)
+        latencies = []
+        sent = 0
+        try:
+            for i in range(messages):
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    ok = engine.send_sms("+38344922805", f"Benchmark message {i}")
+                latencies.append(time.perf_counter() - start)
+                sent += ok
+        finally:
+            engine.close_port()
+    return {
+        'response_delay': response_delay,
+        'send_delay': send_delay,
+        'sent': sent,
+        'messages': messages,
+        'mean_ms': 1000 * sum(latencies) / len(latencies),
+        'max_ms': 1000 * max(latencies),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--messages', type=int, default=10)
+    args = parser.parse_args()
+
+    scenarios = [(0.0, 0.0), (0.01, 0.1), (0.05, 0.5), (0.01, 1.5)]
+    print(f"{'cmd delay':>10} {'send delay':>11} {'sent':>7} {'mean ms':>9} {'max ms':>9}")
+    for response_delay, send_delay in scenarios:
+        r = measure(response_delay, send_delay, args.messages)
+        print(f"{r['response_delay']:>10.2f} {r['send_delay']:>11.2f} "
+              f"{r['sent']:>3}/{r['messages']:<3} {r['mean_ms']:>9.1f} {r['max_ms']:>9.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Measure the startup time of the command line tools in fresh interpreters.
+
+Exits with status 1 if a tool takes longer than the budget, and lists its
+slowest imports, so the check can guard against import-time regressions.
+
+Run from the repository root:
+    python -m benchmarks.bench_startup --budget-ms 100
+"""
+import argparse
+import subprocess
+import sys
+import time
+
+# Commands checked against the budget, as arguments to the Python interpreter
+TOOLS = {
+    'cli.py --help': ['cli.py', '--help'],
+    'cli.py call --help': ['cli.py', 'call', '--help'],
+    'cli.py receive --help': ['cli.py', 'receive', '--help'],
+    'cli.py replay --help': ['cli.py', 'replay', '--help'],
+    'import make_call': ['-c', 'import make_call'],
+    'import receive_sms': ['-c', 'import receive_sms'],
+    'import gsm_modem': ['-c', 'import gsm_modem'],
+}
+
+# Shown for comparison only
+REFERENCES = {
+    'python (empty)': ['-c', 'pass'],
+    'import patient_monitoring': ['-c', 'import patient_monitoring'],
+}
+
+def startup_time(arguments, runs: int) -> float:
+    # Best wall time of `runs` fresh interpreters, in seconds
+    best = float('inf')
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + arguments, stdout=subprocess.DEVNULL, check=True)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def slowest_imports(arguments, count: int = 8) -> list:
+    # (cumulative microseconds, module) of the slowest imports reported by -X importtime
+    result = subprocess.run([sys.executable, '-X', 'importtime'] + arguments, stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE, text=True)
+    imports = []
+    for line in result.stderr.splitlines():
+        fields = line.split('|')
+        if len(fields) == 3 and fields[1].strip().isdigit():
+            imports.append((int(fields[1]), fields[2].strip()))
+    return sorted(imports, reverse=True)[:count]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--budget-ms', type=float, default=100.0)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'command':<28} {'best ms':>8}")
+    for name, arguments in REFERENCES.items():
+        print(f"{name:<28} {1000 * startup_time(arguments, args.runs):>8.1f}")
+    over_budget = []
+    for name, arguments in TOOLS.items():
+        elapsed = 1000 * startup_time(arguments, args.runs)
+        print(f"{name:<28} {elapsed:>8.1f}{'  over budget' if elapsed > args.budget_ms else ''}")
+        if elapsed > args.budget_ms:
+            over_budget.append((name, arguments))
+
+    for name, arguments in over_budget:
+        print(f"\nSlowest imports of {name}:")
+        for microseconds, module in slowest_imports(arguments):
+            print(f"  {microseconds / 1000:>7.1f} ms  {module}")
+    if over_budget:
+        sys.exit(1)
+    print(f"\nAll tools start within {args.budget_ms:.0f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Compare tick timing of sleeping after the work with the drift-free schedulers.
+
+Each tick reads every patient through a reader that takes a random time, as a
+network sensor would.
+
+Run from the repository root:
+    python -m benchmarks.bench_tick_drift
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import random
+import time
+
+from async_monitor import monitor_blood_pressure_async, simulated_reading
+from patient_monitoring import patients
+from scheduling import TickScheduler
+
+def measure_sleep_after_work(ticks: int, interval: float, read_delay: float) -> list:
+    starts = []
+    for _ in range(ticks):
+        starts.append(time.monotonic())
+        for _ in patients:
+            time.sleep(random.uniform(0, read_delay))
+        time.sleep(interval)
+    return starts
+
+def measure_scheduler(ticks: int, interval: float, read_delay: float) -> list:
+    scheduler, starts = TickScheduler(interval), []
+    for _ in range(ticks):
+        time.sleep(scheduler.delay())
+        scheduler.start_tick()
+        starts.append(time.monotonic())
+        for _ in patients:
+            time.sleep(random.uniform(0, read_delay))
+        scheduler.finish_tick()
+    return starts
+
+def measure_async(ticks: int, interval: float, read_delay: float) -> list:
+    starts = []
+
+    async def slow_reading(patient):
+        if not starts or time.monotonic() - starts[-1] > interval / 2:
+            starts.append(time.monotonic())
+        await asyncio.sleep(random.uniform(0, read_delay))
+        return await simulated_reading(patient)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        asyncio.run(monitor_blood_pressure_async(duration_minutes=(ticks - 0.5) * interval / 60,
+                                                 interval_seconds=interval, read_reading=slow_reading))
+    return starts
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--ticks', type=int, default=20)
+    parser.add_argument('--interval', type=float, default=0.2)
+    parser.add_argument('--read-delay', type=float, default=0.02)
+    args = parser.parse_args()
+
+    print(f"{'loop':<20} {'period ms':>10} {'drift ms':>10}")
+    for name, measure in [("sleep after work", measure_sleep_after_work),
+                          ("TickScheduler", measure_scheduler),
+                          ("asyncio monitor", measure_async)]:
+        starts = measure(args.ticks, args.interval, args.read_delay)
+        period = (starts[-1] - starts[0]) / (len(starts) - 1)
+        drift = starts[-1] - starts[0] - (len(starts) - 1) * args.interval
+        print(f"{name:<20} {period * 1000:>10.1f} {drift * 1000:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Measure TrendTracker update cost across window sizes and its memory per patient.
+
+Run from the repository root:
+    python -m benchmarks.bench_trends
+"""
+import argparse
+import random
+import time
+import tracemalloc
+
+from trends import TrendTracker
+
+def measure_updates(patients: int, ticks: int, window: int) -> float:
+    # Report statistics from the second reading on, so every window does the same work
+    tracker = TrendTracker(window=window, min_readings=2)
+    readings = [{'systolic': random.randint(90, 200), 'diastolic': random.randint(60, 120)}
+                for _ in range(patients)]
+    start = time.perf_counter()
+    for tick in range(ticks):
+        for patient_id, reading in enumerate(readings):
+            tracker.update(patient_id, reading, timestamp=tick * 20.0)
+    return (time.perf_counter() - start) / (patients * ticks) * 1e6
+
+def measure_memory(patients: int, window: int) -> float:
+    tracemalloc.start()
+    tracker = TrendTracker(window=window)
+    for patient_id in range(patients):
+        tracker.update(patient_id, {'systolic': 120, 'diastolic': 80}, timestamp=0.0)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size / patients
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--patients', type=int, default=2000)
+    parser.add_argument('--ticks', type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'window':>6} {'us/reading':>10} {'bytes/patient':>14}")
+    for window in (12, 120, 1200):
+        micros = measure_updates(args.patients, args.ticks, window)
+        memory = measure_memory(args.patients, window)
+        print(f"{window:>6} {micros:>10.2f} {memory:>14,.0f}")
+
+if __name__ == "__main__":
+    main()
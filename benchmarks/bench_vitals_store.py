@@ -0,0 +1,56 @@
+"""
+Compare memory used by a list of VitalSigns objects and by a VitalsStore.
+
+Run from the repository root:
+    python -m benchmarks.bench_vitals_store
+"""
+import argparse
+import datetime
+import time
+import tracemalloc
+
+from vitals_simulator import simulate_vital_signs_batch
+from vitals_store import VitalsStore
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--patients', type=int, default=1000)
+    parser.add_argument('--ticks', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    batches = [simulate_vital_signs_batch(range(args.patients), args.seed + tick)
+               for tick in range(args.ticks)]
+    rows = args.patients * args.ticks
+    start_time = datetime.datetime.now()
+
+    tracemalloc.start()
+    readings = []
+    for tick, batch in enumerate(batches):
+        readings.extend(batch.to_vital_signs(start_time + datetime.timedelta(seconds=tick)))
+    list_bytes = tracemalloc.get_traced_memory()[0]
+    del readings
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    store = VitalsStore(capacity=rows)
+    start = time.perf_counter()
+    for tick, batch in enumerate(batches):
+        store.extend(batch, timestamp=start_time + datetime.timedelta(seconds=tick))
+    append_time = time.perf_counter() - start
+    store_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for patient_id in range(100):
+        store.window(patient_id, minutes=1, now_ms=int(start_time.timestamp() * 1000) + args.ticks * 1000)
+    query_time = (time.perf_counter() - start) / 100
+
+    print(f"readings:            {rows}")
+    print(f"list of VitalSigns:  {list_bytes / rows:.0f} bytes/reading")
+    print(f"VitalsStore:         {store_bytes / rows:.0f} bytes/reading")
+    print(f"store append:        {rows / append_time:,.0f} readings/s")
+    print(f"1-minute window:     {query_time * 1000:.2f} ms/query")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Send simulated bedside readings to an ingestion source over UDP or TCP.
+
+Run from the repository root, e.g. against a TCPSource on port 9000:
+    python -m benchmarks.load_generator --transport tcp --port 9000 --rate 50000
+"""
+import argparse
+import socket
+import time
+
+import numpy as np
+
+from ingestion import MAX_DATAGRAM_RECORDS, encode_frame, encode_lines, now_ms
+from scheduling import TickScheduler
+from vitals_simulator import simulate_ward_batch
+
+def generate_load(host: str, port: int, transport: str = 'tcp', protocol: str = 'binary',
+                  rate: float = 50_000, duration: float = 10.0, patients: int = 10_000,
+                  frame_records: int = 1000) -> int:
+    """
+    Send readings at `rate` per second (as fast as possible if 0) for `duration` seconds.
+
+    Returns:
+        int: Readings sent
+    """
+    if transport == 'udp':
+        frame_records = min(frame_records, MAX_DATAGRAM_RECORDS)
+    rng = np.random.default_rng(1)
+    # A pool of pre-encoded frames keeps the generator cheap; timestamps are refreshed per frame
+    templates = [simulate_ward_batch(rng.integers(1, patients + 1, frame_records), rng) for _ in range(16)]
+    encode = encode_frame if protocol == 'binary' else encode_lines
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM if transport == 'udp' else socket.SOCK_STREAM)
+    if transport == 'tcp':
+        sock.connect((host, port))
+    scheduler = TickScheduler(frame_records / rate, coalesce=True) if rate else None
+    sent, end = 0, time.monotonic() + duration
+    with sock:
+        while time.monotonic() < end:
+            if scheduler:
+                time.sleep(scheduler.delay())
+                scheduler.start_tick()
+            payload = encode(templates[sent // frame_records % len(templates)], now_ms())
+            if transport == 'udp':
+                sock.sendto(payload, (host, port))
+            else:
+                sock.sendall(payload)
+            sent += frame_records
+            if scheduler:
+                scheduler.finish_tick()
+    return sent
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9000)
+    parser.add_argument('--transport', choices=('tcp', 'udp'), default='tcp')
+    parser.add_argument('--protocol', choices=('binary', 'line'), default='binary')
+    parser.add_argument('--rate', type=float, default=50_000, help="readings per second, 0 for no limit")
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--patients', type=int, default=10_000)
+    args = parser.parse_args()
+
+    sent = generate_load(args.host, args.port, args.transport, args.protocol, args.rate,
+                         args.duration, args.patients)
+    print(f"Sent {sent} readings in {args.duration} s ({sent / args.duration:,.0f}/s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+Time each stage of the monitoring pipeline and write the results as JSON.
+
+Every stage runs with the same seeded data for each patient count, so runs on
+different commits can be compared with --compare. --profile writes a cProfile
+capture of each stage to inspect with pstats or snakeviz.
+
+Run from the repository root:
+    python -m benchmarks.run_benchmarks --patients 100 1000 10000 --output results.json
+    python -m benchmarks.run_benchmarks --compare results.json
+"""
+import argparse
+import contextlib
+import cProfile
+import datetime
+import io
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+from alert_rules import load_rules
+from fake_modem import FakeModem
+from patient_monitoring import (AlertChannel, Patient, ResponsiblePerson, SMSEngine, VitalSignsCSVWriter,
+                                print_bp_readings, save_vital_signs_to_csv, simulate_blood_pressure,
+                                simulate_vital_signs)
+from vitals_simulator import simulate_vital_signs_batch, simulate_ward_batch
+
+# A stage takes the patient ids, the seed, a scratch directory and an ExitStack for
+# resources that outlive setup, and returns (run, items): run() is the timed call
+# and items the readings or messages it handles
+Stage = Callable[[List[int], int, str, contextlib.ExitStack], Tuple[Callable[[], object], int]]
+
+def _readings(patient_ids: List[int], seed: int) -> list:
+    random.seed(seed)
+    return [simulate_vital_signs(patient_id) for patient_id in patient_ids]
+
+def _bp_readings(patient_ids: List[int], seed: int) -> list:
+    random.seed(seed)
+    return [{'systolic': systolic, 'diastolic': diastolic}
+            for systolic, diastolic in map(simulate_blood_pressure, patient_ids)]
+
+def stage_simulate_vital_signs(patient_ids, seed, workdir, stack):
+    return lambda: _readings(patient_ids, seed), len(patient_ids)
+
+def stage_simulate_blood_pressure(patient_ids, seed, workdir, stack):
+    return lambda: _bp_readings(patient_ids, seed), len(patient_ids)
+
+def stage_simulate_vital_signs_batch(patient_ids, seed, workdir, stack):
+    return lambda: simulate_vital_signs_batch(patient_ids, seed), len(patient_ids)
+
+def stage_evaluate(patient_ids, seed, workdir, stack):
+    rules = load_rules()
+    readings = _bp_readings(patient_ids, seed)
+    return lambda: [rules.evaluate(reading) for reading in readings], len(readings)
+
+def stage_evaluate_batch(patient_ids, seed, workdir, stack):
+    rules = load_rules()
+    batch = simulate_ward_batch(patient_ids, seed)
+    return lambda: rules.evaluate_batch(batch), len(batch)
+
+def _ward(patient_ids: List[int]) -> list:
+    doctor = ResponsiblePerson(1, "Driton", "Alija", "+38344922805")
+    return [Patient(patient_id, "Patient", str(patient_id), datetime.date(1970, 1, 1), 100 + patient_id % 50,
+                    doctor) for patient_id in patient_ids]
+
+def stage_format(patient_ids, seed, workdir, stack):
+    # The console output of one monitor_blood_pressure tick: alerts, then the readings table
+    rules = load_rules()
+    alerts = AlertChannel()  # without a modem alerts are only printed
+    patients = _ward(patient_ids)
+    readings = _bp_readings(patient_ids, seed)
+    matches = [(patient, rule, reading) for patient, reading in zip(patients, readings)
+               for rule in rules.evaluate(reading)]
+    table = [(patient, reading['systolic'], reading['diastolic']) for patient, reading in zip(patients, readings)]
+
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            for patient, rule, reading in matches:
+                alerts.raise_alert(patient, rule, reading)
+            print_bp_readings(table)
+    return run, len(readings)
+
+def _fresh_files(workdir: str, name: str) -> Callable[[], str]:
+    # A new file name for every run, so each run writes a new file instead of appending
+    runs = itertools.count()
+    return lambda: os.path.join(workdir, f"{name}-{next(runs)}.csv")
+
+def stage_save_vital_signs_to_csv(patient_ids, seed, workdir, stack):
+    readings = _readings(patient_ids, seed)
+    next_file = _fresh_files(workdir, "save_vital_signs")
+
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            save_vital_signs_to_csv(readings, next_file())
+    return run, len(readings)
+
+def stage_csv_writer(patient_ids, seed, workdir, stack):
+    readings = _readings(patient_ids, seed)
+    next_file = _fresh_files(workdir, "csv_writer")
+
+    def run():
+        with VitalSignsCSVWriter(next_file(), flush_rows=100_000) as writer:
+            writer.write_many(readings)
+    return run, len(readings)
+
+def stage_send_sms(patient_ids, seed, workdir, stack, messages=10):
+    # SMS round trips against the pty fake modem, independent of the patient count
+    modem = stack.enter_context(FakeModem())
+    engine = SMSEngine()
+    engine.open_port(modem.port_name)
+    stack.callback(engine.close_port)
+
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            for index in range(messages):
+                engine.send_sms("+38344922805", f"Benchmark alert {index}")
+    return run, messages
+
+STAGES: Dict[str, Stage] = {
+    'simulate_vital_signs': stage_simulate_vital_signs,
+    'simulate_blood_pressure': stage_simulate_blood_pressure,
+    'simulate_vital_signs_batch': stage_simulate_vital_signs_batch,
+    'evaluate': stage_evaluate,
+    'evaluate_batch': stage_evaluate_batch,
+    'format': stage_format,
+    'save_vital_signs_to_csv': stage_save_vital_signs_to_csv,
+    'csv_writer': stage_csv_writer,
+    'send_sms': stage_send_sms,
+}
+
+# Stages whose cost does not depend on the patient count run once per benchmark
+FIXED_STAGES = {'send_sms'}
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def run_stage(name: str, patient_count: int, seed: int, repeat: int, workdir: str,
+              profile_dir: str = None) -> dict:
+    with contextlib.ExitStack() as stack:
+        run, items = STAGES[name](list(range(1, patient_count + 1)), seed, workdir, stack)
+        run()  # warm up caches and lazy imports
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            times.append(time.perf_counter() - start)
+        if profile_dir:
+            profiler = cProfile.Profile()
+            profiler.runcall(run)
+            profiler.dump_stats(os.path.join(profile_dir, f"{name}-{patient_count}.prof"))
+    best = min(times)
+    return {
+        'stage': name,
+        'patients': patient_count,
+        'items': items,
+        'repeat': repeat,
+        'best_s': best,
+        'median_s': statistics.median(times),
+        'per_item_us': 1e6 * best / items if items else 0.0,
+    }
+
+def compare(results: List[dict], baseline: dict):
+    before = {(r['stage'], r['patients']): r for r in baseline['results']}
+    print(f"\nAgainst {baseline['meta'].get('commit', '?')}:")
+    for result in results:
+        old = before.get((result['stage'], result['patients']))
+        if old:
+            print(f"  {result['stage']:<28} {result['patients']:>7}  {old['best_s'] * 1000:>9.2f} ms -> "
+                  f"{result['best_s'] * 1000:>9.2f} ms  ({old['best_s'] / result['best_s']:.2f}x)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--patients', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--stages', nargs='+', choices=list(STAGES), default=list(STAGES))
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="write the results to this JSON file")
+    parser.add_argument('--compare', help="JSON results of an earlier run to compare with")
+    parser.add_argument('--profile', metavar='DIR', help="write a cProfile capture of each stage to DIR")
+    args = parser.parse_args()
+
+    if args.profile:
+        os.makedirs(args.profile, exist_ok=True)
+    results = []
+    print(f"{'stage':<28} {'patients':>8} {'best ms':>10} {'median ms':>10} {'us/item':>9}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for name in args.stages:
+            counts = args.patients[:1] if name in FIXED_STAGES else args.patients
+            for patient_count in counts:
+                result = run_stage(name, patient_count, args.seed, args.repeat, workdir, args.profile)
+                results.append(result)
+                print(f"{name:<28} {patient_count:>8} {result['best_s'] * 1000:>10.2f} "
+                      f"{result['median_s'] * 1000:>10.2f} {result['per_item_us']:>9.2f}")
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'seed': args.seed,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2)
+        print(f"Results written to {args.output}")
+    if args.compare:
+        with open(args.compare) as baseline:
+            compare(results, json.load(baseline))
+    if args.profile:
+        print(f"Profiles written to {args.profile}; view with: python -m pstats {args.profile}/<stage>-<patients>.prof")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Command line entry point of the patient monitoring tools.
+
+    python cli.py monitor --port COM5 --duration 60
+    python cli.py monitor --port COM5 --listen tcp:9000 --listen simulator
+    python cli.py receive --port COM5
+    python cli.py call +38344922805 --port COM5
+    python cli.py replay data/vital_signs.csv
+
+Each command imports only the modules it needs, when it runs, so the tools
+start quickly.
+"""
+import argparse
+import sys
+
+# Port of the GSM modem when none is given
+DEFAULT_PORT = "COM5"
+
+# Kinds of ingestion source accepted by monitor --listen
+LISTEN_KINDS = ('tcp', 'udp', 'serial', 'simulator')
+
+# Parse a --listen value such as "tcp:9000", "udp:9000:line", "serial:/dev/ttyUSB0" or "simulator"
+def parse_listen(spec: str) -> tuple:
+    kind, _, rest = spec.partition(':')
+    target, _, protocol = rest.partition(':')
+    if kind not in LISTEN_KINDS:
+        raise argparse.ArgumentTypeError(f"unknown source {kind!r}, expected one of {', '.join(LISTEN_KINDS)}")
+    if kind in ('tcp', 'udp') and not target.isdigit():
+        raise argparse.ArgumentTypeError(f"{kind} needs a port, e.g. {kind}:9000")
+    if kind == 'serial' and not target:
+        raise argparse.ArgumentTypeError("serial needs a device, e.g. serial:/dev/ttyUSB0")
+    if protocol and protocol not in ('binary', 'line'):
+        raise argparse.ArgumentTypeError(f"unknown protocol {protocol!r}, expected binary or line")
+    return kind, target, protocol or None
+
+# Create the ingestion sources given with --listen
+def build_sources(specs, interval: float, patient_ids) -> list:
+    from ingestion import SerialSource, SimulatorSource, TCPSource, UDPSource
+
+    sources = []
+    for kind, target, protocol in specs:
+        options = {'protocol': protocol} if protocol else {}
+        if kind == 'tcp':
+            sources.append(TCPSource(port=int(target), **options))
+        elif kind == 'udp':
+            sources.append(UDPSource(port=int(target), **options))
+        elif kind == 'serial':
+            sources.append(SerialSource(target, **options))
+        else:
+            sources.append(SimulatorSource(patient_ids, interval=interval))
+    return sources
+
+def run_monitor(args):
+    import contextlib
+    from alert_rules import load_rules
+    from metrics import MetricsServer, SnapshotWriter
+
+    # One port opens a single modem, several ports a modem pool
+    com_port = args.port[0] if args.port and len(args.port) == 1 else args.port
+    registry = None
+    if args.registry:
+        from registry import PatientRegistry
+        registry = PatientRegistry()
+    rules = load_rules(args.rules)
+
+    with contextlib.ExitStack() as stack:
+        if args.metrics_port is not None:
+            stack.enter_context(MetricsServer(args.metrics_port))
+        if args.metrics_file:
+            stack.enter_context(SnapshotWriter(args.metrics_file))
+        if args.listen:
+            from ingestion import Ingestor, monitor_ingested
+            from patient_monitoring import patients
+            monitored_patients = registry.patients() if registry is not None else patients
+            sources = build_sources(args.listen, args.interval, [patient.id for patient in monitored_patients])
+            monitor_ingested(Ingestor(sources), args.duration, com_port, args.cooldown, rules, registry)
+        elif args.workers > 1:
+            from sharded_monitor import monitor_sharded
+            monitor_sharded(args.duration, args.interval, args.workers, com_port, args.cooldown, rules, registry)
+        else:
+            from patient_monitoring import monitor_blood_pressure
+            trends = None
+            if args.trend_window:
+                from trends import TrendTracker
+                trends = TrendTracker(window=args.trend_window)
+            monitor_blood_pressure(args.duration, args.interval, com_port, args.cooldown, rules, registry, trends)
+
+def run_receive(args):
+    from receive_sms import receive_sms
+    receive_sms(args.port)
+
+def run_call(args):
+    from make_call import make_call
+    make_call(args.phone_number, args.port)
+
+def run_replay(args):
+    from alert_rules import load_rules
+    from replay import print_replay_report, replay_files, write_alert_times
+
+    results = replay_files(args.paths, load_rules(args.rules), args.cooldown, args.trend_window, args.workers)
+    print_replay_report(results)
+    if args.alerts_csv:
+        alerts = write_alert_times(results, args.alerts_csv)
+        print(f"\n{alerts} alerts written to {args.alerts_csv}")
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    monitor = commands.add_parser('monitor', help="monitor blood pressure and send SMS alerts")
+    monitor.add_argument('--port', nargs='+', help="GSM modem port; several ports form a modem pool")
+    monitor.add_argument('--duration', type=float, default=5, help="minutes to monitor")
+    monitor.add_argument('--interval', type=float, default=20, help="seconds between readings")
+    monitor.add_argument('--cooldown', type=float, default=300, help="seconds before a repeated alert")
+    monitor.add_argument('--rules', help="alert rule table CSV, the built-in rules by default")
+    monitor.add_argument('--registry', action='store_true', help="monitor the patients in the data files")
+    monitor.add_argument('--trend-window', type=int, help="readings per patient for the trend rules, e.g. 90")
+    monitor.add_argument('--workers', type=int, default=1, help="worker processes for the sharded monitor")
+    monitor.add_argument('--listen', action='append', type=parse_listen, metavar='SOURCE',
+                         help="ingest readings from tcp:PORT, udp:PORT, serial:DEVICE or simulator; "
+                              "append :line or :binary to set the protocol; repeatable")
+    monitor.add_argument('--metrics-port', type=int, help="serve metrics over HTTP on this port")
+    monitor.add_argument('--metrics-file', help="write a metrics snapshot to this JSON file")
+    monitor.set_defaults(handler=run_monitor)
+
+    receive = commands.add_parser('receive', help="print incoming SMS messages")
+    receive.add_argument('--port', default=DEFAULT_PORT, help="GSM modem port")
+    receive.set_defaults(handler=run_receive)
+
+    call = commands.add_parser('call', help="place a voice call")
+    call.add_argument('phone_number')
+    call.add_argument('--port', default=DEFAULT_PORT, help="GSM modem port")
+    call.set_defaults(handler=run_call)
+
+    replay = commands.add_parser('replay', help="replay recorded vital signs against the alert rules")
+    replay.add_argument('paths', nargs='*', default=["data/vital_signs.csv"],
+                        help="vital signs CSV files or binary log directories")
+    replay.add_argument('--rules', help="alert rule table CSV, the built-in rules by default")
+    replay.add_argument('--cooldown', type=float, default=300, help="seconds before a repeated alert")
+    replay.add_argument('--trend-window', type=int, help="readings per patient for the trend rules, e.g. 90")
+    replay.add_argument('--workers', type=int, help="worker processes, one per CPU core by default")
+    replay.add_argument('--alerts-csv', help="write every alert to this CSV file")
+    replay.set_defaults(handler=run_replay)
+    return parser
+
+def main(argv=None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == 'monitor' and args.listen and (args.workers > 1 or args.trend_window):
+        parser.error("--listen cannot be combined with --workers or --trend-window")
+    try:
+        args.handler(args)
+    except KeyboardInterrupt:
+        print("\nStopped by user.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+import datetime
+import os
+import pty
+import select
+import threading
+import time
+import tty
+from typing import Dict, List, Tuple
+
+class FakeModem:
+    """
+    Pseudo-terminal backed GSM modem simulator for tests and benchmarks.
+
+    Opens a pty pair and answers AT commands written to the slave side
+    (``port_name``) the way a GSM modem in SMS text mode would, so
+    ``SMSEngine`` can be exercised without hardware.
+
+    Args:
+        response_delay (float): Seconds to wait before answering each command
+        send_delay (float): Seconds to wait before confirming an SMS submission
+        echo (bool): Echo commands back like a modem with ATE1
+
+    Set ``offline`` to True to make the modem stop answering, as if unplugged.
+    ``deliver_sms`` puts an incoming message into the modem's storage and
+    announces it with +CMTI once new message indications are enabled.
+    ``ring`` announces an incoming call. Voice calls placed with ATD are
+    recorded in ``calls``; ``active_call`` is the dialled number until ATH.
+    """
+
+    def __init__(self, response_delay: float = 0.0, send_delay: float = 0.0, echo: bool = False):
+        self.response_delay = response_delay
+        self.send_delay = send_delay
+        self.echo = echo
+        self.offline = False
+        self.commands: List[str] = []
+        self.sent_messages: List[Tuple[str, str]] = []
+        self.inbox: Dict[int, List[str]] = {}  # index -> [status, sender, timestamp, body]
+        self.new_message_indications = False
+        self.calls: List[str] = []
+        self.active_call = None
+        self._write_lock = threading.Lock()
+        self._master_fd = None
+        self._slave_fd = None
+        self._thread = None
+        self._running = False
+        self._pending_number = None
+        self._message_reference = 0
+
+    @property
+    def port_name(self) -> str:
+        return os.ttyname(self._slave_fd)
+
+    def start(self):
+        self._master_fd, self._slave_fd = pty.openpty()
+        tty.setraw(self._master_fd)
+        tty.setraw(self._slave_fd)
+        self._running = True
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=1)
+        for fd in (self._master_fd, self._slave_fd):
+            if fd is not None:
+                os.close(fd)
+        self._master_fd = self._slave_fd = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _write(self, data: bytes):
+        with self._write_lock:
+            os.write(self._master_fd, data)
+
+    def deliver_sms(self, sender: str, body: str) -> int:
+        """Store an incoming SMS and return its storage index."""
+        index = max(self.inbox, default=0) + 1
+        timestamp = datetime.datetime.now().strftime("%y/%m/%d,%H:%M:%S") + "+00"
+        self.inbox[index] = ["REC UNREAD", sender, timestamp, body]
+        if self.new_message_indications:
+            self._write(f'\r\n+CMTI: "SM",{index}\r\n'.encode())
+        return index
+
+    def ring(self, caller: str):
+        """Announce an incoming call with RING and caller identification."""
+        self._write(f'\r\nRING\r\n\r\n+CLIP: "{caller}",145\r\n'.encode())
+
+    def _stored_message(self, index: int, prefix: str) -> str:
+        status, sender, timestamp, body = self.inbox[index]
+        self.inbox[index][0] = "REC READ"
+        return f'{prefix}"{status}","{sender}","","{timestamp}"\r\n{body}\r\n'
+
+    def _serve(self):
+        buffer = b''
+        while self._running:
+            ready, _, _ = select.select([self._master_fd], [], [], 0.05)
+            if not ready:
+                continue
+            try:
+                buffer += os.read(self._master_fd, 4096)
+            except OSError:
+                break
+            if self.offline:
+                buffer, self._pending_number = b'', None
+                continue
+            buffer = self._process(buffer)
+
+    def _process(self, buffer: bytes) -> bytes:
+        while True:
+            if self._pending_number is not None:
+                # Text entry mode: the message body ends with Ctrl+Z
+                if b'\x1a' not in buffer:
+                    return buffer
+                body, buffer = buffer.split(b'\x1a', 1)
+                self._finish_sms(body.decode('utf-8', errors='ignore'))
+                continue
+
+            positions = [p for p in (buffer.find(b'\r'), buffer.find(b'\n')) if p >= 0]
+            if not positions:
+                return buffer
+            end = min(positions)
+            line, buffer = buffer[:end].decode('utf-8', errors='ignore').strip(), buffer[end + 1:]
+            # Treat CR LF as a single terminator
+            if buffer.startswith(b'\n'):
+                buffer = buffer[1:]
+            if line:
+                self._handle_command(line)
+
+    def _handle_command(self, command: str):
+        self.commands.append(command)
+        if self.echo:
+            self._write(f'{command}\r\n'.encode())
+        if self.response_delay:
+            time.sleep(self.response_delay)
+
+        upper = command.upper()
+        if upper.startswith('AT+CMGS='):
+            self._pending_number = command.split('=', 1)[1].strip('"')
+            self._write(b'\r\n> ')
+        elif upper == 'AT' or upper.startswith(('AT+CMGF=', 'AT+CSCS=')):
+            self._write(b'\r\nOK\r\n')
+        elif upper.startswith('ATD') and command.endswith(';'):
+            self.active_call = command[3:-1]
+            self.calls.append(self.active_call)
+            self._write(b'\r\nOK\r\n')
+        elif upper == 'ATH':
+            self.active_call = None
+            self._write(b'\r\nOK\r\n')
+        elif upper.startswith('AT+CNMI='):
+            self.new_message_indications = command.split('=', 1)[1].split(',')[1:2] != ['0']
+            self._write(b'\r\nOK\r\n')
+        elif upper.startswith('AT+CMGR='):
+            index = int(command.split('=', 1)[1])
+            if index in self.inbox:
+                self._write(f'\r\n{self._stored_message(index, "+CMGR: ")}\r\nOK\r\n'.encode())
+            else:
+                self._write(b'\r\n+CMS ERROR: 321\r\n')
+        elif upper.startswith('AT+CMGD='):
+            self.inbox.pop(int(command.split('=', 1)[1].split(',')[0]), None)
+            self._write(b'\r\nOK\r\n')
+        elif upper.startswith('AT+CMGL='):
+            status = command.split('=', 1)[1].strip('"').upper()
+            listing = "".join(self._stored_message(index, f"+CMGL: {index},")
+                              for index in sorted(self.inbox)
+                              if status == "ALL" or self.inbox[index][0] == status)
+            self._write(f'\r\n{listing}\r\nOK\r\n'.encode())
+        else:
+            self._write(b'\r\nERROR\r\n')
+
+    def _finish_sms(self, body: str):
+        if self.send_delay:
+            time.sleep(self.send_delay)
+        self.sent_messages.append((self._pending_number, body))
+        self._pending_number = None
+        self._message_reference += 1
+        self._write(f'\r\n+CMGS: {self._message_reference}\r\n\r\nOK\r\n'.encode())
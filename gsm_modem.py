@@ -0,0 +1,392 @@
+import csv
+import datetime
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import List, Optional
+
+# Final result codes that terminate an AT command response
+FINAL_RESULT_CODES = ('OK', 'ERROR', 'NO CARRIER', 'NO DIALTONE', 'BUSY', 'NO ANSWER')
+ERROR_RESULT_PREFIXES = ('+CME ERROR:', '+CMS ERROR:')
+
+# Timeouts (seconds) for waiting on modem responses
+COMMAND_TIMEOUT = 2.0
+SMS_SEND_TIMEOUT = 30.0
+DIAL_TIMEOUT = 30.0
+
+# Serial read timeout used while polling for response bytes
+READ_POLL_INTERVAL = 0.05
+
+# Commands that put the modem into SMS text mode with the GSM character set
+INIT_COMMANDS = ('AT', 'AT+CMGF=1', 'AT+CSCS="GSM"')
+
+# Unsolicited result codes the modem may send at any time
+URC_PREFIXES = ('+CMTI:', 'RING', '+CLIP:', '+CRING:')
+
+# Lines kept while no command is running: the URCs, and NO CARRIER when the other side hangs up
+IDLE_URC_PREFIXES = URC_PREFIXES + ('NO CARRIER',)
+
+# Report new messages with +CMTI: "<storage>",<index> instead of buffering them
+NEW_MESSAGE_INDICATIONS = 'AT+CNMI=2,1,0,0,0'
+
+# Response to a single AT command
+@dataclass
+class ATResponse:
+    command: str
+    lines: List[str]
+    result: Optional[str]  # final result code, '>' for the SMS prompt, None on timeout
+    elapsed: float  # seconds between writing the command and the final result
+
+    @property
+    def ok(self) -> bool:
+        return self.result in ('OK', '>')
+
+    @property
+    def timed_out(self) -> bool:
+        return self.result is None
+
+# Per-session counters of the traffic sent to the modem
+@dataclass
+class SessionStats:
+    commands_sent: int = 0
+    bytes_written: int = 0
+    responses: int = 0
+    total_round_trip: float = 0.0  # seconds, summed over answered commands
+
+    @property
+    def average_round_trip(self) -> float:
+        return self.total_round_trip / self.responses if self.responses else 0.0
+
+# A text mode SMS read from the modem's message storage
+@dataclass
+class SMSMessage:
+    index: Optional[int]
+    status: str
+    sender: str
+    timestamp: Optional[datetime.datetime]
+    body: str
+
+# Parse a text mode service centre timestamp such as "25/03/22,13:36:07+04"
+def parse_sms_timestamp(text: str) -> Optional[datetime.datetime]:
+    try:
+        date_part, time_part = text.split(',')
+        sign = -1 if '-' in time_part else 1
+        clock, quarters = time_part.replace('-', '+').split('+')
+        offset = datetime.timedelta(minutes=15 * int(quarters)) * sign
+        parsed = datetime.datetime.strptime(f"{date_part},{clock}", "%y/%m/%d,%H:%M:%S")
+        return parsed.replace(tzinfo=datetime.timezone(offset))
+    except ValueError:
+        return None
+
+# Parse the lines of a +CMGR or +CMGL response into messages
+def parse_sms_response(lines: List[str], index: Optional[int] = None) -> List[SMSMessage]:
+    messages = []
+    for line in lines:
+        if line.startswith(('+CMGR:', '+CMGL:')):
+            fields = next(csv.reader([line.split(':', 1)[1].strip()]))
+            if line.startswith('+CMGL:'):
+                index, fields = int(fields[0]), fields[1:]
+            timestamp = parse_sms_timestamp(fields[3]) if len(fields) > 3 else None
+            messages.append(SMSMessage(index, fields[0], fields[1], timestamp, ''))
+        elif messages and line not in FINAL_RESULT_CODES:
+            current = messages[-1]
+            current.body = f"{current.body}\n{line}" if current.body else line
+    return messages
+
+# Extract the storage index from a +CMTI: "SM",3 indication
+def parse_new_message_index(urc: str) -> Optional[int]:
+    if not urc.startswith('+CMTI:'):
+        return None
+    try:
+        return int(urc.rsplit(',', 1)[1])
+    except (IndexError, ValueError):
+        return None
+
+# Serial SMS Engine to communicate with GSM modem
+class SMSEngine:
+    def __init__(self):
+        self.port = None
+        self.port_name = None
+        self.initialized = False
+        self.stats = SessionStats()
+        self.urcs = deque(maxlen=100)  # unsolicited result codes not yet handled
+        self.indications_enabled = False
+        self.last_message_reference = None  # +CMGS reference of the last SMS sent
+        self._rx_buffer = b''
+        
+    def open_port(self, port_name):
+        self.port_name = port_name
+        self.initialized = False
+        self.stats = SessionStats()
+        self._rx_buffer = b''
+        try:
+            # Imported on first use so that importing the driver stays cheap
+            import serial
+            self.port = serial.Serial(
+                port=port_name,
+                baudrate=115200,
+                timeout=READ_POLL_INTERVAL,
+                parity=serial.PARITY_NONE,
+                stopbits=serial.STOPBITS_ONE,
+                bytesize=serial.EIGHTBITS
+            )
+        except Exception as ex:
+            print(f"Error opening port: {ex}")
+            return False
+
+        # Configure the modem once per session; send_sms retries if this fails
+        if not self.initialize():
+            print(f"Modem on {port_name} did not complete initialization")
+        return True
+    
+    def close_port(self):
+        self.initialized = False
+        if self.port and self.port.is_open:
+            self.port.close()
+
+    def reconnect(self):
+        """Reopen the port and re-run modem initialization."""
+        self.close_port()
+        return self.open_port(self.port_name)
+
+    def initialize(self) -> bool:
+        """
+        Put the modem into SMS text mode with the GSM character set.
+
+        Runs once per session; it is only repeated after a reconnect or
+        after the modem reports an error.
+        """
+        # New message indications have to be requested again after a reset
+        self.indications_enabled = False
+        for command in INIT_COMMANDS:
+            response = self.send_command(command)
+            if not response.ok:
+                print(f"Modem initialization failed: {command} -> {response.result or 'timeout'}")
+                return False
+        self.initialized = True
+        return True
+
+    def send_command(self, command: str, timeout: float = COMMAND_TIMEOUT,
+                     expect_prompt: bool = False) -> ATResponse:
+        """
+        Send an AT command and wait for its final result code.
+
+        Returns as soon as the modem answers instead of sleeping a fixed time.
+
+        Args:
+            command (str): The AT command without line terminator
+            timeout (float): Seconds to wait for the final result code
+            expect_prompt (bool): Also stop at the '>' text entry prompt
+        """
+        return self._transact(f'{command}\r\n'.encode(), command, timeout, expect_prompt)
+
+    def _transact(self, payload: bytes, command: str, timeout: float,
+                  expect_prompt: bool = False) -> ATResponse:
+        # Anything received while idle is unsolicited; keep it for wait_for_urc
+        self._collect_urcs()
+        start = time.monotonic()
+        self.stats.commands_sent += 1
+        self.stats.bytes_written += self.port.write(payload) or 0
+        response = self._read_response(command, start, start + timeout, expect_prompt)
+        if response.timed_out or not response.ok:
+            # Modem state is unknown after an error, configure it again next time
+            self.initialized = False
+        if not response.timed_out:
+            self.stats.responses += 1
+            self.stats.total_round_trip += response.elapsed
+        return response
+
+    def _receive(self) -> bool:
+        chunk = self.port.read(self.port.in_waiting or 1)
+        self._rx_buffer += chunk
+        return bool(chunk)
+
+    def _next_line(self) -> Optional[str]:
+        while b'\n' in self._rx_buffer:
+            raw_line, self._rx_buffer = self._rx_buffer.split(b'\n', 1)
+            line = raw_line.strip().decode('utf-8', errors='ignore')
+            if line:
+                return line
+        return None
+
+    def _collect_urcs(self):
+        while self.port.in_waiting:
+            self._receive()
+        self._keep_idle_urcs()
+        # An incomplete line stays buffered, it may be a +CMTI still arriving
+
+    def _keep_idle_urcs(self):
+        # Lines outside a transaction are URCs or leftovers such as the late OK of
+        # a timed out command; only the URCs are kept
+        line = self._next_line()
+        while line is not None:
+            if line.startswith(IDLE_URC_PREFIXES):
+                self.urcs.append(line)
+            line = self._next_line()
+
+    def _read_response(self, command: str, start: float, deadline: float,
+                       expect_prompt: bool) -> ATResponse:
+        lines = []
+        while True:
+            if self._receive() or self._rx_buffer:
+                line = self._next_line()
+                while line is not None:
+                    # Skip the echo of the command itself and set aside unsolicited codes
+                    if line == command:
+                        pass
+                    elif line.startswith(URC_PREFIXES):
+                        self.urcs.append(line)
+                    else:
+                        lines.append(line)
+                        if line in FINAL_RESULT_CODES or line.startswith(ERROR_RESULT_PREFIXES):
+                            return ATResponse(command, lines, line, time.monotonic() - start)
+                    line = self._next_line()
+                # The text entry prompt is not terminated by a newline
+                if expect_prompt and self._rx_buffer.strip() == b'>':
+                    self._rx_buffer = b''
+                    return ATResponse(command, lines, '>', time.monotonic() - start)
+            if time.monotonic() >= deadline:
+                return ATResponse(command, lines, None, time.monotonic() - start)
+
+    def wait_for_urc(self, timeout: Optional[float] = None) -> Optional[str]:
+        """
+        Block until the modem sends an unsolicited result code such as +CMTI.
+
+        Returns:
+            str: The URC line, or None if none arrived within the timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.urcs:
+            if self._receive() or self._rx_buffer:
+                self._keep_idle_urcs()
+            if not self.urcs and deadline is not None and time.monotonic() >= deadline:
+                return None
+        return self.urcs.popleft()
+
+    def enable_new_message_indications(self) -> bool:
+        """Ask the modem to announce new messages with +CMTI instead of storing them silently."""
+        self.indications_enabled = self.send_command(NEW_MESSAGE_INDICATIONS).ok
+        return self.indications_enabled
+
+    def poll_messages(self, timeout: float = 0.0) -> List[SMSMessage]:
+        """
+        Return the messages announced with +CMTI, waiting up to `timeout` seconds.
+
+        Enables new message indications on first use, picking up unread
+        messages stored before that, and again after a message could not be
+        read. Messages are deleted from the modem once read.
+        """
+        if not self.initialized and not self.initialize():
+            return []
+        messages = []
+        if not self.indications_enabled:
+            if not self.enable_new_message_indications():
+                return []
+            response = self.send_command('AT+CMGL="REC UNREAD"', timeout=SMS_SEND_TIMEOUT)
+            if not response.ok:
+                # List again on the next poll so stored messages are not missed
+                self.indications_enabled = False
+                return []
+            messages = parse_sms_response(response.lines)
+            for message in messages:
+                self.delete_message(message.index)
+
+        # Messages found in storage are returned without waiting for new ones
+        urc = self.wait_for_urc(0.0 if messages else timeout)
+        others = []
+        while urc is not None:
+            message = self.take_new_message(urc)
+            if message:
+                messages.append(message)
+            elif parse_new_message_index(urc) is None:
+                others.append(urc)
+            urc = self.urcs.popleft() if self.urcs else None
+        # Leave other unsolicited codes such as RING for their consumers
+        self.urcs.extend(others)
+        return messages
+
+    def take_new_message(self, urc: str) -> Optional[SMSMessage]:
+        """
+        Read and delete the message announced by a +CMTI line, None for other lines.
+
+        If the message cannot be read it stays in storage and new message
+        indications are requested again, which makes the next poll_messages
+        pick it up with the other unread messages.
+        """
+        index = parse_new_message_index(urc)
+        if index is None:
+            return None
+        message = self.read_message(index)
+        if message:
+            self.delete_message(index)
+        else:
+            print(f"Could not read message {index}, listing unread messages on the next poll")
+            self.indications_enabled = False
+        return message
+
+    def read_message(self, index: int) -> Optional[SMSMessage]:
+        response = self.send_command(f'AT+CMGR={index}')
+        messages = parse_sms_response(response.lines, index) if response.ok else []
+        return messages[0] if messages else None
+
+    def list_messages(self, status: str = "REC UNREAD") -> List[SMSMessage]:
+        response = self.send_command(f'AT+CMGL="{status}"', timeout=SMS_SEND_TIMEOUT)
+        return parse_sms_response(response.lines) if response.ok else []
+
+    def delete_message(self, index: int) -> bool:
+        return self.send_command(f'AT+CMGD={index}').ok
+            
+    def send_sms(self, phone_number, message):
+        if not self.port or not self.port.is_open:
+            print("Serial port is not open")
+            return False
+        
+        try:
+            # Configure the modem only if this session has not done so yet
+            if not self.initialized and not self.initialize():
+                print("Failed to send SMS: modem is not initialized")
+                return False
+            
+            # Set the destination phone number and wait for the '>' prompt
+            response = self.send_command(f'AT+CMGS="{phone_number}"', expect_prompt=True)
+            if response.result != '>':
+                print(f"Failed to send SMS: no prompt ({response.result or 'timeout'})")
+                return False
+            
+            # Send the message and the Ctrl+Z character (ASCII 26), then
+            # wait for the +CMGS: reference and the final result code
+            response = self._transact(f'{message}\x1A'.encode(), message, SMS_SEND_TIMEOUT)
+            
+            if response.result == 'OK':
+                self.last_message_reference = next(
+                    (int(line.split(':', 1)[1]) for line in response.lines if line.startswith('+CMGS:')), None)
+                print(f"SMS sent successfully to {phone_number}")
+                return True
+            else:
+                print(f"Failed to send SMS: {response.result or 'timeout'} {response.lines}")
+                return False
+                
+        except Exception as ex:
+            print(f"Error sending SMS: {ex}")
+            self.initialized = False
+            return False
+
+    def make_call(self, phone_number) -> bool:
+        """Dial a voice call; the trailing ';' of ATD selects voice instead of data."""
+        if not self.port or not self.port.is_open:
+            print("Serial port is not open")
+            return False
+        if not self.initialized and not self.initialize():
+            print("Failed to call: modem is not initialized")
+            return False
+        response = self.send_command(f'ATD{phone_number};', timeout=DIAL_TIMEOUT)
+        if not response.ok:
+            print(f"Failed to call {phone_number}: {response.result or 'timeout'}")
+        return response.ok
+
+    def end_call(self) -> bool:
+        """Hang up the current call."""
+        if not self.port or not self.port.is_open:
+            print("Serial port is not open")
+            return False
+        return self.send_command('ATH').ok
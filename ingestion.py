@@ -0,0 +1,522 @@
+import queue
+import socket
+import struct
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from alert_rules import load_rules
+from metrics import READINGS
+from patient_monitoring import AlertChannel, patients
+from scheduling import TickScheduler
+from vitals_binlog import RECORD_DTYPE
+from vitals_simulator import VitalsBatch, simulate_ward_batch
+
+# Binary frame: magic, record count, base time (epoch ms), then `count` RECORD_DTYPE
+# records whose time_offset is milliseconds after the base time
+FRAME_MAGIC = b'VS'
+FRAME_HEADER = struct.Struct('<2sHq')
+MAX_FRAME_RECORDS = 65535
+
+# Records that fit in one UDP datagram
+MAX_DATAGRAM_RECORDS = (65507 - FRAME_HEADER.size) // RECORD_DTYPE.itemsize
+
+# Line protocol: one reading per line in the column order of the vital signs CSV,
+# "patient_id,timestamp,systolic,diastolic,heart_rate,temperature,oxygen_saturation,respiratory_rate",
+# with the timestamp in epoch ms; an empty timestamp means the time of arrival
+LINE_COLUMNS = 8
+
+PROTOCOLS = ('binary', 'line')
+
+# Bytes read from a stream at once
+RECEIVE_SIZE = 65536
+
+def now_ms() -> int:
+    return int(time.time() * 1000)
+
+def encode_frame(batch: VitalsBatch, timestamp_ms: Optional[int] = None) -> bytes:
+    """Encode a batch of at most MAX_FRAME_RECORDS readings as a binary frame."""
+    if len(batch) > MAX_FRAME_RECORDS:
+        raise ValueError(f"{len(batch)} readings do not fit in one frame, the limit is {MAX_FRAME_RECORDS}")
+    timestamps = batch.timestamp if batch.timestamp is not None else np.full(len(batch), timestamp_ms or now_ms())
+    base_ms = int(timestamps.min()) if len(batch) else 0
+    records = np.empty(len(batch), dtype=RECORD_DTYPE)
+    records['time_offset'] = np.asarray(timestamps, dtype=np.int64) - base_ms
+    for name in ('patient_id', 'systolic', 'diastolic', 'heart_rate', 'oxygen_saturation', 'respiratory_rate'):
+        records[name] = getattr(batch, name)
+    records['temperature'] = np.round(batch.temperature * 100)
+    return FRAME_HEADER.pack(FRAME_MAGIC, len(batch), base_ms) + records.tobytes()
+
+def decode_records(payload: bytes, base_ms: int) -> VitalsBatch:
+    records = np.frombuffer(payload, dtype=RECORD_DTYPE)
+    return VitalsBatch(
+        patient_id=records['patient_id'].astype(np.int32),
+        systolic=records['systolic'].astype(np.int16),
+        diastolic=records['diastolic'].astype(np.int16),
+        heart_rate=records['heart_rate'].astype(np.int16),
+        temperature=records['temperature'] / 100.0,
+        oxygen_saturation=records['oxygen_saturation'].astype(np.int16),
+        respiratory_rate=records['respiratory_rate'].astype(np.int16),
+        timestamp=base_ms + records['time_offset'].astype(np.int64),
+    )
+
+def encode_lines(batch: VitalsBatch, timestamp_ms: Optional[int] = None) -> bytes:
+    timestamps = batch.timestamp if batch.timestamp is not None else np.full(len(batch), timestamp_ms or now_ms())
+    rows = zip(batch.patient_id.tolist(), timestamps.tolist(), batch.systolic.tolist(), batch.diastolic.tolist(),
+               batch.heart_rate.tolist(), batch.temperature.tolist(), batch.oxygen_saturation.tolist(),
+               batch.respiratory_rate.tolist())
+    return "".join(f"{pid},{ts},{sys_bp},{dia_bp},{hr},{temp:.1f},{spo2},{rr}\n"
+                   for pid, ts, sys_bp, dia_bp, hr, temp, spo2, rr in rows).encode()
+
+def decode_lines(lines: List[bytes], received_ms: int) -> Tuple[Optional[VitalsBatch], int]:
+    """
+    Decode complete protocol lines.
+
+    Returns:
+        tuple: (batch or None if no line was valid, number of invalid lines)
+    """
+    rows = [line.split(b',') for line in lines if line.strip()]
+    valid = [row for row in rows if len(row) == LINE_COLUMNS]
+    errors = len(rows) - len(valid)
+    if not valid:
+        return None, errors
+    table = np.array(valid)
+    try:
+        columns = [table[:, i] for i in range(LINE_COLUMNS)]
+        timestamps = np.where(np.char.strip(columns[1]) == b'', b'0', columns[1]).astype(np.int64)
+        batch = VitalsBatch(
+            patient_id=columns[0].astype(np.int32),
+            systolic=columns[2].astype(np.int16),
+            diastolic=columns[3].astype(np.int16),
+            heart_rate=columns[4].astype(np.int16),
+            temperature=columns[5].astype(np.float64),
+            oxygen_saturation=columns[6].astype(np.int16),
+            respiratory_rate=columns[7].astype(np.int16),
+            timestamp=np.where(timestamps == 0, received_ms, timestamps),
+        )
+    except ValueError:
+        # A malformed number; decode line by line to keep the good ones
+        if len(valid) == 1:
+            return None, errors + 1
+        batches = [decode_lines([b','.join(row)], received_ms) for row in valid]
+        good = [batch for batch, _ in batches if batch is not None]
+        return (VitalsBatch.concatenate(good) if good else None), errors + sum(e for _, e in batches)
+    return batch, errors
+
+class FrameDecoder:
+    """
+    Split a byte stream into readings of either protocol.
+
+    Incomplete frames or lines are kept until the rest arrives. After a
+    corrupt binary header the decoder skips to the next frame magic.
+    """
+
+    def __init__(self, protocol: str = 'binary'):
+        if protocol not in PROTOCOLS:
+            raise ValueError(f"Unknown protocol: {protocol}")
+        self.protocol = protocol
+        self.errors = 0
+        self._buffer = b''
+
+    def reset(self):
+        """Discard a partial frame or line."""
+        self._buffer = b''
+
+    def feed(self, data: bytes) -> List[VitalsBatch]:
+        self._buffer += data
+        if self.protocol == 'line':
+            return self._feed_lines()
+        return self._feed_frames()
+
+    def _feed_lines(self) -> List[VitalsBatch]:
+        lines = self._buffer.split(b'\n')
+        self._buffer = lines.pop()
+        batch, errors = decode_lines(lines, now_ms())
+        self.errors += errors
+        return [batch] if batch is not None else []
+
+    def _feed_frames(self) -> List[VitalsBatch]:
+        batches, position, buffer = [], 0, self._buffer
+        while len(buffer) - position >= FRAME_HEADER.size:
+            magic, count, base_ms = FRAME_HEADER.unpack_from(buffer, position)
+            if magic != FRAME_MAGIC:
+                self.errors += 1
+                next_frame = buffer.find(FRAME_MAGIC, position + 1)
+                position = next_frame if next_frame >= 0 else len(buffer) - 1
+                continue
+            end = position + FRAME_HEADER.size + count * RECORD_DTYPE.itemsize
+            if end > len(buffer):
+                break
+            if count:
+                batches.append(decode_records(buffer[position + FRAME_HEADER.size:end], base_ms))
+            position = end
+        self._buffer = buffer[position:]
+        return batches
+
+# Counters of one ingestion source, updated with add() by all of its threads
+@dataclass
+class SourceStats:
+    name: str
+    readings: int = 0
+    frames: int = 0
+    bytes: int = 0
+    errors: int = 0  # malformed frames or lines
+    dropped: int = 0  # readings discarded because the queue was full
+    started: float = field(default_factory=time.monotonic)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def add(self, readings: int = 0, frames: int = 0, bytes: int = 0, errors: int = 0, dropped: int = 0):
+        # A TCPSource updates its counters from one thread per connection
+        with self._lock:
+            self.readings += readings
+            self.frames += frames
+            self.bytes += bytes
+            self.errors += errors
+            self.dropped += dropped
+
+    @property
+    def rate(self) -> float:
+        """Average readings per second since the source started."""
+        elapsed = time.monotonic() - self.started
+        return self.readings / elapsed if elapsed > 0 else 0.0
+
+class Source:
+    """
+    Base class of the ingestion sources; each runs on its own thread.
+
+    Subclasses implement run() and hand decoded batches to push().
+    """
+
+    def __init__(self, name: str):
+        self.stats = SourceStats(name)
+        self.ingestor = None
+        self._running = False
+        self._threads: List[threading.Thread] = []
+
+    def start(self, ingestor: 'Ingestor'):
+        self.ingestor = ingestor
+        self._running = True
+        self.stats.started = time.monotonic()
+        self._spawn(self.run)
+
+    def stop(self):
+        self._running = False
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+
+    def _spawn(self, target, *args):
+        thread = threading.Thread(target=target, args=args, name=f"ingest-{self.stats.name}", daemon=True)
+        self._threads.append(thread)
+        thread.start()
+
+    def run(self):
+        raise NotImplementedError
+
+    def push(self, batch: VitalsBatch, block: bool = True) -> bool:
+        """
+        Queue a batch. A blocking push waits while the queue is full, which
+        slows the sender down; a non-blocking one drops the batch instead.
+        """
+        while self._running:
+            if self.ingestor.put(batch, timeout=0.1 if block else None):
+                self.stats.add(frames=1, readings=len(batch))
+                return True
+            if not block:
+                break
+        self.stats.add(frames=1, dropped=len(batch))
+        return False
+
+class UDPSource(Source):
+    """
+    Readings sent as UDP datagrams, one binary frame or a group of lines each.
+
+    UDP cannot slow the sender down, so datagrams are dropped and counted
+    while the queue is full.
+    """
+
+    def __init__(self, host: str = '0.0.0.0', port: int = 9000, protocol: str = 'binary',
+                 name: Optional[str] = None, receive_buffer: int = 4 * 1024 * 1024):
+        super().__init__(name or "udp")
+        self.protocol = protocol
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, receive_buffer)
+        self.socket.bind((host, port))
+        self.socket.settimeout(0.2)
+        self.stats.name = name or f"udp:{self.address[1]}"
+
+    @property
+    def address(self) -> tuple:
+        return self.socket.getsockname()
+
+    def stop(self):
+        super().stop()
+        self.socket.close()
+
+    def run(self):
+        decoder = FrameDecoder(self.protocol)
+        while self._running:
+            try:
+                datagram = self.socket.recv(65535)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            errors = decoder.errors
+            # Each datagram stands alone; never join it with a previous partial one
+            decoder.reset()
+            for batch in decoder.feed(datagram + (b'\n' if self.protocol == 'line' else b'')):
+                self.push(batch, block=False)
+            self.stats.add(bytes=len(datagram), errors=decoder.errors - errors)
+
+class TCPSource(Source):
+    """
+    Readings streamed over TCP by any number of connected devices.
+
+    While the queue is full the source stops reading, so TCP flow control
+    slows the devices down instead of losing readings.
+    """
+
+    def __init__(self, host: str = '0.0.0.0', port: int = 9000, protocol: str = 'binary',
+                 name: Optional[str] = None):
+        super().__init__(name or "tcp")
+        self.protocol = protocol
+        self.connections = 0
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.socket.bind((host, port))
+        self.socket.listen()
+        self.socket.settimeout(0.2)
+        self.stats.name = name or f"tcp:{self.address[1]}"
+
+    @property
+    def address(self) -> tuple:
+        return self.socket.getsockname()
+
+    def stop(self):
+        super().stop()
+        self.socket.close()
+
+    def run(self):
+        while self._running:
+            try:
+                connection, _ = self.socket.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            self.connections += 1
+            self._spawn(self._serve, connection)
+
+    def _serve(self, connection: socket.socket):
+        decoder = FrameDecoder(self.protocol)
+        connection.settimeout(0.2)
+        with connection:
+            while self._running:
+                try:
+                    data = connection.recv(RECEIVE_SIZE)
+                except socket.timeout:
+                    continue
+                except OSError:
+                    break
+                if not data:
+                    break
+                errors = decoder.errors
+                for batch in decoder.feed(data):
+                    self.push(batch)
+                self.stats.add(bytes=len(data), errors=decoder.errors - errors)
+
+class SerialSource(Source):
+    """Readings from a bedside device on a serial line, in the line protocol by default."""
+
+    def __init__(self, port_name: str, baudrate: int = 115200, protocol: str = 'line',
+                 name: Optional[str] = None):
+        super().__init__(name or port_name)
+        self.port_name = port_name
+        self.baudrate = baudrate
+        self.protocol = protocol
+
+    def run(self):
+        import serial
+
+        decoder = FrameDecoder(self.protocol)
+        try:
+            port = serial.Serial(self.port_name, self.baudrate, timeout=0.2)
+        except Exception as ex:
+            print(f"Error opening port {self.port_name}: {ex}")
+            return
+        with port:
+            while self._running:
+                data = port.read(port.in_waiting or 1)
+                if not data:
+                    continue
+                errors = decoder.errors
+                for batch in decoder.feed(data):
+                    self.push(batch)
+                self.stats.add(bytes=len(data), errors=decoder.errors - errors)
+
+class SimulatorSource(Source):
+    """The vital signs simulator as a source: one reading per patient every interval."""
+
+    def __init__(self, patient_ids, interval: float = 1.0, rng=None, name: str = "simulator"):
+        super().__init__(name)
+        self.patient_ids = np.asarray(patient_ids, dtype=np.int32)
+        self.interval = interval
+        self.rng = np.random.default_rng(rng)
+
+    def run(self):
+        scheduler = TickScheduler(self.interval)
+        while self._running:
+            time.sleep(scheduler.delay())
+            if not self._running:
+                break
+            scheduler.start_tick()
+            batch = simulate_ward_batch(self.patient_ids, self.rng)
+            batch.timestamp = np.full(len(batch), now_ms(), dtype=np.int64)
+            self.push(batch)
+            scheduler.finish_tick()
+
+class Ingestor:
+    """
+    Bounded queue of readings fed by any number of sources.
+
+    Sources push decoded batches; consumers take them with get(), which
+    merges queued batches into one of up to `max_rows` readings so the
+    per-batch work is amortized. The queue holds at most `max_batches`
+    batches, which is where backpressure starts.
+
+    Args:
+        sources (list): Sources to start with the ingestor
+        max_batches (int): Queue capacity in batches
+        max_rows (int): Most readings returned by one get()
+    """
+
+    def __init__(self, sources=(), max_batches: int = 256, max_rows: int = 65536):
+        self.sources: List[Source] = list(sources)
+        self.max_rows = max_rows
+        self._queue = queue.Queue(maxsize=max_batches)
+        self._last_rates = {}
+        self._started = False
+
+    def add_source(self, source: Source):
+        self.sources.append(source)
+        if self._started:
+            source.start(self)
+
+    def start(self):
+        self._started = True
+        for source in self.sources:
+            source.start(self)
+        return self
+
+    def stop(self):
+        self._started = False
+        for source in self.sources:
+            source.stop()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def put(self, batch: VitalsBatch, timeout: Optional[float] = None) -> bool:
+        try:
+            if timeout is None:
+                self._queue.put_nowait(batch)
+            else:
+                self._queue.put(batch, timeout=timeout)
+        except queue.Full:
+            return False
+        return True
+
+    def get(self, timeout: Optional[float] = None) -> Optional[VitalsBatch]:
+        """Return the queued readings as one batch, or None after timeout seconds without any."""
+        try:
+            batches = [self._queue.get(timeout=timeout)]
+        except queue.Empty:
+            return None
+        rows = len(batches[0])
+        while rows < self.max_rows:
+            try:
+                batches.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+            rows += len(batches[-1])
+        return batches[0] if len(batches) == 1 else VitalsBatch.concatenate(batches)
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def rates(self) -> Dict[str, float]:
+        """Readings per second of each source since the previous call."""
+        now, rates = time.monotonic(), {}
+        for source in self.sources:
+            since, readings = self._last_rates.get(id(source), (source.stats.started, 0))
+            rates[source.stats.name] = (source.stats.readings - readings) / max(now - since, 1e-9)
+            self._last_rates[id(source)] = (now, source.stats.readings)
+        return rates
+
+def monitor_ingested(ingestor: Ingestor, duration_minutes=5, com_port=None, alert_cooldown_seconds=300,
+                     rules=None, registry=None, stores=(), report_interval=10.0) -> List[SourceStats]:
+    """
+    Monitor the readings arriving through an Ingestor.
+
+    Each batch taken from the ingestor is appended to the stores, evaluated
+    with the vectorized rules and its alerts raised through an AlertChannel.
+    Readings of patients not in the registry are stored but raise no alerts.
+
+    Args:
+        ingestor (Ingestor): Not yet started ingestor with its sources
+        duration_minutes (float): How long to monitor
+        com_port: Serial port, list of ports or ModemService for SMS alerts
+        alert_cooldown_seconds (int): Cooldown for repeated alerts of a patient
+        rules (RuleSet): Threshold rules, the built-in table if None
+        registry (PatientRegistry): Known patients, the built-in list if None
+        stores (list): Objects with extend(batch), e.g. VitalsStore or BinaryVitalsLog
+        report_interval (float): Seconds between per-source rate reports
+
+    Returns:
+        list: SourceStats of every source
+    """
+    rules = rules or load_rules()
+    alerts = AlertChannel(com_port, alert_cooldown_seconds).open()
+    end = time.monotonic() + duration_minutes * 60
+    next_report = time.monotonic() + report_interval
+    readings = unknown = 0
+    try:
+        with ingestor:
+            patients_by_id = {}
+            while time.monotonic() < end:
+                if not patients_by_id or time.monotonic() >= next_report:
+                    monitored_patients = registry.patients() if registry is not None else patients
+                    patients_by_id = {patient.id: patient for patient in monitored_patients}
+                batch = ingestor.get(timeout=min(0.5, max(0.0, end - time.monotonic())))
+                if batch is not None:
+                    for store in stores:
+                        store.extend(batch)
+                    hits = rules.evaluate_batch(batch)
+                    unknown += alerts.raise_hits(batch, hits, rules, patients_by_id)
+                    alerts.resolve_except(hits.patient_id.tolist(), among=batch.patient_id.tolist())
+                    alerts.flush()
+                    readings += len(batch)
+                    READINGS.inc(len(batch))
+                if time.monotonic() >= next_report:
+                    next_report += report_interval
+                    rates = ", ".join(f"{name} {rate:,.0f}/s" for name, rate in ingestor.rates().items())
+                    print(f"Ingested {readings} readings, queue {ingestor.depth}: {rates}")
+    except KeyboardInterrupt:
+        print("\nMonitoring stopped by user.")
+    finally:
+        alerts.close()
+    for source in ingestor.sources:
+        s = source.stats
+        print(f"Source {s.name}: {s.readings} readings, {s.dropped} dropped, {s.errors} errors, "
+              f"{s.rate:,.0f} readings/s")
+    if unknown:
+        print(f"{unknown} alerts skipped for unknown patients")
+    return [source.stats for source in ingestor.sources]
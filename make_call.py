@@ -1,6 +1,9 @@
-import serial
-import time
-from patient_monitoring import SMSEngine
+from gsm_modem import SMSEngine
+
+def _is_modem_service(com_port) -> bool:
+    # Only callers that share a modem pay for importing the service
+    from modem_service import ModemService
+    return isinstance(com_port, ModemService)
 
 def make_call(phone_number: str, com_port: str = "COM5"):
     """
@@ -8,15 +11,18 @@ def make_call(phone_number: str, com_port: str = "COM5"):
     
     Args:
         phone_number (str): The phone number to call
-        com_port (str): The COM port where the GSM modem is connected
+        com_port: The COM port where the GSM modem is connected, or a running
+            ModemService to share the modem with the monitor
     """
-    # Initialize the SMS engine
-    sms_engine = SMSEngine()
+    # A shared ModemService is already open and stays open afterwards
+    shared = not isinstance(com_port, str) and _is_modem_service(com_port)
+    sms_engine = com_port if shared else SMSEngine()
+    port_name = com_port.port_name if shared else com_port
     
     try:
         # Open the serial port
-        if sms_engine.open_port(com_port):
-            print(f"Successfully connected to GSM modem on {com_port}")
+        if shared or sms_engine.open_port(com_port):
+            print(f"Successfully connected to GSM modem on {port_name}")
             print(f"Attempting to call {phone_number}...")
             
             # Make the call
@@ -36,15 +42,16 @@ def make_call(phone_number: str, com_port: str = "COM5"):
                 print("Failed to initiate call")
                 
         else:
-            print(f"Failed to connect to GSM modem on {com_port}")
+            print(f"Failed to connect to GSM modem on {port_name}")
             
     except Exception as e:
         print(f"An error occurred: {e}")
         
     finally:
-        # Always close the port
-        sms_engine.close_port()
-        print("Serial port closed")
+        # Always close the port we opened
+        if not shared:
+            sms_engine.close_port()
+            print("Serial port closed")
 
 if __name__ == "__main__":
     # Example usage
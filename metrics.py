@@ -0,0 +1,338 @@
+import bisect
+import json
+import math
+import os
+import threading
+from typing import Callable, Dict, List, Optional, Sequence
+
+# Default port of the metrics HTTP endpoint
+DEFAULT_METRICS_PORT = 9108
+
+# Histogram bucket upper bounds in seconds
+TICK_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SEND_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+class _ThreadShards:
+    # One value container per thread: the owning thread is the only writer, so
+    # updates need no lock; readers copy each shard and add them up
+    def __init__(self, factory: Callable):
+        self._factory = factory
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards = []
+
+    def get(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = self._factory()
+            with self._lock:
+                self._shards.append(shard)
+            return shard
+
+    def all(self) -> list:
+        with self._lock:
+            return list(self._shards)
+
+class Counter:
+    """
+    Monotonic counter, optionally split by the value of one label.
+
+    inc() only touches the calling thread's shard, so it is cheap and safe
+    from any thread without a lock.
+    """
+    kind = 'counter'
+
+    def __init__(self, name: str, description: str, label: Optional[str] = None):
+        self.name = name
+        self.description = description
+        self.label = label
+        self._shards = _ThreadShards(dict)
+
+    def inc(self, amount: float = 1, label_value: Optional[str] = None):
+        shard = self._shards.get()
+        shard[label_value] = shard.get(label_value, 0) + amount
+
+    def values(self) -> Dict[Optional[str], float]:
+        totals: Dict[Optional[str], float] = {}
+        for shard in self._shards.all():
+            for label_value, value in shard.copy().items():
+                totals[label_value] = totals.get(label_value, 0) + value
+        return totals
+
+    @property
+    def value(self) -> float:
+        return sum(self.values().values())
+
+class Gauge:
+    """
+    Current value: the last set() plus the sum of the tracked sources.
+
+    Sources are callables read at collection time, such as the depth of each
+    running AlertDispatcher queue, so the hot path does not update anything.
+    """
+    kind = 'gauge'
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self._value = 0.0
+        self._sources: List[Callable[[], float]] = []
+
+    def set(self, value: float):
+        self._value = value
+
+    def track(self, source: Callable[[], float]):
+        self._sources = self._sources + [source]
+
+    def untrack(self, source: Callable[[], float]):
+        self._sources = [s for s in self._sources if s != source]
+
+    @property
+    def value(self) -> float:
+        return self._value + sum(source() for source in self._sources)
+
+class Histogram:
+    """
+    Distribution of observed values in fixed buckets, per-thread like Counter.
+
+    Args:
+        buckets: Increasing upper bounds; values above the last go to +Inf
+    """
+    kind = 'histogram'
+
+    def __init__(self, name: str, description: str, buckets: Sequence[float]):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(buckets)
+        # Bucket counts, the +Inf count, then the sum of the values
+        self._shards = _ThreadShards(lambda: [0] * (len(self.buckets) + 1) + [0.0])
+
+    def observe(self, value: float):
+        shard = self._shards.get()
+        shard[bisect.bisect_left(self.buckets, value)] += 1
+        shard[-1] += value
+
+    def totals(self) -> list:
+        totals = [0] * (len(self.buckets) + 1) + [0.0]
+        for shard in self._shards.all():
+            for index, value in enumerate(list(shard)):
+                totals[index] += value
+        return totals
+
+    def summary(self) -> dict:
+        """Count, sum, mean and the cumulative count of each bucket."""
+        totals = self.totals()
+        counts, total = totals[:-1], totals[-1]
+        count = sum(counts)
+        cumulative, running = {}, 0
+        for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+            running += bucket_count
+            cumulative[_format_bound(bound)] = running
+        return {'count': count, 'sum': total, 'mean': total / count if count else 0.0, 'buckets': cumulative}
+
+def _format_bound(bound: float) -> str:
+    return '+Inf' if bound == math.inf else repr(float(bound))
+
+class MetricsRegistry:
+    """Named metrics, rendered as Prometheus text or as a JSON-ready snapshot."""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, description: str, label: Optional[str] = None) -> Counter:
+        return self._register(Counter(name, description, label))
+
+    def gauge(self, name: str, description: str) -> Gauge:
+        return self._register(Gauge(name, description))
+
+    def histogram(self, name: str, description: str, buckets: Sequence[float]) -> Histogram:
+        return self._register(Histogram(name, description, buckets))
+
+    def metrics(self) -> list:
+        with self._lock:
+            return list(self._metrics.values())
+
+    def render_prometheus(self) -> str:
+        lines = []
+        for metric in self.metrics():
+            lines.append(f"# HELP {metric.name} {_escape(metric.description)}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            if isinstance(metric, Counter):
+                values = metric.values() or ({} if metric.label else {None: 0})
+                for label_value, value in sorted(values.items(), key=lambda item: str(item[0])):
+                    labels = f'{{{metric.label}="{_escape(label_value, quote=True)}"}}' if label_value is not None else ''
+                    lines.append(f"{metric.name}{labels} {_format_value(value)}")
+            elif isinstance(metric, Gauge):
+                lines.append(f"{metric.name} {_format_value(metric.value)}")
+            else:
+                summary = metric.summary()
+                for bound, count in summary['buckets'].items():
+                    lines.append(f'{metric.name}_bucket{{le="{bound}"}} {count}')
+                lines.append(f"{metric.name}_sum {_format_value(summary['sum'])}")
+                lines.append(f"{metric.name}_count {summary['count']}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict:
+        snapshot = {}
+        for metric in self.metrics():
+            if isinstance(metric, Counter):
+                values = metric.values()
+                snapshot[metric.name] = ({str(label_value): value for label_value, value in values.items()}
+                                         if metric.label else values.get(None, 0))
+            elif isinstance(metric, Gauge):
+                snapshot[metric.name] = metric.value
+            else:
+                snapshot[metric.name] = metric.summary()
+        return snapshot
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+# Escape a HELP text or, with quote, a label value for the Prometheus text format
+def _escape(text, quote: bool = False) -> str:
+    text = str(text).replace('\\', '\\\\').replace('\n', '\\n')
+    return text.replace('"', '\\"') if quote else text
+
+# Process-wide registry and the metrics of the monitoring loops and the SMS path
+REGISTRY = MetricsRegistry()
+TICK_SECONDS = REGISTRY.histogram('monitor_tick_seconds', "Time spent in each monitoring tick", TICK_BUCKETS)
+TICK_JITTER_SECONDS = REGISTRY.histogram('monitor_tick_jitter_seconds', "Delay of each tick after its due time",
+                                         TICK_BUCKETS)
+TICK_OVERRUNS = REGISTRY.counter('monitor_tick_overruns_total', "Ticks still running when the next one was due")
+TICKS_SKIPPED = REGISTRY.counter('monitor_ticks_skipped_total', "Ticks dropped after an overrun")
+READINGS = REGISTRY.counter('monitor_readings_total', "Readings checked against the alert rules")
+ALERTS = REGISTRY.counter('monitor_alerts_total', "Alerts raised", label='severity')
+ALERTS_SUPPRESSED = REGISTRY.counter('monitor_alerts_suppressed_total',
+                                     "Alerts suppressed by the cooldown or an acknowledgement")
+SMS_QUEUE_DEPTH = REGISTRY.gauge('sms_queue_depth', "Alerts waiting in the dispatcher queues")
+SMS_SEND_SECONDS = REGISTRY.histogram('sms_send_seconds', "Duration of each SMS send attempt", SEND_BUCKETS)
+SMS_SENT = REGISTRY.counter('sms_sent_total', "SMS messages sent")
+SMS_SEND_FAILURES = REGISTRY.counter('sms_send_failures_total', "SMS send attempts that failed")
+SMS_GIVEN_UP = REGISTRY.counter('sms_given_up_total', "Alerts given up after the last send attempt")
+SMS_DROPPED = REGISTRY.counter('sms_dropped_total', "Alerts dropped because the dispatcher queue was full")
+
+class MetricsServer:
+    """
+    Serve the metrics over HTTP on a background thread.
+
+    GET /metrics returns the Prometheus text format and /metrics.json the
+    snapshot as JSON. Binds to localhost by default.
+
+    Args:
+        port (int): TCP port, 0 for any free port
+        host (str): Address to bind
+        registry (MetricsRegistry): Metrics to serve, the process-wide REGISTRY by default
+    """
+
+    def __init__(self, port: int = DEFAULT_METRICS_PORT, host: str = '127.0.0.1',
+                 registry: MetricsRegistry = REGISTRY):
+        self.port = port
+        self.host = host
+        self.registry = registry
+        self._server = None
+        self._thread = None
+
+    @property
+    def address(self) -> tuple:
+        return self._server.server_address if self._server else (self.host, self.port)
+
+    def start(self):
+        # http.server is slow to import, so only load it when serving
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split('?', 1)[0]
+                if path == '/metrics':
+                    body, content_type = registry.render_prometheus().encode(), 'text/plain; version=0.0.4'
+                elif path == '/metrics.json':
+                    body, content_type = json.dumps(registry.snapshot()).encode(), 'application/json'
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics-server", daemon=True)
+        self._thread.start()
+        print(f"Metrics at http://{self.address[0]}:{self.address[1]}/metrics")
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+class SnapshotWriter:
+    """
+    Write the metrics snapshot to a JSON file every `interval` seconds.
+
+    The file is replaced atomically, so readers never see a partial write.
+    A last snapshot is written on stop().
+    """
+
+    def __init__(self, filename: str = "metrics.json", interval: float = 10.0,
+                 registry: MetricsRegistry = REGISTRY):
+        self.filename = filename
+        self.interval = interval
+        self.registry = registry
+        self._stop = threading.Event()
+        self._thread = None
+
+    def write(self):
+        temporary = f"{self.filename}.tmp"
+        with open(temporary, 'w') as output:
+            json.dump(self.registry.snapshot(), output, indent=2)
+        os.replace(temporary, self.filename)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.write()
+            except OSError as ex:
+                print(f"Error writing metrics snapshot: {ex}")
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="metrics-snapshot", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self.write()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
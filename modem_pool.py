@@ -0,0 +1,138 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+# Seconds a send waits for an idle modem before giving up
+ACQUIRE_TIMEOUT = 30.0
+
+# A modem in the pool and its health bookkeeping
+@dataclass
+class PooledModem:
+    port_name: str
+    engine: object
+    healthy: bool = False
+    busy: bool = False
+    consecutive_failures: int = 0
+    sent: int = 0
+    failed: int = 0
+
+class ModemPool:
+    """
+    Spread SMS sends over several GSM modems.
+
+    Each send goes to an idle healthy modem, preferring the one that has sent
+    the fewest messages. A modem that fails ``max_failures`` sends in a row is
+    taken out of rotation; a background health check reconnects it and puts
+    it back once it answers again. The pool has the same ``send_sms`` method as
+    ``SMSEngine`` so it can be handed to an ``AlertDispatcher`` with one worker
+    per modem.
+
+    Args:
+        port_names (list): Serial ports of the modems
+        engine_factory: Callable returning a new SMSEngine
+        max_failures (int): Consecutive failures before a modem is taken out
+        health_check_interval (float): Seconds between health checks
+    """
+
+    def __init__(self, port_names: List[str], engine_factory, max_failures: int = 3,
+                 health_check_interval: float = 30.0):
+        self.modems = [PooledModem(name, engine_factory()) for name in port_names]
+        self.max_failures = max_failures
+        self.health_check_interval = health_check_interval
+        self._condition = threading.Condition()
+        self._stopping = threading.Event()
+        self._health_thread = None
+
+    def open(self) -> int:
+        """Open every modem and start health checks. Returns the number of healthy modems."""
+        for modem in self.modems:
+            modem.healthy = modem.engine.open_port(modem.port_name) and modem.engine.initialized
+        self._stopping.clear()
+        self._health_thread = threading.Thread(target=self._health_loop, name="modem-health", daemon=True)
+        self._health_thread.start()
+        return self.healthy_count
+
+    def close(self):
+        self._stopping.set()
+        if self._health_thread:
+            self._health_thread.join()
+        for modem in self.modems:
+            modem.engine.close_port()
+
+    @property
+    def healthy_count(self) -> int:
+        return sum(modem.healthy for modem in self.modems)
+
+    def send_sms(self, phone_number, message):
+        modem = self._acquire(ACQUIRE_TIMEOUT)
+        if modem is None:
+            print("No GSM modem available")
+            return False
+        sent = False
+        try:
+            sent = modem.engine.send_sms(phone_number, message)
+        finally:
+            self._release(modem, sent)
+        return sent
+
+    def poll_messages(self, timeout: float = 0.0) -> list:
+        """Collect received SMS messages from every idle healthy modem."""
+        with self._condition:
+            modems = [m for m in self.modems if m.healthy and not m.busy]
+            for modem in modems:
+                modem.busy = True
+        messages = []
+        try:
+            for modem in modems:
+                messages.extend(modem.engine.poll_messages(timeout))
+        finally:
+            with self._condition:
+                for modem in modems:
+                    modem.busy = False
+                self._condition.notify_all()
+        return messages
+
+    def _acquire(self, timeout: float) -> Optional[PooledModem]:
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while True:
+                idle = [m for m in self.modems if m.healthy and not m.busy]
+                if idle:
+                    modem = min(idle, key=lambda m: m.sent + m.failed)
+                    modem.busy = True
+                    return modem
+                remaining = deadline - time.monotonic()
+                if not any(m.healthy for m in self.modems) or remaining <= 0:
+                    return None
+                self._condition.wait(remaining)
+
+    def _release(self, modem: PooledModem, sent: bool):
+        with self._condition:
+            modem.busy = False
+            if sent:
+                modem.sent += 1
+                modem.consecutive_failures = 0
+            else:
+                modem.failed += 1
+                modem.consecutive_failures += 1
+                if modem.consecutive_failures >= self.max_failures:
+                    modem.healthy = False
+                    print(f"Modem on {modem.port_name} taken out of rotation")
+            self._condition.notify_all()
+
+    def _health_loop(self):
+        while not self._stopping.wait(self.health_check_interval):
+            with self._condition:
+                candidates = [m for m in self.modems if not m.healthy and not m.busy]
+                for modem in candidates:
+                    modem.busy = True
+            for modem in candidates:
+                recovered = modem.engine.reconnect() and modem.engine.initialized
+                with self._condition:
+                    modem.busy = False
+                    if recovered:
+                        modem.healthy = True
+                        modem.consecutive_failures = 0
+                        print(f"Modem on {modem.port_name} back in rotation")
+                    self._condition.notify_all()
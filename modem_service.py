@@ -0,0 +1,187 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List, Optional, Tuple
+
+# Seconds the service listens for unsolicited result codes between transactions
+IDLE_POLL_INTERVAL = 0.05
+
+# Seconds to wait before reopening the port after a serial error
+RECONNECT_DELAY = 5.0
+
+class ModemService:
+    """
+    Single owner of a GSM modem shared by several clients.
+
+    The service opens the port once and runs every AT transaction on its own
+    thread, one at a time in the order submitted, so alert sends, incoming
+    message handling and voice calls can use the same modem without opening
+    and closing the port. Between transactions it listens for unsolicited
+    result codes and passes them to the subscribers of their prefix (RING,
+    +CLIP, +CMTI, NO CARRIER). Each SMS sent is also published as a
+    ``+CMGS: <reference>`` line. Subscribers of received messages get each
+    SMS as an SMSMessage, already read and deleted from the modem.
+
+    Callbacks run on the service thread; they may call the service methods,
+    which then run directly instead of being queued.
+
+    Args:
+        port_name (str): Serial port of the modem
+        engine_factory: Callable returning a new SMSEngine
+    """
+
+    def __init__(self, port_name: str, engine_factory):
+        self.port_name = port_name
+        self.engine = engine_factory()
+        self.transactions = 0
+        self._jobs = queue.Queue()
+        self._subscribers: List[Tuple[str, Callable]] = []
+        self._message_subscribers: List[Callable] = []
+        self._lock = threading.Lock()
+        self._jobs_lock = threading.Lock()  # held while checking _running and enqueueing
+        self._running = False
+        self._thread = None
+        self._next_enable_attempt = 0.0
+
+    def open(self) -> bool:
+        """Open the port and start the service thread."""
+        if not self.engine.open_port(self.port_name):
+            return False
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="modem-service", daemon=True)
+        self._thread.start()
+        return True
+
+    def close(self):
+        """Finish the current transaction, cancel queued ones and close the port."""
+        # No job can be queued once this returns, so the drain below sees every job
+        with self._jobs_lock:
+            self._running = False
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        while not self._jobs.empty():
+            self._jobs.get_nowait()[1].set_result(None)
+        self.engine.close_port()
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def call(self, operation: Callable, timeout: Optional[float] = None):
+        """
+        Run operation(engine) on the service thread and return its result.
+
+        Returns None if the service is not running.
+        """
+        if threading.current_thread() is self._thread:
+            return operation(self.engine)
+        future = Future()
+        with self._jobs_lock:
+            if not self._running:
+                print("Modem service is not running")
+                return None
+            self._jobs.put((operation, future))
+        return future.result(timeout)
+
+    def subscribe(self, prefix: str, callback: Callable):
+        """Call callback(line) for each unsolicited result code starting with prefix."""
+        with self._lock:
+            self._subscribers.append((prefix, callback))
+
+    def unsubscribe(self, callback: Callable):
+        with self._lock:
+            self._subscribers = [(p, c) for p, c in self._subscribers if c is not callback]
+            self._message_subscribers = [c for c in self._message_subscribers if c is not callback]
+
+    def subscribe_messages(self, callback: Callable):
+        """Call callback(message) for each received SMS."""
+        with self._lock:
+            self._message_subscribers.append(callback)
+
+    @property
+    def initialized(self) -> bool:
+        return self.engine.initialized
+
+    @property
+    def stats(self):
+        return self.engine.stats
+
+    def send_command(self, command: str, **kwargs):
+        return self.call(lambda engine: engine.send_command(command, **kwargs))
+
+    def send_sms(self, phone_number, message) -> bool:
+        return bool(self.call(lambda engine: self._send_sms(engine, phone_number, message)))
+
+    def make_call(self, phone_number) -> bool:
+        return bool(self.call(lambda engine: engine.make_call(phone_number)))
+
+    def end_call(self) -> bool:
+        return bool(self.call(lambda engine: engine.end_call()))
+
+    def _send_sms(self, engine, phone_number, message) -> bool:
+        sent = engine.send_sms(phone_number, message)
+        if sent and engine.last_message_reference is not None:
+            self._publish(f"+CMGS: {engine.last_message_reference}")
+        return sent
+
+    def _run(self):
+        while self._running:
+            try:
+                try:
+                    operation, future = self._jobs.get_nowait()
+                except queue.Empty:
+                    self._listen()
+                else:
+                    self.transactions += 1
+                    try:
+                        future.set_result(operation(self.engine))
+                    except Exception as ex:
+                        future.set_exception(ex)
+                # Codes that arrived during a transaction were set aside by the engine
+                while self.engine.urcs:
+                    self._publish(self.engine.urcs.popleft())
+            except Exception as ex:
+                print(f"Modem service error on {self.port_name}: {ex}")
+                time.sleep(RECONNECT_DELAY)
+                if self._running:
+                    self.engine.reconnect()
+
+    def _listen(self):
+        if (self._message_subscribers and not self.engine.indications_enabled
+                and time.monotonic() >= self._next_enable_attempt):
+            # Turn on +CMTI and pick up messages stored before, again after a reset
+            for message in self.engine.poll_messages():
+                self._deliver(message)
+            if not self.engine.indications_enabled:
+                self._next_enable_attempt = time.monotonic() + RECONNECT_DELAY
+            return
+        urc = self.engine.wait_for_urc(IDLE_POLL_INTERVAL)
+        if urc is not None:
+            self._publish(urc)
+
+    def _publish(self, line: str):
+        if line.startswith('+CMTI:') and self._message_subscribers:
+            message = self.engine.take_new_message(line)
+            if message:
+                self._deliver(message)
+        with self._lock:
+            callbacks = [c for prefix, c in self._subscribers if line.startswith(prefix)]
+        for callback in callbacks:
+            try:
+                callback(line)
+            except Exception as ex:
+                print(f"Error in modem subscriber for {line}: {ex}")
+
+    def _deliver(self, message):
+        with self._lock:
+            callbacks = list(self._message_subscribers)
+        for callback in callbacks:
+            try:
+                callback(message)
+            except Exception as ex:
+                print(f"Error in message subscriber: {ex}")
@@ -3,9 +3,12 @@ import time
 import datetime
 import csv
 import os
-import serial
 from dataclasses import dataclass
-from typing import List, Dict
+
+# The modem driver lives in gsm_modem; SMSEngine stays importable from here. The
+# alerting, metrics and scheduling modules are imported where they are used, so
+# modules that only need the data classes below start quickly
+from gsm_modem import SMS_SEND_TIMEOUT, SMSEngine
 
 # Data structures
 @dataclass
@@ -24,8 +27,11 @@ class Patient:
     room_number: int
     responsible_person: ResponsiblePerson
 
+# Slotted so that readings kept in memory carry no per-instance __dict__
 @dataclass
 class VitalSigns:
+    __slots__ = ('patient_id', 'timestamp', 'systolic', 'diastolic', 'heart_rate',
+                 'temperature', 'oxygen_saturation', 'respiratory_rate')
     patient_id: int
     timestamp: datetime.datetime
     systolic: int  # mmHg
@@ -35,70 +41,6 @@ class VitalSigns:
     oxygen_saturation: int  # %
     respiratory_rate: int  # breaths per minute
 
-# Serial SMS Engine to communicate with GSM modem
-class SMSEngine:
-    def __init__(self):
-        self.port = None
-        
-    def open_port(self, port_name):
-        try:
-            self.port = serial.Serial(
-                port=port_name,
-                baudrate=115200,
-                timeout=1,
-                parity=serial.PARITY_NONE,
-                stopbits=serial.STOPBITS_ONE,
-                bytesize=serial.EIGHTBITS
-            )
-            return True
-        except Exception as ex:
-            print(f"Error opening port: {ex}")
-            return False
-    
-    def close_port(self):
-        if self.port and self.port.is_open:
-            self.port.close()
-            
-    def send_sms(self, phone_number, message):
-        if not self.port or not self.port.is_open:
-            print("Serial port is not open")
-            return False
-        
-        try:
-            # Initialize the modem
-            self.port.write(b'AT\r\n')
-            time.sleep(0.2)
-            
-            # Set SMS text mode
-            self.port.write(b'AT+CMGF=1\r\n')
-            time.sleep(0.2)
-            
-            # Set GSM character set
-            self.port.write(b'AT+CSCS="GSM"\r\n')
-            time.sleep(0.2)
-            
-            # Set the destination phone number
-            self.port.write(f'AT+CMGS="{phone_number}"\r\n'.encode())
-            time.sleep(0.2)
-            
-            # Send the message and the Ctrl+Z character (ASCII 26)
-            self.port.write(f'{message}\x1A'.encode())
-            time.sleep(1)
-            
-            # Read response
-            response = self.port.read(self.port.in_waiting)
-            
-            if b'OK' in response:
-                print(f"SMS sent successfully to {phone_number}")
-                return True
-            else:
-                print(f"Failed to send SMS: {response}")
-                return False
-                
-        except Exception as ex:
-            print(f"Error sending SMS: {ex}")
-            return False
-    
 # Create a list of responsible persons (doctors)
 responsible_persons = [
     ResponsiblePerson(1, "Driton", "alija", "+38344922805"),
@@ -140,27 +82,45 @@ def print_responsible_persons():
     for person in responsible_persons:
         print(f"{person.id:<3} {person.name:<10} {person.surname:<12} {person.phone_number:<15}")
 
+# Normal ranges used to simulate vital signs (inclusive)
+VITAL_SIGN_RANGES = {
+    'systolic': (90, 140),  # mmHg
+    'diastolic': (60, 90),  # mmHg
+    'heart_rate': (60, 100),  # bpm
+    'temperature': (36.1, 37.2),  # °C
+    'oxygen_saturation': (95, 100),  # %
+    'respiratory_rate': (12, 20),  # breaths per minute
+}
+
+# Blood pressure categories: name, weight (%), systolic range, diastolic range
+# Normal: < 120 / < 80
+# Elevated: 120-129 / < 80
+# Stage 1 Hypertension: 130-139 / 80-89
+# Stage 2 Hypertension: 140-179 / 90-119
+# Hypertensive Crisis: >= 180 / >= 120
+BLOOD_PRESSURE_CATEGORIES = [
+    ("normal", 70, (90, 119), (60, 79)),
+    ("elevated", 10, (120, 129), (60, 79)),
+    ("stage1", 10, (130, 139), (80, 89)),
+    ("stage2", 7, (140, 179), (90, 109)),
+    ("crisis", 3, (180, 200), (110, 120)),
+]
+
 # Function to simulate vital signs
 def simulate_vital_signs(patient_id: int) -> VitalSigns:
-    # Normal ranges for vital signs
-    # Systolic: 90-140 mmHg
-    # Diastolic: 60-90 mmHg
-    # Heart rate: 60-100 bpm
-    # Temperature: 36.1-37.2 °C
-    # Oxygen saturation: 95-100 %
-    # Respiratory rate: 12-20 breaths per minute
+    ranges = VITAL_SIGN_RANGES
     
-    systolic = random.randint(90, 140)
-    diastolic = random.randint(60, 90)
+    systolic = random.randint(*ranges['systolic'])
+    diastolic = random.randint(*ranges['diastolic'])
     
     # Ensure diastolic is always lower than systolic
     while diastolic >= systolic:
-        diastolic = random.randint(60, 90)
+        diastolic = random.randint(*ranges['diastolic'])
     
-    heart_rate = random.randint(60, 100)
-    temperature = round(random.uniform(36.1, 37.2), 1)
-    oxygen_saturation = random.randint(95, 100)
-    respiratory_rate = random.randint(12, 20)
+    heart_rate = random.randint(*ranges['heart_rate'])
+    temperature = round(random.uniform(*ranges['temperature']), 1)
+    oxygen_saturation = random.randint(*ranges['oxygen_saturation'])
+    respiratory_rate = random.randint(*ranges['respiratory_rate'])
     
     return VitalSigns(
         patient_id=patient_id,
@@ -175,37 +135,15 @@ def simulate_vital_signs(patient_id: int) -> VitalSigns:
 
 # Function to simulate blood pressure with potential hypertension
 def simulate_blood_pressure(patient_id: int) -> tuple:
-    # Generate blood pressure readings with possibility of high values
-    # Normal: < 120 / < 80
-    # Elevated: 120-129 / < 80
-    # Stage 1 Hypertension: 130-139 / 80-89
-    # Stage 2 Hypertension: 140-179 / 90-119
-    # Hypertensive Crisis: >= 180 / >= 120
-    
     # Generate with weighted probabilities for higher readings
     # This increases chance of triggering our alert conditions
-    weights = [70, 10, 10, 7, 3]  # Percentages for each range
-    blood_pressure_category = random.choices(
-        ["normal", "elevated", "stage1", "stage2", "crisis"], 
-        weights=weights, 
-        k=1
-    )[0]
+    names = [category[0] for category in BLOOD_PRESSURE_CATEGORIES]
+    weights = [category[1] for category in BLOOD_PRESSURE_CATEGORIES]
+    blood_pressure_category = random.choices(names, weights=weights, k=1)[0]
     
-    if blood_pressure_category == "normal":
-        systolic = random.randint(90, 119)
-        diastolic = random.randint(60, 79)
-    elif blood_pressure_category == "elevated":
-        systolic = random.randint(120, 129)
-        diastolic = random.randint(60, 79)
-    elif blood_pressure_category == "stage1":
-        systolic = random.randint(130, 139)
-        diastolic = random.randint(80, 89)
-    elif blood_pressure_category == "stage2":
-        systolic = random.randint(140, 179)
-        diastolic = random.randint(90, 109)
-    else:  # crisis
-        systolic = random.randint(180, 200)
-        diastolic = random.randint(110, 120)
+    _, _, systolic_range, diastolic_range = BLOOD_PRESSURE_CATEGORIES[names.index(blood_pressure_category)]
+    systolic = random.randint(*systolic_range)
+    diastolic = random.randint(*diastolic_range)
     
     # Ensure diastolic is always lower than systolic
     while diastolic >= systolic:
@@ -213,108 +151,253 @@ def simulate_blood_pressure(patient_id: int) -> tuple:
     
     return systolic, diastolic
 
+# Console markers for alerts of each severity
+ALERT_ICONS = {'MODERATE': "🚨", 'EMERGENCY': "🚑"}
+
+class AlertChannel:
+    """
+    SMS alerting shared by the monitoring loops.
+
+    Opens the modem, or a ModemPool for a list of ports, and starts an
+    AlertDispatcher with an AlertCoalescer in front of it. Doctors acknowledge
+    alerts by replying "ACK <patient id>". Without a com_port alerts are only
+    printed.
+
+    Args:
+        com_port: Serial port, list of ports, or a running ModemService, which
+            is shared with other clients and left open by close()
+        alert_cooldown_seconds (int): Cooldown for repeated alerts of a patient
+    """
+
+    def __init__(self, com_port=None, alert_cooldown_seconds=300):
+        self.com_port = com_port
+        self.alert_cooldown_seconds = alert_cooldown_seconds
+        self.sms_engine = None
+        self.dispatcher = None
+        self.coalescer = None
+        self.replies = None
+
+    def open(self):
+        from alerts import AcknowledgementHandler, AlertCoalescer, AlertDispatcher
+        from modem_pool import ModemPool
+        from modem_service import ModemService
+
+        # Initialize SMS engine if a port is provided, or a modem pool for a list of ports
+        com_port = self.com_port
+        sms_engine = None
+        if isinstance(com_port, ModemService):
+            sms_engine = com_port
+        elif isinstance(com_port, (list, tuple)):
+            sms_engine = ModemPool(com_port, SMSEngine)
+            healthy = sms_engine.open()
+            print(f"Connected to {healthy} of {len(com_port)} GSM modems")
+        elif com_port:
+            sms_engine = SMSEngine()
+            if sms_engine.open_port(com_port):
+                print(f"Successfully connected to GSM modem on {com_port}")
+            else:
+                print(f"Failed to connect to GSM modem. SMS notifications will be disabled.")
+                sms_engine = None
+        self.sms_engine = sms_engine
+        if not sms_engine:
+            return self
+
+        workers = len(com_port) if isinstance(com_port, (list, tuple)) else 1
+        self.dispatcher = AlertDispatcher(sms_engine, workers=workers)
+        self.coalescer = AlertCoalescer(cooldown=self.alert_cooldown_seconds)
+        # Doctors reply "ACK <patient id>"; replies are read between sends on the same modem
+        self.replies = AcknowledgementHandler(self.coalescer, self.dispatcher)
+        if isinstance(sms_engine, ModemService):
+            sms_engine.subscribe_messages(self.replies.handle)
+        else:
+            self.dispatcher.idle_task = lambda: self.replies.handle_messages(sms_engine.poll_messages())
+        self.dispatcher.start()
+        return self
+
+    def check(self, patient: Patient, reading: dict, rules) -> list:
+        """Check one reading against the rules, print and queue its alerts. Returns the matched rules."""
+        matched_rules = rules.evaluate(reading)
+        if self.coalescer and not matched_rules:
+            self.coalescer.resolve(patient.id)
+        for rule in matched_rules:
+            self.raise_alert(patient, rule, reading)
+        return matched_rules
+
+    def raise_alert(self, patient: Patient, rule, reading: dict):
+        """Print and queue the alert of a matched rule."""
+        from alert_rules import format_alert, format_summary
+        from alerts import Alert
+        from metrics import ALERTS, ALERTS_SUPPRESSED
+
+        doctor = patient.responsible_person
+        alert_message = format_alert(rule, patient, reading)
+        
+        print(f"\n{ALERT_ICONS[rule.severity.name]} {alert_message}")
+        print(f"Doctor: {doctor.name} {doctor.surname}")
+        print(f"Contact: {doctor.phone_number}")
+        ALERTS.inc(label_value=rule.severity.name)
+        
+        # Batch the SMS per doctor; repeats within the cooldown are dropped
+        if self.coalescer:
+            accepted = self.coalescer.offer(Alert(
+                doctor.phone_number,
+                alert_message,
+                rule.severity,
+                patient.id,
+                summary=format_summary(rule, patient, reading),
+                rule=rule.name
+            ))
+            if not accepted:
+                ALERTS_SUPPRESSED.inc()
+                print("Repeat alert suppressed (cooldown or acknowledged)")
+
+    def raise_hits(self, batch, rule_hits, rules, patients_by_id: dict) -> int:
+        """
+        Raise the alerts of the hits of RuleSet.evaluate_batch.
+
+        Returns:
+            int: Hits skipped because the patient is not in patients_by_id
+        """
+        unknown = 0
+        for row, patient_id, rule_index in zip(rule_hits.row.tolist(), rule_hits.patient_id.tolist(),
+                                               rule_hits.rule.tolist()):
+            patient = patients_by_id.get(patient_id)
+            if patient is None:
+                unknown += 1
+                continue
+            rule = rules.rules[rule_index]
+            reading = {name: getattr(batch, name)[row].item() for name in rule.fields}
+            self.raise_alert(patient, rule, reading)
+        return unknown
+
+    def resolve_except(self, patient_ids, among=None):
+        """
+        Close the open alerts of every patient not in patient_ids, whose readings are back in range.
+
+        Args:
+            patient_ids: Patients whose readings matched a rule
+            among: Only consider these patients, e.g. those in a partial batch
+        """
+        if self.coalescer:
+            candidates = self.coalescer.open_patients()
+            if among is not None:
+                candidates &= set(among)
+            for patient_id in candidates - set(patient_ids):
+                self.coalescer.resolve(patient_id)
+
+    def flush(self):
+        """Queue the SMS messages of the alerts raised since the last flush."""
+        if self.coalescer:
+            for message in self.coalescer.flush():
+                if not self.dispatcher.submit(message):
+                    print("SMS queue full, alert dropped")
+
+    def close(self):
+        from modem_pool import ModemPool
+        from modem_service import ModemService
+
+        # Deliver alerts still in the queue, then close the serial port
+        sms_engine, dispatcher = self.sms_engine, self.dispatcher
+        if dispatcher:
+            dispatcher.stop(drain=True, timeout=SMS_SEND_TIMEOUT)
+            d = dispatcher.stats
+            print(f"SMS dispatcher: {d.sent} sent, {d.failed} failed, {d.retried} retried, "
+                  f"{d.dropped} dropped, {d.cancelled} cancelled, {dispatcher.depth} still queued, "
+                  f"{self.coalescer.suppressed} repeats suppressed")
+        if isinstance(sms_engine, ModemService):
+            sms_engine.unsubscribe(self.replies.handle)
+        elif isinstance(sms_engine, ModemPool):
+            for modem in sms_engine.modems:
+                print(f"Modem {modem.port_name}: {modem.sent} sent, {modem.failed} failed, "
+                      f"{'healthy' if modem.healthy else 'out of rotation'}")
+            sms_engine.close()
+            print("Serial ports closed")
+        elif sms_engine:
+            stats = sms_engine.stats
+            print(f"Modem session: {stats.commands_sent} commands, {stats.bytes_written} bytes written, "
+                  f"average round trip {stats.average_round_trip * 1000:.1f} ms")
+            sms_engine.close_port()
+            print("Serial port closed")
+        self.sms_engine = self.dispatcher = self.coalescer = self.replies = None
+
+# Print the readings table of one monitoring iteration
+def print_bp_readings(all_readings):
+    print("\nCurrent readings:")
+    print(f"{'Patient ID':5} {'Name':<12} {'BP Reading':<12}")
+    print("-" * 35)
+    for patient, sys_bp, dia_bp in all_readings:
+        print(f"{patient.id:<5} {patient.name + ' ' + patient.surname:<12} {sys_bp}/{dia_bp} mmHg")
+
+def print_tick_stats(stats: 'TickStats'):
+    print(f"Ticks: {stats.ticks} run, {stats.skipped} skipped, {stats.overruns} overruns, "
+          f"jitter {stats.average_jitter * 1000:.1f} ms average, {stats.max_jitter * 1000:.1f} ms max")
+
 # Function to monitor blood pressure and generate alerts with SMS notifications
-def monitor_blood_pressure(duration_minutes=5, interval_seconds=20, com_port=None):
+def monitor_blood_pressure(duration_minutes=5, interval_seconds=20, com_port=None,
+                           alert_cooldown_seconds=300, rules=None, registry=None, trends=None) -> 'TickStats':
+    from alert_rules import load_rules
+    from metrics import READINGS
+    from scheduling import TickScheduler
+
+    # Threshold rules, the built-in table unless a RuleSet is given
+    rules = rules or load_rules()
+    
     print("\n--- Blood Pressure Monitoring Alert System ---")
     print("Monitoring started. Press Ctrl+C to stop.")
     print("-" * 70)
     
-    # Initialize SMS engine if port is provided
-    sms_engine = None
-    if com_port:
-        sms_engine = SMSEngine()
-        if sms_engine.open_port(com_port):
-            print(f"Successfully connected to GSM modem on {com_port}")
-        else:
-            print(f"Failed to connect to GSM modem. SMS notifications will be disabled.")
-            sms_engine = None
+    alerts = AlertChannel(com_port, alert_cooldown_seconds).open()
     
+    # Iterations are due every interval_seconds on the monotonic clock, however long each one takes
+    scheduler = TickScheduler(interval_seconds)
+    end = scheduler.next_tick + duration_minutes * 60
     iteration = 0
-    start_time = datetime.datetime.now()
     
     try:
-        while (datetime.datetime.now() - start_time).total_seconds() < duration_minutes * 60:
+        while scheduler.next_tick < end:
+            time.sleep(scheduler.delay())
+            scheduler.start_tick()
             iteration += 1
             print(f"\nIteration {iteration} - {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
             
             all_readings = []
             
-            for patient in patients:
+            # A PatientRegistry picks up edits to the data files between iterations
+            monitored_patients = registry.patients() if registry is not None else patients
+            for patient in monitored_patients:
                 systolic, diastolic = simulate_blood_pressure(patient.id)
                 all_readings.append((patient, systolic, diastolic))
                 
-                doctor = patient.responsible_person
+                # Add the patient's trend statistics so trend rules can match too
+                reading = {'systolic': systolic, 'diastolic': diastolic}
+                if trends is not None:
+                    reading.update(trends.update(patient.id, reading))
                 
-                # Check for hypertension conditions and send alerts
-                if 160 <= systolic <= 179 and 100 <= diastolic <= 109:
-                    alert_message = (
-                        f"MODERATE HYPERTENSION ALERT\n"
-                        f"Patient: {patient.name} {patient.surname} (ID: {patient.id})\n"
-                        f"Blood Pressure: {systolic}/{diastolic} mmHg\n"
-                        f"Action: See a doctor or GP as soon as possible"
-                    )
-                    
-                    print(f"\n🚨 {alert_message}")
-                    print(f"Doctor: {doctor.name} {doctor.surname}")
-                    print(f"Contact: {doctor.phone_number}")
-                    
-                    # Send SMS if SMS engine is available
-                    if sms_engine:
-                        sms_sent = sms_engine.send_sms(
-                            doctor.phone_number, 
-                            alert_message
-                        )
-                        if sms_sent:
-                            print("SMS alert sent successfully")
-                        else:
-                            print("Failed to send SMS alert")
-                    
-                elif systolic >= 180 and diastolic >= 110:
-                    alert_message = (
-                        f"HYPERTENSIVE EMERGENCY ALERT\n"
-                        f"Patient: {patient.name} {patient.surname} (ID: {patient.id})\n"
-                        f"Blood Pressure: {systolic}/{diastolic} mmHg\n"
-                        f"Action: Requires immediate medical attention. Go to hospital."
-                    )
-                    
-                    print(f"\n🚑 {alert_message}")
-                    print(f"Doctor: {doctor.name} {doctor.surname}")
-                    print(f"Contact: {doctor.phone_number}")
-                    
-                    # Send SMS if SMS engine is available
-                    if sms_engine:
-                        sms_sent = sms_engine.send_sms(
-                            doctor.phone_number, 
-                            alert_message
-                        )
-                        if sms_sent:
-                            print("SMS alert sent successfully")
-                        else:
-                            print("Failed to send SMS alert")
+                # Check the reading against the threshold rules and raise alerts
+                alerts.check(patient, reading, rules)
+            
+            # Queue this iteration's SMS messages; delivery happens on the dispatcher thread
+            alerts.flush()
+            READINGS.inc(len(all_readings))
             
             # Print a summary of all readings
-            print("\nCurrent readings:")
-            print(f"{'Patient ID':5} {'Name':<12} {'BP Reading':<12}")
-            print("-" * 35)
-            for patient, sys_bp, dia_bp in all_readings:
-                print(f"{patient.id:<5} {patient.name + ' ' + patient.surname:<12} {sys_bp}/{dia_bp} mmHg")
+            print_bp_readings(all_readings)
             
             # Save the readings to CSV if needed
             # save_bp_readings_to_csv(all_readings)
             
-            # Wait for the next interval
-            if (datetime.datetime.now() - start_time).total_seconds() < duration_minutes * 60:
-                time.sleep(interval_seconds)
+            skipped = scheduler.finish_tick()
+            if skipped:
+                print(f"Iteration overran the {interval_seconds} s interval, {skipped} skipped")
                 
     except KeyboardInterrupt:
         print("\nMonitoring stopped by user.")
     finally:
-        # Close the serial port if it was opened
-        if sms_engine:
-            sms_engine.close_port()
-            print("Serial port closed")
+        alerts.close()
+        print_tick_stats(scheduler.stats)
     
     print("\nBlood pressure monitoring completed.")
+    return scheduler.stats
 
 # Save patient data to CSV
 def save_patients_to_csv(filename="patients.csv"):
@@ -350,14 +433,16 @@ def save_responsible_persons_to_csv(filename="responsible_persons.csv"):
             })
     print(f"Responsible persons data saved to {filename}")
 
+# Column order of the vital signs CSV file
+VITAL_SIGNS_FIELDS = ['patient_id', 'timestamp', 'systolic', 'diastolic', 'heart_rate',
+                      'temperature', 'oxygen_saturation', 'respiratory_rate']
+
 # Save vital signs to CSV
 def save_vital_signs_to_csv(vital_signs_data, filename="vital_signs.csv"):
     file_exists = os.path.isfile(filename)
     
     with open(filename, 'a', newline='') as csvfile:
-        fieldnames = ['patient_id', 'timestamp', 'systolic', 'diastolic', 'heart_rate', 
-                     'temperature', 'oxygen_saturation', 'respiratory_rate']
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        writer = csv.DictWriter(csvfile, fieldnames=VITAL_SIGNS_FIELDS)
         
         if not file_exists:
             writer.writeheader()
@@ -376,8 +461,93 @@ def save_vital_signs_to_csv(vital_signs_data, filename="vital_signs.csv"):
     
     print(f"Vital signs data saved to {filename}")
 
+# Long-lived, buffered writer for the vital signs CSV file
+class VitalSignsCSVWriter:
+    """
+    Append vital signs to a CSV file that stays open between calls.
+
+    Rows are formatted with a pre-built format string and buffered in memory.
+    The buffer is written out when it holds `flush_rows` rows or when a write
+    happens `flush_interval` seconds after the last flush, and on close().
+    The output matches save_vital_signs_to_csv.
+
+    Args:
+        filename (str): CSV file to append to; the header is written if it is new
+        flush_rows (int): Buffered rows that trigger a flush
+        flush_interval (float): Seconds after which a write triggers a flush
+        fsync_interval (float): Seconds between fsync calls, None to never
+            fsync and 0 to fsync on every flush
+        clock: Monotonic time source of the flush and fsync intervals
+    """
+
+    ROW_FORMAT = ",".join(["{}"] * len(VITAL_SIGNS_FIELDS)) + "\r\n"
+
+    def __init__(self, filename="vital_signs.csv", flush_rows=1000, flush_interval=5.0,
+                 fsync_interval=None, clock=time.monotonic):
+        self.filename = filename
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self.rows_written = 0
+        self._buffer = []
+        self._file = None
+        self.clock = clock
+        self._last_flush = self._last_fsync = clock()
+
+    def open(self):
+        self._file = open(self.filename, 'a', newline='')
+        if self._file.tell() == 0:
+            self._file.write(",".join(VITAL_SIGNS_FIELDS) + "\r\n")
+        return self
+
+    def close(self):
+        if self._file:
+            self.flush()
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, vs: VitalSigns):
+        self._buffer.append(self.ROW_FORMAT.format(
+            vs.patient_id, vs.timestamp.isoformat(' ', 'seconds'), vs.systolic, vs.diastolic,
+            vs.heart_rate, vs.temperature, vs.oxygen_saturation, vs.respiratory_rate))
+        self._maybe_flush()
+
+    def write_many(self, vital_signs_data):
+        row_format = self.ROW_FORMAT.format
+        self._buffer.extend(
+            row_format(vs.patient_id, vs.timestamp.isoformat(' ', 'seconds'), vs.systolic, vs.diastolic,
+                       vs.heart_rate, vs.temperature, vs.oxygen_saturation, vs.respiratory_rate)
+            for vs in vital_signs_data)
+        self._maybe_flush()
+
+    def _maybe_flush(self):
+        if (len(self._buffer) >= self.flush_rows
+                or self.clock() - self._last_flush >= self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        # Rows stay buffered while the file is not open
+        if self._file is None:
+            return
+        if self._buffer:
+            self._file.write("".join(self._buffer))
+            self.rows_written += len(self._buffer)
+            self._buffer.clear()
+        self._file.flush()
+        now = self._last_flush = self.clock()
+        if self.fsync_interval is not None and now - self._last_fsync >= self.fsync_interval:
+            os.fsync(self._file.fileno())
+            self._last_fsync = now
+
 # Simulate monitoring vital signs for all patients
-def monitor_patients(iterations=5, interval=2):
+# Readings are returned as a list, or appended to `store` (a VitalsStore) if given
+def monitor_patients(iterations=5, interval=2, store=None):
     print("\n--- Patient Vital Signs Monitoring ---")
     print(f"{'Patient ID':5} {'Name':<8} {'Systolic':8} {'Diastolic':9} {'HR':4} {'Temp':5} {'O2%':4} {'RR':3}")
     print("-" * 56)
@@ -396,12 +566,16 @@ def monitor_patients(iterations=5, interval=2):
                   f"{vital_signs.heart_rate:<4} {vital_signs.temperature:<5} "
                   f"{vital_signs.oxygen_saturation:<4} {vital_signs.respiratory_rate:<3}")
         
-        all_vital_signs.extend(iteration_vital_signs)
+        if store is not None:
+            for vital_signs in iteration_vital_signs:
+                store.append(vital_signs)
+        else:
+            all_vital_signs.extend(iteration_vital_signs)
         
         if _ < iterations - 1:  # Don't sleep after the last iteration
             time.sleep(interval)
     
-    return all_vital_signs
+    return store if store is not None else all_vital_signs
 
 if __name__ == "__main__":
     # Create data directory if it doesn't exist
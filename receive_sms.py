@@ -1,14 +1,38 @@
-import serial
 import time
-from patient_monitoring import SMSEngine
+from gsm_modem import SMSEngine, SMSMessage
 
-def receive_sms(com_port: str = "COM5"):
+# Seconds to wait for a new message indication before checking the modem again
+URC_WAIT_TIMEOUT = 60
+
+def print_sms(message: SMSMessage):
+    received = message.timestamp.strftime('%Y-%m-%d %H:%M:%S') if message.timestamp else "unknown time"
+    print("\nReceived SMS:")
+    print("-" * 50)
+    print(f"From: {message.sender}  ({received})")
+    print(message.body)
+    print("-" * 50)
+
+def receive_sms(com_port: str = "COM5", handler=print_sms, stop_event=None):
     """
-    Continuously monitor and receive SMS messages.
+    Receive SMS messages as the modem announces them.
+
+    The modem is asked to report new messages with +CMTI, so the receiver
+    blocks on the port and only fetches the indicated message instead of
+    polling the whole storage. Messages are deleted from the modem once read.
     
     Args:
-        com_port (str): The COM port where the GSM modem is connected
+        com_port: The COM port where the GSM modem is connected, or a running
+            ModemService to share the modem with the monitor
+        handler: Called with each received SMSMessage
+        stop_event (threading.Event): Stops the receiver when set
     """
+    if not isinstance(com_port, str):
+        # Only callers that share a modem pay for importing the service
+        from modem_service import ModemService
+        if isinstance(com_port, ModemService):
+            receive_shared(com_port, handler, stop_event)
+            return
+
     # Initialize the SMS engine
     sms_engine = SMSEngine()
     
@@ -19,37 +43,16 @@ def receive_sms(com_port: str = "COM5"):
             print("Waiting for incoming SMS messages...")
             print("Press Ctrl+C to stop")
             
-            while True:
+            while not (stop_event and stop_event.is_set()):
                 try:
-                    # Initialize the modem
-                    sms_engine.port.write(b'AT\r\n')
-                    time.sleep(0.2)
-                    
-                    # Set SMS text mode
-                    sms_engine.port.write(b'AT+CMGF=1\r\n')
-                    time.sleep(0.2)
-                    
-                    # Set GSM character set
-                    sms_engine.port.write(b'AT+CSCS="GSM"\r\n')
-                    time.sleep(0.2)
+                    # Block until the modem reports new messages
+                    messages = sms_engine.poll_messages(timeout=1 if stop_event else URC_WAIT_TIMEOUT)
+                    for message in messages:
+                        handler(message)
                     
-                    # Read unread messages only
-                    sms_engine.port.write(b'AT+CMGL="REC UNREAD"\r\n')
-                    time.sleep(1)
-                    
-                    # Read response
-                    response = sms_engine.port.read(sms_engine.port.in_waiting)
-                    
-                    if response:
-                        # Convert bytes to string and print
-                        message = response.decode('utf-8', errors='ignore')
-                        print("\nReceived SMS:")
-                        print("-" * 50)
-                        print(message)
-                        print("-" * 50)
-                    
-                    # Wait before checking again
-                    time.sleep(5)
+                    # Wait before configuring the modem again after an error
+                    if not sms_engine.initialized:
+                        time.sleep(5)
                     
                 except KeyboardInterrupt:
                     print("\nStopping SMS receiver...")
@@ -66,9 +69,22 @@ def receive_sms(com_port: str = "COM5"):
         sms_engine.close_port()
         print("Serial port closed")
 
+def receive_shared(service, handler=print_sms, stop_event=None):
+    """Receive SMS messages through a ModemService until stopped."""
+    service.subscribe_messages(handler)
+    print(f"Waiting for incoming SMS messages on {service.port_name}...")
+    try:
+        while not (stop_event and stop_event.wait(1)):
+            if not stop_event:
+                time.sleep(1)
+    except KeyboardInterrupt:
+        print("\nStopping SMS receiver...")
+    finally:
+        service.unsubscribe(handler)
+
 if __name__ == "__main__":
     # Example usage
     com_port = "COM5"  # Replace with your actual COM port
     
     print("Starting SMS receiver...")
-    receive_sms(com_port) 
\ No newline at end of file
+    receive_sms(com_port)
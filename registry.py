@@ -0,0 +1,134 @@
+import csv
+import datetime
+import os
+import time
+from typing import Dict, List, Optional
+
+from patient_monitoring import Patient, ResponsiblePerson
+
+class PatientRegistry:
+    """
+    Patients and responsible persons loaded from the data/*.csv files.
+
+    The files are read on first use and indexed by patient id, room number
+    and doctor id. Every patient of a doctor shares that doctor's
+    ResponsiblePerson object. When a file changes on disk the registry reloads
+    it on the next lookup, checking at most once per `check_interval` seconds.
+    A file that is missing or malformed is reported and the previous data is
+    kept until the file changes again, so monitoring continues.
+
+    Args:
+        patients_file (str): CSV written by save_patients_to_csv
+        responsible_persons_file (str): CSV written by save_responsible_persons_to_csv
+        check_interval (float): Minimum seconds between file modification checks
+    """
+
+    def __init__(self, patients_file="data/patients.csv",
+                 responsible_persons_file="data/responsible_persons.csv", check_interval=5.0):
+        self.patients_file = patients_file
+        self.responsible_persons_file = responsible_persons_file
+        self.check_interval = check_interval
+        self.loads = 0
+        self._mtimes = None
+        self._last_check = 0.0
+        self._failed_mtimes = None  # modification times of files that failed to load
+        self._last_error = None
+        self._doctors: Dict[int, ResponsiblePerson] = {}
+        self._patients: Dict[int, Patient] = {}
+        self._by_room: Dict[int, List[Patient]] = {}
+        self._by_doctor: Dict[int, List[Patient]] = {}
+
+    def _file_mtimes(self) -> tuple:
+        return (os.stat(self.patients_file).st_mtime_ns, os.stat(self.responsible_persons_file).st_mtime_ns)
+
+    def _ensure_loaded(self):
+        now = time.monotonic()
+        if self._mtimes is not None and now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+        try:
+            mtimes = self._file_mtimes()
+        except OSError as ex:
+            self._load_failed(None, ex)
+            return
+        # Files that failed to load are only read again once they change
+        if mtimes != self._mtimes and mtimes != self._failed_mtimes:
+            self.reload(mtimes)
+
+    def _load_failed(self, mtimes: Optional[tuple], error: Exception):
+        self._failed_mtimes = mtimes
+        # Report each error once rather than on every check
+        if str(error) != self._last_error:
+            self._last_error = str(error)
+            print(f"Error loading patient registry, keeping the previous data: {error}")
+
+    def reload(self, mtimes: Optional[tuple] = None) -> bool:
+        """
+        Read both files and replace the indexes in one step.
+
+        Returns:
+            bool: False if a file could not be read or parsed; the previous
+            indexes are kept
+        """
+        try:
+            mtimes = mtimes or self._file_mtimes()
+            doctors = {}
+            with open(self.responsible_persons_file, newline='') as csvfile:
+                for row in csv.DictReader(csvfile):
+                    person_id = int(row['id'])
+                    doctors[person_id] = ResponsiblePerson(person_id, row['name'], row['surname'],
+                                                           row['phone_number'])
+
+            patients, by_room, by_doctor = {}, {}, {}
+            with open(self.patients_file, newline='') as csvfile:
+                for row in csv.DictReader(csvfile):
+                    doctor = doctors.get(int(row['responsible_person_id']))
+                    if doctor is None:
+                        print(f"Skipping patient {row['id']}: unknown responsible person "
+                              f"{row['responsible_person_id']}")
+                        continue
+                    patient = Patient(int(row['id']), row['name'], row['surname'],
+                                      datetime.date.fromisoformat(row['date_of_birth']),
+                                      int(row['room_number']), doctor)
+                    patients[patient.id] = patient
+                    by_room.setdefault(patient.room_number, []).append(patient)
+                    by_doctor.setdefault(doctor.id, []).append(patient)
+        except (OSError, ValueError, KeyError) as ex:
+            # KeyError is a missing column, e.g. a file caught while being rewritten
+            self._load_failed(mtimes, ex)
+            return False
+
+        # Swap in the new indexes together so readers never see a partial load
+        self._doctors, self._patients, self._by_room, self._by_doctor = doctors, patients, by_room, by_doctor
+        self._mtimes = mtimes
+        self._failed_mtimes = self._last_error = None
+        self.loads += 1
+        return True
+
+    def __len__(self):
+        self._ensure_loaded()
+        return len(self._patients)
+
+    def patients(self) -> List[Patient]:
+        self._ensure_loaded()
+        return list(self._patients.values())
+
+    def responsible_persons(self) -> List[ResponsiblePerson]:
+        self._ensure_loaded()
+        return list(self._doctors.values())
+
+    def patient(self, patient_id: int) -> Optional[Patient]:
+        self._ensure_loaded()
+        return self._patients.get(patient_id)
+
+    def doctor(self, person_id: int) -> Optional[ResponsiblePerson]:
+        self._ensure_loaded()
+        return self._doctors.get(person_id)
+
+    def patients_in_room(self, room_number: int) -> List[Patient]:
+        self._ensure_loaded()
+        return self._by_room.get(room_number, [])
+
+    def patients_of(self, person_id: int) -> List[Patient]:
+        self._ensure_loaded()
+        return self._by_doctor.get(person_id, [])
@@ -0,0 +1,180 @@
+import csv
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+from alert_rules import RuleSet, load_rules
+from alerts import Alert, AlertCoalescer
+from trends import TrendTracker
+from vitals_binlog import BinaryVitalsReader, read_csv_chunks
+from vitals_store import from_epoch_ms
+
+# Readings parsed and evaluated at a time
+DEFAULT_CHUNK_ROWS = 200_000
+
+# What one rule would have done over a history
+@dataclass
+class RuleReplay:
+    rule: str
+    severity: str
+    hits: int = 0  # readings that matched the rule
+    alerts: int = 0  # hits that passed the cooldown and would have been sent
+    times: List[int] = field(default_factory=list)  # epoch ms of each alert
+    patients: List[int] = field(default_factory=list)  # patient of each alert
+
+    @property
+    def first(self) -> Optional[int]:
+        return self.times[0] if self.times else None
+
+    @property
+    def last(self) -> Optional[int]:
+        return self.times[-1] if self.times else None
+
+# Outcome of replaying one history file
+@dataclass
+class ReplayResult:
+    source: str
+    readings: int = 0
+    elapsed: float = 0.0
+    rules: List[RuleReplay] = field(default_factory=list)
+
+    @property
+    def rate(self) -> float:
+        return self.readings / self.elapsed if self.elapsed else 0.0
+
+# Column chunks of a vital signs CSV file or a binary log directory
+def read_history(path: str, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[Dict[str, np.ndarray]]:
+    if not os.path.isdir(path):
+        yield from read_csv_chunks(path, chunk_rows)
+        return
+    for base_ms, records in BinaryVitalsReader(path).scan():
+        for start in range(0, len(records), chunk_rows):
+            chunk = records[start:start + chunk_rows]
+            columns = {name: chunk[name] for name in chunk.dtype.names if name != 'time_offset'}
+            columns['timestamp'] = base_ms + chunk['time_offset'].astype(np.int64)
+            columns['temperature'] = chunk['temperature'] / 100
+            yield columns
+
+def _add_trends(columns: Dict[str, np.ndarray], trends: TrendTracker):
+    # Trend statistics depend on each patient's previous readings, so this runs row by row
+    count = len(columns['patient_id'])
+    values = {name: columns[name].tolist() for name in trends.fields if name in columns}
+    derived: Dict[str, np.ndarray] = {}
+    rows = zip(columns['patient_id'].tolist(), (columns['timestamp'] / 1000).tolist())
+    for row, (patient_id, seconds) in enumerate(rows):
+        reading = {name: column[row] for name, column in values.items()}
+        for name, value in trends.update(patient_id, reading, seconds).items():
+            if name not in derived:
+                derived[name] = np.full(count, np.nan)
+            derived[name][row] = value
+    columns.update(derived)
+
+def replay_file(path: str, rules: Optional[RuleSet] = None, alert_cooldown_seconds: float = 300,
+                trend_window: Optional[int] = None, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> ReplayResult:
+    """
+    Replay a recorded history through the alert rules as fast as possible.
+
+    Readings are evaluated in chunks with RuleSet.evaluate_batch and the hits
+    go through an AlertCoalescer whose clock is the reading timestamps, so
+    repeats are suppressed exactly as the live monitor would with the same
+    cooldown. Nothing is sent and nothing sleeps. Readings are expected in
+    time order, as the monitor writes them.
+
+    Args:
+        path (str): Vital signs CSV file or binary log directory
+        rules (RuleSet): Threshold rules, the built-in table if None
+        alert_cooldown_seconds (float): Cooldown for repeated alerts of a patient
+        trend_window (int): Track trends over this many readings for the trend
+            rules; slower, as trends are computed row by row
+        chunk_rows (int): Readings evaluated at a time
+
+    Returns:
+        ReplayResult: Per-rule hits, alerts and alert times
+    """
+    rules = rules or load_rules()
+    result = ReplayResult(path, rules=[RuleReplay(rule.name, rule.severity.name) for rule in rules.rules])
+    trends = TrendTracker(window=trend_window) if trend_window else None
+    now = [0.0]
+    coalescer = AlertCoalescer(alert_cooldown_seconds, clock=lambda: now[0])
+
+    start = time.perf_counter()
+    for columns in read_history(path, chunk_rows):
+        if trends is not None:
+            _add_trends(columns, trends)
+        hits = rules.evaluate_batch(columns)
+        for index, count in enumerate(np.bincount(hits.rule, minlength=len(rules.rules)).tolist()):
+            result.rules[index].hits += count
+
+        # Offer the hits in reading order, the rules of one reading in table order
+        order = np.lexsort((hits.rule, hits.row))
+        rows, rule_indexes = hits.row[order], hits.rule[order]
+        timestamps = columns['timestamp'][rows].tolist()
+        for timestamp, patient_id, rule_index in zip(timestamps, hits.patient_id[order].tolist(),
+                                                     rule_indexes.tolist()):
+            now[0] = timestamp / 1000
+            rule = rules.rules[rule_index]
+            if coalescer.offer(Alert('', '', rule.severity, patient_id, rule=rule.name)):
+                replayed = result.rules[rule_index]
+                replayed.alerts += 1
+                replayed.times.append(timestamp)
+                replayed.patients.append(patient_id)
+        coalescer.discard_pending()
+        result.readings += len(columns['patient_id'])
+    result.elapsed = time.perf_counter() - start
+    return result
+
+def replay_files(paths: List[str], rules: Optional[RuleSet] = None, alert_cooldown_seconds: float = 300,
+                 trend_window: Optional[int] = None, workers: Optional[int] = None) -> List[ReplayResult]:
+    """
+    Replay several histories, one worker process per file.
+
+    Each file is replayed on its own, as a separate history. Results are in
+    the order of paths.
+
+    Args:
+        workers (int): Worker processes, one per CPU core by default
+    """
+    rules = rules or load_rules()
+    workers = min(workers or os.cpu_count() or 1, len(paths))
+    arguments = (rules, alert_cooldown_seconds, trend_window)
+    if workers <= 1:
+        return [replay_file(path, *arguments) for path in paths]
+    with ProcessPoolExecutor(workers) as executor:
+        futures = [executor.submit(replay_file, path, *arguments) for path in paths]
+        return [future.result() for future in futures]
+
+def print_replay_report(results: List[ReplayResult]):
+    for result in results:
+        print(f"\n{result.source}: {result.readings} readings in {result.elapsed:.2f} s "
+              f"({result.rate:,.0f} readings/s)")
+        print(f"  {'Rule':<28} {'Severity':<9} {'Hits':>9} {'Alerts':>7}  First alert          Last alert")
+        for replayed in result.rules:
+            first = from_epoch_ms(replayed.first).strftime('%Y-%m-%d %H:%M:%S') if replayed.times else '-'
+            last = from_epoch_ms(replayed.last).strftime('%Y-%m-%d %H:%M:%S') if replayed.times else '-'
+            print(f"  {replayed.rule:<28} {replayed.severity:<9} {replayed.hits:>9} {replayed.alerts:>7}  "
+                  f"{first:<20} {last}")
+
+# Write every alert of the replays to a CSV file, in time order per file
+def write_alert_times(results: List[ReplayResult], filename: str) -> int:
+    alerts = 0
+    with open(filename, 'w', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(['source', 'timestamp', 'patient_id', 'rule', 'severity'])
+        for result in results:
+            rows = [(timestamp, patient_id, replayed.rule, replayed.severity)
+                    for replayed in result.rules
+                    for timestamp, patient_id in zip(replayed.times, replayed.patients)]
+            rows.sort(key=lambda row: row[0])
+            for timestamp, patient_id, rule, severity in rows:
+                writer.writerow([result.source, from_epoch_ms(timestamp).strftime('%Y-%m-%d %H:%M:%S'),
+                                 patient_id, rule, severity])
+            alerts += len(rows)
+    return alerts
+
+if __name__ == "__main__":
+    print_replay_report(replay_files(sys.argv[1:] or ["data/vital_signs.csv"]))
@@ -0,0 +1,74 @@
+import time
+from dataclasses import dataclass
+
+from metrics import TICK_JITTER_SECONDS, TICK_OVERRUNS, TICK_SECONDS, TICKS_SKIPPED
+
+# Timing of the ticks run by a TickScheduler; times are in seconds
+@dataclass
+class TickStats:
+    ticks: int = 0
+    skipped: int = 0  # ticks dropped after an overrun
+    overruns: int = 0  # ticks still running when the next one was due
+    total_jitter: float = 0.0
+    max_jitter: float = 0.0  # latest start after the due time
+    max_duration: float = 0.0
+
+    @property
+    def average_jitter(self) -> float:
+        return self.total_jitter / self.ticks if self.ticks else 0.0
+
+class TickScheduler:
+    """
+    Fixed-rate ticks on the monotonic clock.
+
+    Tick k is due at start + k * interval, so the time spent in a tick does
+    not push the following ticks back. Jitter is how late a tick started.
+    A tick that is still running when the next one is due is an overrun:
+    with ``coalesce`` the missed ticks are replaced by one tick that starts
+    immediately, otherwise they are skipped and the next tick waits for its
+    slot. Either way the backlog never exceeds one tick.
+
+    Args:
+        interval (float): Seconds between ticks
+        coalesce (bool): Run one late tick for the missed ones instead of skipping them
+        clock: Monotonic time source
+    """
+
+    def __init__(self, interval: float, coalesce: bool = True, clock=time.monotonic):
+        self.interval = interval
+        self.coalesce = coalesce
+        self.clock = clock
+        self.stats = TickStats()
+        self.next_tick = clock()
+        self._started = None
+
+    def delay(self) -> float:
+        """Seconds until the next tick is due."""
+        return max(0.0, self.next_tick - self.clock())
+
+    def start_tick(self):
+        self._started = self.clock()
+        jitter = max(0.0, self._started - self.next_tick)
+        self.stats.ticks += 1
+        self.stats.total_jitter += jitter
+        self.stats.max_jitter = max(self.stats.max_jitter, jitter)
+        TICK_JITTER_SECONDS.observe(jitter)
+
+    def finish_tick(self) -> int:
+        """Schedule the next tick. Returns the number of ticks skipped."""
+        now = self.clock()
+        if self._started is not None:
+            self.stats.max_duration = max(self.stats.max_duration, now - self._started)
+            TICK_SECONDS.observe(now - self._started)
+        self.next_tick += self.interval
+        if now <= self.next_tick:
+            return 0
+
+        self.stats.overruns += 1
+        missed = int((now - self.next_tick) // self.interval) + 1
+        skipped = missed - 1 if self.coalesce else missed
+        self.next_tick += skipped * self.interval
+        self.stats.skipped += skipped
+        TICK_OVERRUNS.inc()
+        TICKS_SKIPPED.inc(skipped)
+        return skipped
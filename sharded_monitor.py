@@ -0,0 +1,216 @@
+import datetime
+import multiprocessing
+import time
+from multiprocessing.connection import wait
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from alert_rules import RuleSet, load_rules
+from metrics import READINGS
+from patient_monitoring import AlertChannel, Patient, patients, print_tick_stats
+from scheduling import TickScheduler, TickStats
+from vitals_simulator import simulate_ward_batch
+from vitals_store import to_epoch_ms
+
+# Patients on the same floor are handled by the same worker
+def floor_of(patient: Patient) -> int:
+    return patient.room_number // 100
+
+def shard_patients(monitored_patients: List[Patient], workers: int, key: Callable = floor_of) -> List[List[Patient]]:
+    """
+    Split patients into `workers` shards without splitting a key group.
+
+    Groups are placed largest first on the smallest shard so the shards end
+    up about the same size.
+    """
+    groups: Dict[object, List[Patient]] = {}
+    for patient in monitored_patients:
+        groups.setdefault(key(patient), []).append(patient)
+    shards = [[] for _ in range(workers)]
+    for group in sorted(groups.values(), key=len, reverse=True):
+        min(shards, key=len).extend(group)
+    return shards
+
+def _shard_worker(connection, patient_ids: np.ndarray, rules: RuleSet, acquire: Callable, seed):
+    # Runs in a worker process: acquire and evaluate the shard once per tick request
+    rng = np.random.default_rng(seed)
+    while connection.recv() is not None:
+        batch = acquire(patient_ids, rng)
+        connection.send((batch, rules.evaluate_batch(batch)))
+    connection.close()
+
+class ShardedMonitor:
+    """
+    Monitor patients in worker processes, one shard of patients each.
+
+    Every tick each worker acquires its shard's readings and evaluates the
+    rules with the vectorized RuleSet, then sends the readings and the rule
+    hits back over a pipe. The coordinator process owns the modem and the
+    storage: it appends the readings to each store and raises the alerts.
+
+    Args:
+        monitored_patients (list): Patients to monitor
+        workers (int): Number of worker processes
+        rules (RuleSet): Threshold rules, the built-in table if None
+        alerts (AlertChannel): Opened channel for alerts, or None to only count hits
+        stores (list): Objects with extend(batch, timestamp), e.g. VitalsStore or BinaryVitalsLog
+        shard_key: Patients with the same key share a worker, floor_of by default
+        acquire: Picklable function (patient_ids, rng) -> VitalsBatch run in the workers
+        seed (int): Seed of the worker random generators
+    """
+
+    def __init__(self, monitored_patients: List[Patient], workers: int = 2, rules: Optional[RuleSet] = None,
+                 alerts: Optional[AlertChannel] = None, stores=(), shard_key: Callable = floor_of,
+                 acquire: Callable = simulate_ward_batch, seed: Optional[int] = None):
+        self.rules = rules or load_rules()
+        self.alerts = alerts
+        self.stores = list(stores)
+        self.workers = workers
+        self.shard_key = shard_key
+        self.acquire = acquire
+        self._seeds = np.random.SeedSequence(seed)
+        self.shards = []
+        self.patients_by_id = {}
+        self._layout = None
+        self.readings = 0
+        self.hits = 0
+        self._connections = []
+        self._processes = []
+        self.set_patients(monitored_patients)
+
+    def set_patients(self, monitored_patients: List[Patient]) -> bool:
+        """
+        Follow a change of the monitored patients, e.g. after a registry reload.
+
+        The patient lookup used for alerts is always replaced. The shards are
+        only rebuilt, and running workers restarted, if patients were added or
+        removed or changed shard key. Returns True if the shards were rebuilt.
+        """
+        self.patients_by_id = {patient.id: patient for patient in monitored_patients}
+        layout = frozenset((patient.id, self.shard_key(patient)) for patient in monitored_patients)
+        if layout == self._layout:
+            return False
+        running = bool(self._processes)
+        if running:
+            self.stop()
+        self.shards = [shard for shard in shard_patients(monitored_patients, self.workers, self.shard_key) if shard]
+        self._layout = layout
+        if running:
+            self.start()
+        return True
+
+    def start(self):
+        # Each start draws new seeds, so restarted workers do not repeat earlier readings
+        seeds = self._seeds.spawn(len(self.shards))
+        for shard, seed in zip(self.shards, seeds):
+            parent, child = multiprocessing.Pipe()
+            patient_ids = np.array([patient.id for patient in shard], dtype=np.int32)
+            process = multiprocessing.Process(target=_shard_worker, daemon=True,
+                                              args=(child, patient_ids, self.rules, self.acquire, seed))
+            process.start()
+            child.close()
+            self._connections.append(parent)
+            self._processes.append(process)
+        return self
+
+    def stop(self):
+        for connection in self._connections:
+            try:
+                connection.send(None)
+            except OSError:
+                pass
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        for connection in self._connections:
+            connection.close()
+        self._connections, self._processes = [], []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def tick(self, timestamp: Optional[datetime.datetime] = None) -> tuple:
+        """
+        Run one monitoring tick on every worker.
+
+        Returns:
+            tuple: (readings, rule hits) of this tick
+        """
+        timestamp_ms = to_epoch_ms(timestamp or datetime.datetime.now())
+        for connection in self._connections:
+            connection.send(timestamp_ms)
+
+        readings = hits = 0
+        hit_patients = []
+        pending = list(self._connections)
+        # Handle each shard as soon as it answers
+        while pending:
+            for connection in wait(pending):
+                pending.remove(connection)
+                batch, rule_hits = connection.recv()
+                for store in self.stores:
+                    store.extend(batch, timestamp_ms)
+                if self.alerts:
+                    self.alerts.raise_hits(batch, rule_hits, self.rules, self.patients_by_id)
+                    hit_patients.extend(rule_hits.patient_id.tolist())
+                readings += len(batch)
+                hits += len(rule_hits)
+
+        if self.alerts:
+            self.alerts.resolve_except(hit_patients)
+            self.alerts.flush()
+        self.readings += readings
+        self.hits += hits
+        READINGS.inc(readings)
+        return readings, hits
+
+def monitor_sharded(duration_minutes=5, interval_seconds=20, workers=2, com_port=None,
+                    alert_cooldown_seconds=300, rules=None, registry=None, stores=()) -> TickStats:
+    """
+    Monitor vital signs with one worker process per shard of patients.
+
+    Ticks follow the same drift-free schedule as monitor_blood_pressure and
+    alerts go through the same AlertChannel, owned by this process. With a
+    registry the patients are read again every tick, and the workers are
+    re-sharded when a reload adds or removes patients.
+    """
+    monitored_patients = registry.patients() if registry is not None else patients
+    loads = registry.loads if registry is not None else 0
+    alerts = AlertChannel(com_port, alert_cooldown_seconds).open()
+    scheduler = TickScheduler(interval_seconds)
+    end = scheduler.next_tick + duration_minutes * 60
+    monitor = ShardedMonitor(monitored_patients, workers, rules, alerts, stores)
+    print(f"Monitoring {len(monitored_patients)} patients in {len(monitor.shards)} worker processes")
+    try:
+        with monitor:
+            while scheduler.next_tick < end:
+                time.sleep(scheduler.delay())
+                scheduler.start_tick()
+                # A registry reload can admit or discharge patients; re-shard when it does
+                if registry is not None:
+                    monitored_patients = registry.patients()
+                    if registry.loads != loads:
+                        loads = registry.loads
+                        if monitor.set_patients(monitored_patients):
+                            print(f"Patients changed: monitoring {len(monitored_patients)} patients "
+                                  f"in {len(monitor.shards)} worker processes")
+                readings, hits = monitor.tick()
+                print(f"Tick {scheduler.stats.ticks} - {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}: "
+                      f"{readings} readings, {hits} alerts")
+                skipped = scheduler.finish_tick()
+                if skipped:
+                    print(f"Tick overran the {interval_seconds} s interval, {skipped} skipped")
+    except KeyboardInterrupt:
+        print("\nMonitoring stopped by user.")
+    finally:
+        alerts.close()
+        print_tick_stats(scheduler.stats)
+    return scheduler.stats
+
+if __name__ == "__main__":
+    monitor_sharded(duration_minutes=1, interval_seconds=5, workers=2)
@@ -0,0 +1,130 @@
+import unittest
+
+from alerts import AcknowledgementHandler, Alert, AlertCoalescer, AlertDispatcher, Severity
+from fake_modem import FakeModem
+from gsm_modem import SMSEngine, SMSMessage
+
+DOCTOR = "+38344111222"
+
+def _alert(patient_id: int, severity: Severity = Severity.EMERGENCY, phone_number: str = DOCTOR) -> Alert:
+    return Alert(phone_number, f"Full alert for patient {patient_id}", severity, patient_id,
+                 summary=f"Alert patient {patient_id}")
+
+def _reply(body: str, sender: str = DOCTOR) -> SMSMessage:
+    return SMSMessage(1, "REC UNREAD", sender, None, body)
+
+class BatchedAcknowledgementTest(unittest.TestCase):
+    def setUp(self):
+        self.coalescer = AlertCoalescer(cooldown=300)
+        self.dispatcher = AlertDispatcher(None)  # not started, alerts stay queued
+        self.handler = AcknowledgementHandler(self.coalescer, self.dispatcher)
+
+    def queue(self, *alerts):
+        for alert in alerts:
+            self.assertTrue(self.coalescer.offer(alert))
+        for message in self.coalescer.flush():
+            self.dispatcher.submit(message)
+
+    def queued(self) -> list:
+        return [entry[2] for entry in self.dispatcher._ready + self.dispatcher._delayed]
+
+    def test_batch_records_its_patients(self):
+        self.queue(_alert(4), _alert(7, Severity.MODERATE))
+        [message] = self.queued()
+        self.assertIsNone(message.patient_id)
+        self.assertEqual([alert.patient_id for alert in message.batch], [4, 7])
+        self.assertTrue(message.covers(4) and message.covers(7))
+        self.assertFalse(message.covers(5))
+
+    def test_acknowledgement_repacks_batch_without_patient(self):
+        self.queue(_alert(4), _alert(7, Severity.MODERATE))
+        self.assertTrue(self.handler.handle(_reply("ACK 4")))
+        [message] = self.queued()
+        self.assertEqual(message.patient_id, 7)
+        self.assertEqual(message.message, "Full alert for patient 7")
+        self.assertEqual(message.severity, Severity.MODERATE)
+        self.assertEqual(self.dispatcher.stats.cancelled, 1)
+
+        self.assertTrue(self.handler.handle(_reply("ack #7")))
+        self.assertEqual(self.queued(), [])
+        self.assertEqual(self.dispatcher.stats.cancelled, 2)
+
+    def test_acknowledgement_repacks_every_part(self):
+        alerts = [_alert(patient_id) for patient_id in range(1, 21)]
+        for alert in alerts:
+            alert.summary = f"Alert patient {alert.patient_id} " + "x" * 40
+        self.queue(*alerts)
+        self.assertGreater(len(self.queued()), 1)
+
+        self.assertTrue(self.handler.handle(_reply("ACK 12")))
+        remaining = self.queued()
+        self.assertFalse(any(message.covers(12) for message in remaining))
+        self.assertNotIn("patient 12 ", "\n".join(message.message for message in remaining))
+        listed = sorted(alert.patient_id for message in remaining for alert in message.batch or [message])
+        self.assertEqual(listed, [patient_id for patient_id in range(1, 21) if patient_id != 12])
+
+    def test_repacked_retry_keeps_its_schedule(self):
+        self.queue(_alert(4), _alert(7))
+        [entry] = self.dispatcher._ready
+        self.dispatcher._ready.clear()
+        entry[2].attempts, entry[2].not_before = 1, 123.0
+        self.dispatcher._delayed.append((123.0, entry[1], entry[2]))
+
+        self.handler.handle(_reply("ACK 7"))
+        [(not_before, _, message)] = self.dispatcher._delayed
+        self.assertEqual((not_before, message.not_before, message.attempts), (123.0, 123.0, 1))
+        self.assertEqual(message.patient_id, 4)
+
+    def test_other_doctor_cannot_acknowledge(self):
+        self.queue(_alert(4), _alert(7))
+        self.assertFalse(self.handler.handle(_reply("ACK 4", sender="+38344999888")))
+        [message] = self.queued()
+        self.assertTrue(message.covers(4))
+
+class FakeModemAcknowledgementTest(unittest.TestCase):
+    def setUp(self):
+        self.modem = FakeModem().start()
+        self.addCleanup(self.modem.stop)
+        self.engine = SMSEngine()
+        self.assertTrue(self.engine.open_port(self.modem.port_name))
+        self.addCleanup(self.engine.close_port)
+        self.coalescer = AlertCoalescer(cooldown=300)
+        self.dispatcher = AlertDispatcher(self.engine)
+        self.handler = AcknowledgementHandler(self.coalescer, self.dispatcher)
+
+    def test_reply_cancels_patient_from_queued_batch(self):
+        for alert in (_alert(4), _alert(7), _alert(9, Severity.MODERATE)):
+            self.coalescer.offer(alert)
+        for message in self.coalescer.flush():
+            self.dispatcher.submit(message)
+
+        # The doctor replies before the queued batch goes out
+        self.modem.deliver_sms(DOCTOR, "ACK 7")
+        self.handler.handle_messages(self.engine.poll_messages(timeout=2.0))
+        self.assertEqual(self.handler.acknowledged, 1)
+        self.assertEqual(self.modem.inbox, {})
+
+        self.dispatcher.start()
+        self.dispatcher.stop(drain=True, timeout=10)
+        [(number, body)] = self.modem.sent_messages
+        self.assertEqual(number, DOCTOR)
+        self.assertIn("Alert patient 4", body)
+        self.assertIn("Alert patient 9", body)
+        self.assertNotIn("patient 7", body)
+        self.assertEqual(self.dispatcher.stats.cancelled, 1)
+        self.assertFalse(self.coalescer.offer(_alert(7)))
+
+    def test_reply_read_by_idle_task_cancels_single_alert(self):
+        # The idle task runs before the first send, as it does on the dispatcher's modem
+        self.dispatcher.idle_task = lambda: self.handler.handle_messages(self.engine.poll_messages())
+        self.coalescer.offer(_alert(4))
+        [message] = self.coalescer.flush()
+        self.assertEqual(message.patient_id, 4)
+        self.dispatcher.submit(message)
+        self.modem.deliver_sms(DOCTOR, "ACK 4")
+
+        self.dispatcher.start()
+        self.dispatcher.stop(drain=True, timeout=10)
+        self.assertEqual(self.handler.acknowledged, 1)
+        self.assertEqual(self.dispatcher.stats.cancelled, 1)
+        self.assertEqual(self.modem.sent_messages, [])
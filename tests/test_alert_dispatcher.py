@@ -0,0 +1,110 @@
+import threading
+import time
+import unittest
+
+from alerts import Alert, AlertDispatcher, Severity
+
+class RecordingSender:
+    """SMS engine stand-in that records sends and fails the first `failures` of them."""
+
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.attempts = []  # (message, monotonic time) of every send attempt
+        self.sent = []
+        self._lock = threading.Lock()
+
+    def send_sms(self, phone_number, message):
+        with self._lock:
+            self.attempts.append((message, time.monotonic()))
+            if len(self.attempts) <= self.failures:
+                return False
+            self.sent.append(message)
+            return True
+
+def alert(message: str, severity: Severity = Severity.MODERATE) -> Alert:
+    return Alert("+38344111222", message, severity)
+
+class AlertDispatcherTest(unittest.TestCase):
+    def test_emergencies_are_sent_first(self):
+        sender = RecordingSender()
+        dispatcher = AlertDispatcher(sender)
+        for item in (alert("moderate 1"), alert("emergency 1", Severity.EMERGENCY), alert("moderate 2"),
+                     alert("emergency 2", Severity.EMERGENCY)):
+            self.assertTrue(dispatcher.submit(item))
+        dispatcher.start()
+        dispatcher.stop(timeout=5)
+        self.assertEqual(sender.sent, ["emergency 1", "emergency 2", "moderate 1", "moderate 2"])
+        self.assertEqual(dispatcher.stats.sent, 4)
+        self.assertEqual(dispatcher.depth, 0)
+
+    def test_failed_send_is_retried_with_backoff(self):
+        sender = RecordingSender(failures=2)
+        dispatcher = AlertDispatcher(sender, max_attempts=3, backoff=0.1)
+        dispatcher.submit(alert("retry me"))
+        dispatcher.start()
+        dispatcher.stop(timeout=5)
+        self.assertEqual(sender.sent, ["retry me"])
+        self.assertEqual((dispatcher.stats.retried, dispatcher.stats.failed), (2, 0))
+        # The delay doubles after each failed attempt
+        times = [sent_at for _, sent_at in sender.attempts]
+        self.assertGreaterEqual(times[1] - times[0], 0.1)
+        self.assertGreaterEqual(times[2] - times[1], 0.2)
+
+    def test_retry_does_not_hold_back_other_alerts(self):
+        sender = RecordingSender(failures=1)
+        dispatcher = AlertDispatcher(sender, backoff=0.3)
+        dispatcher.submit(alert("first"))
+        dispatcher.submit(alert("second"))
+        dispatcher.start()
+        dispatcher.stop(timeout=5)
+        self.assertEqual(sender.sent, ["second", "first"])
+
+    def test_alert_is_given_up_after_max_attempts(self):
+        sender = RecordingSender(failures=10)
+        dispatcher = AlertDispatcher(sender, max_attempts=2, backoff=0.05)
+        dispatcher.submit(alert("lost"))
+        dispatcher.start()
+        dispatcher.stop(timeout=5)
+        self.assertEqual(len(sender.attempts), 2)
+        self.assertEqual((dispatcher.stats.retried, dispatcher.stats.failed), (1, 1))
+        self.assertEqual(dispatcher.depth, 0)
+
+    def test_full_queue_evicts_newest_less_severe_alert(self):
+        sender = RecordingSender()
+        dispatcher = AlertDispatcher(sender, max_queue=2)
+        self.assertTrue(dispatcher.submit(alert("moderate 1")))
+        self.assertTrue(dispatcher.submit(alert("moderate 2")))
+        self.assertTrue(dispatcher.submit(alert("emergency", Severity.EMERGENCY)))
+        # Nothing less severe is left to evict
+        self.assertFalse(dispatcher.submit(alert("moderate 3")))
+        self.assertEqual(dispatcher.depth, 2)
+        self.assertEqual(dispatcher.stats.dropped, 2)
+        dispatcher.start()
+        dispatcher.stop(timeout=5)
+        self.assertEqual(sender.sent, ["emergency", "moderate 1"])
+
+    def test_cancel_removes_queued_alerts_of_a_patient(self):
+        sender = RecordingSender()
+        dispatcher = AlertDispatcher(sender)
+        dispatcher.submit(Alert("+38344111222", "patient 4", Severity.EMERGENCY, patient_id=4))
+        dispatcher.submit(Alert("+38344555666", "patient 4 other doctor", Severity.MODERATE, patient_id=4))
+        dispatcher.submit(Alert("+38344111222", "patient 5", Severity.MODERATE, patient_id=5))
+        self.assertEqual(dispatcher.cancel(4, "+38344111222"), 1)
+        self.assertEqual(dispatcher.cancel(6), 0)
+        self.assertEqual((dispatcher.depth, dispatcher.stats.cancelled), (2, 1))
+        dispatcher.start()
+        dispatcher.stop(timeout=5)
+        self.assertEqual(sender.sent, ["patient 4 other doctor", "patient 5"])
+
+    def test_cancel_removes_alert_waiting_for_retry(self):
+        sender = RecordingSender(failures=1)
+        dispatcher = AlertDispatcher(sender, backoff=30)
+        dispatcher.submit(Alert("+38344111222", "patient 4", Severity.EMERGENCY, patient_id=4))
+        dispatcher.start()
+        deadline = time.monotonic() + 5
+        while not dispatcher.stats.retried and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(dispatcher.cancel(4), 1)
+        self.assertEqual(dispatcher.depth, 0)
+        dispatcher.stop(timeout=5)
+        self.assertEqual((len(sender.attempts), sender.sent), (1, []))
@@ -0,0 +1,31 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from alert_rules import load_rules, save_rules_to_csv
+from alerts import Severity
+
+RULES_CSV = os.path.join(os.path.dirname(__file__), os.pardir, "data", "alert_rules.csv")
+
+class RuleTableTest(unittest.TestCase):
+    def test_built_in_table_matches_the_csv(self):
+        built_in, from_csv = load_rules(), load_rules(RULES_CSV)
+        self.assertEqual([rule.name for rule in built_in.rules], [rule.name for rule in from_csv.rules])
+        for expected, rule in zip(built_in.rules, from_csv.rules):
+            self.assertEqual(rule, expected)
+
+    def test_saved_table_loads_back(self):
+        rules = load_rules()
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "alert_rules.csv")
+            with contextlib.redirect_stdout(io.StringIO()):
+                save_rules_to_csv(rules, filename)
+            self.assertEqual(load_rules(filename).rules, rules.rules)
+
+    def test_rows_are_grouped_by_rule(self):
+        rule = {rule.name: rule for rule in load_rules().rules}['hypertensive_emergency']
+        self.assertEqual(rule.severity, Severity.EMERGENCY)
+        self.assertEqual([(c.field, c.low, c.high) for c in rule.conditions],
+                         [('systolic', 180, None), ('diastolic', 110, None)])
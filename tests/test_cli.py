@@ -0,0 +1,128 @@
+import argparse
+import contextlib
+import io
+import unittest
+from unittest import mock
+
+import cli
+from alert_rules import RuleSet
+from ingestion import Ingestor, SimulatorSource, TCPSource, UDPSource
+
+class ParseListenTest(unittest.TestCase):
+    def test_valid_sources(self):
+        self.assertEqual(cli.parse_listen("tcp:9000"), ('tcp', '9000', None))
+        self.assertEqual(cli.parse_listen("udp:9001:line"), ('udp', '9001', 'line'))
+        self.assertEqual(cli.parse_listen("serial:/dev/ttyUSB0"), ('serial', '/dev/ttyUSB0', None))
+        self.assertEqual(cli.parse_listen("simulator"), ('simulator', '', None))
+
+    def test_invalid_sources(self):
+        for spec in ("http:80", "tcp", "udp:port", "serial", "tcp:9000:json"):
+            with self.assertRaises(argparse.ArgumentTypeError, msg=spec):
+                cli.parse_listen(spec)
+
+class ParserTest(unittest.TestCase):
+    def parse_error(self, argv) -> str:
+        errors = io.StringIO()
+        with contextlib.redirect_stderr(errors), self.assertRaises(SystemExit) as exited:
+            cli.main(argv)
+        self.assertEqual(exited.exception.code, 2)
+        return errors.getvalue()
+
+    def test_monitor_defaults(self):
+        args = cli.build_parser().parse_args(["monitor"])
+        self.assertEqual((args.port, args.duration, args.interval, args.cooldown), (None, 5, 20, 300))
+        self.assertEqual((args.rules, args.registry, args.trend_window, args.workers), (None, False, None, 1))
+        self.assertIsNone(args.listen)
+        self.assertIs(args.handler, cli.run_monitor)
+
+    def test_receive_call_and_replay_defaults(self):
+        parser = cli.build_parser()
+        self.assertEqual(parser.parse_args(["receive"]).port, cli.DEFAULT_PORT)
+        args = parser.parse_args(["call", "+38344922805", "--port", "COM7"])
+        self.assertEqual((args.phone_number, args.port), ("+38344922805", "COM7"))
+        args = parser.parse_args(["replay"])
+        self.assertEqual(args.paths, ["data/vital_signs.csv"])
+        self.assertEqual((args.cooldown, args.workers, args.alerts_csv), (300, None, None))
+
+    def test_command_is_required(self):
+        self.assertIn("required", self.parse_error([]))
+
+    def test_bad_listen_value_is_reported(self):
+        self.assertIn("unknown source 'http'", self.parse_error(["monitor", "--listen", "http:80"]))
+
+    def test_listen_cannot_be_sharded_or_trended(self):
+        for extra in (["--workers", "2"], ["--trend-window", "90"]):
+            self.assertIn("cannot be combined", self.parse_error(["monitor", "--listen", "simulator"] + extra))
+
+class DispatchTest(unittest.TestCase):
+    def run_cli(self, argv) -> str:
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.assertEqual(cli.main(argv), 0)
+        return output.getvalue()
+
+    def test_monitor_single_port(self):
+        with mock.patch('patient_monitoring.monitor_blood_pressure') as monitor:
+            self.run_cli(["monitor", "--port", "COM7", "--duration", "1", "--interval", "5", "--cooldown", "60"])
+        (duration, interval, com_port, cooldown, rules, registry, trends), _ = monitor.call_args
+        self.assertEqual((duration, interval, com_port, cooldown), (1, 5, "COM7", 60))
+        self.assertIsInstance(rules, RuleSet)
+        self.assertIsNone(registry)
+        self.assertIsNone(trends)
+
+    def test_monitor_pool_and_trends(self):
+        with mock.patch('patient_monitoring.monitor_blood_pressure') as monitor:
+            self.run_cli(["monitor", "--port", "COM7", "COM8", "--trend-window", "90"])
+        args, _ = monitor.call_args
+        self.assertEqual(args[2], ["COM7", "COM8"])
+        self.assertEqual(args[6].window, 90)
+
+    def test_monitor_workers_runs_sharded(self):
+        with mock.patch('sharded_monitor.monitor_sharded') as sharded, \
+                mock.patch('patient_monitoring.monitor_blood_pressure') as monitor:
+            self.run_cli(["monitor", "--workers", "3", "--port", "COM7"])
+        monitor.assert_not_called()
+        duration, interval, workers, com_port = sharded.call_args[0][:4]
+        self.assertEqual((duration, interval, workers, com_port), (5, 20, 3, "COM7"))
+
+    def test_monitor_listen_builds_sources(self):
+        captured = {}
+
+        def monitor_ingested(ingestor, duration, com_port, cooldown, rules, registry):
+            captured.update(ingestor=ingestor, duration=duration, com_port=com_port)
+            ingestor.stop()
+
+        with mock.patch('ingestion.monitor_ingested', monitor_ingested):
+            self.run_cli(["monitor", "--listen", "tcp:0", "--listen", "udp:0:line", "--listen", "simulator"])
+        ingestor = captured['ingestor']
+        self.assertIsInstance(ingestor, Ingestor)
+        self.assertEqual([type(source) for source in ingestor.sources], [TCPSource, UDPSource, SimulatorSource])
+        self.assertEqual(ingestor.sources[1].protocol, 'line')
+        self.assertEqual((captured['duration'], captured['com_port']), (5, None))
+
+    def test_receive(self):
+        with mock.patch('receive_sms.receive_sms') as receive:
+            self.run_cli(["receive", "--port", "COM9"])
+        receive.assert_called_once_with("COM9")
+
+    def test_call(self):
+        with mock.patch('make_call.make_call') as call:
+            self.run_cli(["call", "+38344922805"])
+        call.assert_called_once_with("+38344922805", cli.DEFAULT_PORT)
+
+    def test_replay(self):
+        with mock.patch('replay.replay_files', return_value=["result"]) as replay_files, \
+                mock.patch('replay.print_replay_report') as report, \
+                mock.patch('replay.write_alert_times', return_value=7) as write:
+            output = self.run_cli(["replay", "a.csv", "b.csv", "--workers", "2", "--trend-window", "30",
+                                   "--alerts-csv", "alerts.csv"])
+        paths, rules, cooldown, trend_window, workers = replay_files.call_args[0]
+        self.assertEqual((paths, cooldown, trend_window, workers), (["a.csv", "b.csv"], 300, 30, 2))
+        self.assertIsInstance(rules, RuleSet)
+        report.assert_called_once_with(["result"])
+        write.assert_called_once_with(["result"], "alerts.csv")
+        self.assertIn("7 alerts written to alerts.csv", output)
+
+    def test_keyboard_interrupt_stops_cleanly(self):
+        with mock.patch('receive_sms.receive_sms', side_effect=KeyboardInterrupt):
+            self.assertIn("Stopped by user.", self.run_cli(["receive"]))
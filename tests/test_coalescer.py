@@ -0,0 +1,50 @@
+import unittest
+
+from alerts import Alert, AlertCoalescer, Severity
+
+DOCTOR = "+38344111222"
+
+class AlertCoalescerCooldownTest(unittest.TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.coalescer = AlertCoalescer(cooldown=300, clock=lambda: self.now)
+
+    def offer(self, rule: str, severity: Severity, patient_id: int = 4) -> bool:
+        return self.coalescer.offer(Alert(DOCTOR, f"{rule} for {patient_id}", severity, patient_id, rule=rule))
+
+    def test_repeat_of_same_rule_is_suppressed(self):
+        self.assertTrue(self.offer('hypertensive_emergency', Severity.EMERGENCY))
+        self.now = 299
+        self.assertFalse(self.offer('hypertensive_emergency', Severity.EMERGENCY))
+        self.now = 300
+        self.assertTrue(self.offer('hypertensive_emergency', Severity.EMERGENCY))
+        self.assertEqual(self.coalescer.suppressed, 1)
+
+    def test_other_rule_of_same_severity_gets_through(self):
+        self.assertTrue(self.offer('hypertensive_emergency', Severity.EMERGENCY))
+        self.now = 60
+        self.assertTrue(self.offer('hypoxemia', Severity.EMERGENCY))
+        self.assertFalse(self.offer('hypoxemia', Severity.EMERGENCY))
+
+    def test_other_rule_of_lower_severity_gets_through(self):
+        self.assertTrue(self.offer('hypertensive_emergency', Severity.EMERGENCY))
+        self.assertTrue(self.offer('stage_2_hypertension', Severity.MODERATE))
+
+    def test_cooldown_is_per_patient(self):
+        self.assertTrue(self.offer('hypoxemia', Severity.MODERATE, patient_id=4))
+        self.assertTrue(self.offer('hypoxemia', Severity.MODERATE, patient_id=7))
+
+    def test_alerts_without_rule_share_a_cooldown_per_severity(self):
+        moderate = Alert(DOCTOR, "moderate", Severity.MODERATE, 4)
+        self.assertTrue(self.coalescer.offer(moderate))
+        self.assertFalse(self.coalescer.offer(Alert(DOCTOR, "moderate", Severity.MODERATE, 4)))
+        self.assertTrue(self.coalescer.offer(Alert(DOCTOR, "emergency", Severity.EMERGENCY, 4)))
+
+    def test_acknowledgement_suppresses_up_to_acknowledged_severity(self):
+        self.assertTrue(self.offer('hypoxemia', Severity.MODERATE))
+        self.assertTrue(self.coalescer.acknowledge(DOCTOR, 4))
+        self.now = 600
+        self.assertFalse(self.offer('tachycardia', Severity.MODERATE))
+        self.assertTrue(self.offer('hypertensive_emergency', Severity.EMERGENCY))
+        self.coalescer.resolve(4)
+        self.assertTrue(self.offer('hypoxemia', Severity.MODERATE))
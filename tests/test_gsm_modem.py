@@ -0,0 +1,153 @@
+import datetime
+import time
+import unittest
+
+from fake_modem import FakeModem
+from gsm_modem import SMSEngine, parse_new_message_index, parse_sms_response, parse_sms_timestamp
+
+class ParseTest(unittest.TestCase):
+    def test_timestamp_with_quarter_hour_offset(self):
+        timestamp = parse_sms_timestamp("25/03/22,13:36:07+04")
+        self.assertEqual(timestamp, datetime.datetime(2025, 3, 22, 13, 36, 7,
+                                                      tzinfo=datetime.timezone(datetime.timedelta(hours=1))))
+        self.assertEqual(parse_sms_timestamp("25/03/22,13:36:07-08").utcoffset(), datetime.timedelta(hours=-2))
+        self.assertIsNone(parse_sms_timestamp("garbage"))
+
+    def test_read_response(self):
+        lines = ['+CMGR: "REC UNREAD","+38344111222","","25/03/22,13:36:07+04"', 'ACK 4', 'OK']
+        [message] = parse_sms_response(lines, index=3)
+        self.assertEqual((message.index, message.status, message.sender, message.body),
+                         (3, "REC UNREAD", "+38344111222", "ACK 4"))
+        self.assertEqual(message.timestamp.year, 2025)
+
+    def test_list_response_with_multi_line_body(self):
+        lines = ['+CMGL: 1,"REC READ","+38344111222","","25/03/22,13:36:07+04"', 'first', 'second',
+                 '+CMGL: 2,"REC UNREAD","+38344555666","","25/03/22,13:40:00+04"', 'ACK 7', 'OK']
+        first, second = parse_sms_response(lines)
+        self.assertEqual((first.index, first.body), (1, "first\nsecond"))
+        self.assertEqual((second.index, second.sender, second.body), (2, "+38344555666", "ACK 7"))
+
+    def test_new_message_index(self):
+        self.assertEqual(parse_new_message_index('+CMTI: "SM",12'), 12)
+        self.assertIsNone(parse_new_message_index('RING'))
+        self.assertIsNone(parse_new_message_index('+CMTI: "SM"'))
+
+class SMSEngineTest(unittest.TestCase):
+    def setUp(self):
+        self.modem = FakeModem().start()
+        self.addCleanup(self.modem.stop)
+        self.engine = SMSEngine()
+        self.assertTrue(self.engine.open_port(self.modem.port_name))
+        self.addCleanup(self.engine.close_port)
+
+    def test_open_port_initializes_once(self):
+        self.assertTrue(self.engine.initialized)
+        self.assertEqual(self.modem.commands, ['AT', 'AT+CMGF=1', 'AT+CSCS="GSM"'])
+
+    def test_send_sms(self):
+        self.assertTrue(self.engine.send_sms("+38344111222", "BP 190/120"))
+        self.assertTrue(self.engine.send_sms("+38344111222", "BP 185/118"))
+        self.assertEqual(self.modem.sent_messages, [("+38344111222", "BP 190/120"),
+                                                    ("+38344111222", "BP 185/118")])
+        self.assertEqual(self.engine.last_message_reference, 2)
+        # The session is configured once, not before every message
+        self.assertEqual(self.modem.commands.count('AT+CMGF=1'), 1)
+
+    def test_send_sms_with_echo(self):
+        self.modem.echo = True
+        self.assertTrue(self.engine.send_sms("+38344111222", "BP 190/120"))
+        self.assertEqual(self.modem.sent_messages, [("+38344111222", "BP 190/120")])
+
+    def test_send_sms_fails_without_answer(self):
+        self.modem.offline = True
+        self.assertFalse(self.engine.send_sms("+38344111222", "BP 190/120"))
+        self.assertFalse(self.engine.initialized)
+        self.modem.offline = False
+        self.assertTrue(self.engine.send_sms("+38344111222", "BP 190/120"))
+        self.assertTrue(self.engine.initialized)
+
+    def test_new_message_indication(self):
+        self.assertTrue(self.engine.enable_new_message_indications())
+        index = self.modem.deliver_sms("+38344555666", "ACK 7")
+        urc = self.engine.wait_for_urc(timeout=2.0)
+        self.assertEqual(parse_new_message_index(urc), index)
+        message = self.engine.read_message(index)
+        self.assertEqual((message.index, message.sender, message.body), (index, "+38344555666", "ACK 7"))
+
+    def test_poll_messages(self):
+        self.modem.deliver_sms("+38344111222", "stored before polling")
+        [stored] = self.engine.poll_messages()
+        self.assertEqual((stored.sender, stored.body), ("+38344111222", "stored before polling"))
+
+        self.modem.deliver_sms("+38344555666", "ACK 7")
+        [announced] = self.engine.poll_messages(timeout=2.0)
+        self.assertEqual((announced.sender, announced.body), ("+38344555666", "ACK 7"))
+        self.assertEqual(self.modem.inbox, {})
+        self.assertEqual(self.engine.poll_messages(), [])
+
+    def test_poll_messages_keeps_other_urcs(self):
+        self.engine.poll_messages()
+        self.modem.ring("+38344555666")
+        self.modem.deliver_sms("+38344111222", "ACK 4")
+        [message] = self.engine.poll_messages(timeout=2.0)
+        self.assertEqual(message.body, "ACK 4")
+        self.assertIn('RING', self.engine.urcs)
+
+    def test_make_call(self):
+        self.assertTrue(self.engine.make_call("+38344111222"))
+        self.assertEqual(self.modem.active_call, "+38344111222")
+        self.assertTrue(self.engine.end_call())
+        self.assertIsNone(self.modem.active_call)
+
+class UnsolicitedResultCodeTest(unittest.TestCase):
+    def setUp(self):
+        self.modem = FakeModem().start()
+        self.addCleanup(self.modem.stop)
+        self.engine = SMSEngine()
+        self.assertTrue(self.engine.open_port(self.modem.port_name))
+        self.addCleanup(self.engine.close_port)
+        self.assertEqual(self.engine.poll_messages(), [])  # enables +CMTI
+
+    def wait_for_bytes(self):
+        deadline = time.monotonic() + 2
+        while not self.engine.port.in_waiting and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def test_partial_indication_is_kept_between_commands(self):
+        self.modem.new_message_indications = False
+        index = self.modem.deliver_sms("+38344111222", "ACK 4")
+        self.modem.new_message_indications = True
+        self.modem._write(b'\r\n+CMTI: "SM",')
+        self.wait_for_bytes()
+        self.engine._collect_urcs()  # as before the next command is written
+        self.modem._write(f'{index}\r\n'.encode())
+
+        [message] = self.engine.poll_messages(timeout=2.0)
+        self.assertEqual(message.body, "ACK 4")
+        self.assertEqual(self.modem.inbox, {})
+
+    def test_message_that_cannot_be_read_is_listed_on_next_poll(self):
+        self.modem.deliver_sms("+38344111222", "ACK 4")
+        self.wait_for_bytes()
+        self.modem.offline = True
+        self.assertEqual(self.engine.poll_messages(), [])
+        self.assertFalse(self.engine.indications_enabled)
+
+        self.modem.offline = False
+        [message] = self.engine.poll_messages()
+        self.assertEqual(message.body, "ACK 4")
+        self.assertEqual(self.modem.inbox, {})
+        self.assertTrue(self.engine.indications_enabled)
+
+    def test_stale_lines_are_not_kept_as_urcs(self):
+        self.modem._write(b'\r\nOK\r\n\r\nRING\r\n\r\n+CSQ: 20,0\r\n\r\nNO CARRIER\r\n')
+        self.wait_for_bytes()
+        self.engine._collect_urcs()
+        self.assertEqual(list(self.engine.urcs), ['RING', 'NO CARRIER'])
+
+    def test_wait_for_urc_skips_stale_lines(self):
+        self.modem._write(b'\r\nOK\r\n')
+        self.assertIsNone(self.engine.wait_for_urc(timeout=0.2))
+        self.modem._write(b'\r\nERROR\r\n\r\n+CLIP: "+38344555666",145\r\n')
+        self.assertEqual(self.engine.wait_for_urc(timeout=2.0), '+CLIP: "+38344555666",145')
+        self.assertEqual(list(self.engine.urcs), [])
@@ -0,0 +1,63 @@
+import socket
+import threading
+import time
+import unittest
+
+import numpy as np
+
+from ingestion import MAX_FRAME_RECORDS, FrameDecoder, Ingestor, TCPSource, encode_frame, encode_lines
+from vitals_simulator import simulate_ward_batch
+
+class FrameDecoderTest(unittest.TestCase):
+    def test_frames_split_across_reads(self):
+        batch = simulate_ward_batch(np.arange(1, 11), 1)
+        data = encode_frame(batch, 1_700_000_000_000) * 2
+        decoder = FrameDecoder('binary')
+        batches = decoder.feed(data[:7]) + decoder.feed(data[7:50]) + decoder.feed(data[50:])
+        self.assertEqual([len(b) for b in batches], [10, 10])
+        self.assertEqual(batches[1].systolic.tolist(), batch.systolic.tolist())
+        self.assertEqual(decoder.errors, 0)
+
+    def test_frame_record_limit(self):
+        decoder = FrameDecoder('binary')
+        [decoded] = decoder.feed(encode_frame(simulate_ward_batch(np.ones(MAX_FRAME_RECORDS), 1), 0))
+        self.assertEqual(len(decoded), MAX_FRAME_RECORDS)
+        with self.assertRaises(ValueError):
+            encode_frame(simulate_ward_batch(np.ones(MAX_FRAME_RECORDS + 1), 1), 0)
+
+    def test_lines_with_errors(self):
+        batch = simulate_ward_batch(np.arange(1, 4), 1)
+        decoder = FrameDecoder('line')
+        [decoded] = decoder.feed(encode_lines(batch, 1_700_000_000_000) + b"1,2,3\nnot,a,number,1,2,3,4,5\n")
+        self.assertEqual(decoded.patient_id.tolist(), [1, 2, 3])
+        self.assertEqual(decoder.errors, 2)
+
+class TCPSourceTest(unittest.TestCase):
+    def test_stats_of_concurrent_connections_add_up(self):
+        connections, frames, patients = 8, 200, 5
+        source = TCPSource('127.0.0.1', 0)
+        ingestor = Ingestor([source], max_batches=connections * frames)
+        frame = encode_frame(simulate_ward_batch(np.arange(1, patients + 1), 1), 1_700_000_000_000)
+
+        def send():
+            with socket.create_connection(source.address) as client:
+                for _ in range(frames):
+                    client.sendall(frame + b'XX')  # two bytes of garbage after each frame
+
+        with ingestor:
+            clients = [threading.Thread(target=send) for _ in range(connections)]
+            for client in clients:
+                client.start()
+            for client in clients:
+                client.join()
+            deadline = time.monotonic() + 10
+            while source.stats.frames < connections * frames and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+        stats = source.stats
+        self.assertEqual(source.connections, connections)
+        self.assertEqual(stats.frames, connections * frames)
+        self.assertEqual(stats.readings, connections * frames * patients)
+        self.assertEqual(stats.bytes, connections * frames * (len(frame) + 2))
+        self.assertEqual(stats.dropped, 0)
+        self.assertGreater(stats.errors, 0)
@@ -0,0 +1,137 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+import urllib.error
+import urllib.request
+
+from metrics import MetricsRegistry, MetricsServer, SnapshotWriter
+
+class ShardTest(unittest.TestCase):
+    def test_counter_adds_up_the_shards_of_all_threads(self):
+        counter = MetricsRegistry().counter('requests_total', "Requests", label='kind')
+        threads_count, increments = 8, 1000
+
+        def work(index):
+            for _ in range(increments):
+                counter.inc(label_value='odd' if index % 2 else 'even')
+            counter.inc(0.5)
+
+        threads = [threading.Thread(target=work, args=(index,)) for index in range(threads_count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(counter._shards.all()), threads_count)
+        self.assertEqual(counter.values(), {'even': 4000, 'odd': 4000, None: 4.0})
+        self.assertEqual(counter.value, 8004)
+
+    def test_histogram_adds_up_the_shards_of_all_threads(self):
+        histogram = MetricsRegistry().histogram('latency_seconds', "Latency", (0.1, 1.0))
+        threads = [threading.Thread(target=lambda: [histogram.observe(v) for v in (0.05, 0.1, 0.5, 2.0)])
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        summary = histogram.summary()
+        # Bucket bounds are inclusive upper bounds and the counts are cumulative
+        self.assertEqual(summary['buckets'], {'0.1': 8, '1.0': 12, '+Inf': 16})
+        self.assertEqual(summary['count'], 16)
+        self.assertAlmostEqual(summary['sum'], 4 * 2.65)
+
+    def test_gauge_adds_tracked_sources(self):
+        gauge = MetricsRegistry().gauge('queue_depth', "Depth")
+        gauge.set(2)
+        depth = lambda: 3
+        gauge.track(depth)
+        self.assertEqual(gauge.value, 5)
+        gauge.untrack(depth)
+        self.assertEqual(gauge.value, 2)
+
+class PrometheusTextTest(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_help_and_type_lines(self):
+        self.registry.counter('readings_total', "Readings checked")
+        self.registry.gauge('queue_depth', "Alerts waiting")
+        self.assertEqual(self.registry.render_prometheus().splitlines(), [
+            "# HELP readings_total Readings checked",
+            "# TYPE readings_total counter",
+            "readings_total 0",
+            "# HELP queue_depth Alerts waiting",
+            "# TYPE queue_depth gauge",
+            "queue_depth 0",
+        ])
+
+    def test_histogram_lines(self):
+        histogram = self.registry.histogram('tick_seconds', "Tick time", (0.5, 1))
+        for value in (0.25, 0.75, 3):
+            histogram.observe(value)
+        self.assertEqual(self.registry.render_prometheus().splitlines()[2:], [
+            'tick_seconds_bucket{le="0.5"} 1',
+            'tick_seconds_bucket{le="1.0"} 2',
+            'tick_seconds_bucket{le="+Inf"} 3',
+            "tick_seconds_sum 4",
+            "tick_seconds_count 3",
+        ])
+
+    def test_labels_and_help_are_escaped(self):
+        counter = self.registry.counter('alerts_total', "Alerts\nraised by a \\ rule", label='rule')
+        counter.inc(label_value='say "hi"\\now\n')
+        counter.inc(2, label_value='plain')
+        self.assertEqual(self.registry.render_prometheus().splitlines(), [
+            "# HELP alerts_total Alerts\\nraised by a \\\\ rule",
+            "# TYPE alerts_total counter",
+            'alerts_total{rule="plain"} 2',
+            'alerts_total{rule="say \\"hi\\"\\\\now\\n"} 1',
+        ])
+
+    def test_duplicate_name_is_rejected(self):
+        self.registry.counter('readings_total', "Readings")
+        with self.assertRaises(ValueError):
+            self.registry.gauge('readings_total', "Readings")
+
+class ExportTest(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+        self.registry.counter('readings_total', "Readings").inc(3)
+        self.registry.counter('alerts_total', "Alerts", label='severity').inc(label_value='EMERGENCY')
+
+    def test_server_serves_text_and_json(self):
+        with MetricsServer(0, registry=self.registry) as server:
+            base = f"http://{server.address[0]}:{server.address[1]}"
+            with urllib.request.urlopen(f"{base}/metrics") as response:
+                self.assertTrue(response.headers['Content-Type'].startswith('text/plain'))
+                self.assertIn("readings_total 3", response.read().decode())
+            with urllib.request.urlopen(f"{base}/metrics.json") as response:
+                self.assertEqual(json.load(response), {'readings_total': 3, 'alerts_total': {'EMERGENCY': 1}})
+            with self.assertRaises(urllib.error.HTTPError) as raised:
+                urllib.request.urlopen(f"{base}/other")
+            self.assertEqual(raised.exception.code, 404)
+            raised.exception.close()
+
+    def test_snapshot_writer_writes_on_stop(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "metrics.json")
+            with SnapshotWriter(filename, interval=60, registry=self.registry):
+                self.registry.metrics()[0].inc()
+            with open(filename) as snapshot:
+                self.assertEqual(json.load(snapshot)['readings_total'], 4)
+            self.assertEqual(os.listdir(directory), ["metrics.json"])
+
+    def test_snapshot_writer_writes_periodically(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "metrics.json")
+            writer = SnapshotWriter(filename, interval=0.05, registry=self.registry).start()
+            try:
+                deadline = time.monotonic() + 5
+                while not os.path.exists(filename) and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                with open(filename) as snapshot:
+                    self.assertEqual(json.load(snapshot)['readings_total'], 3)
+            finally:
+                writer.stop()
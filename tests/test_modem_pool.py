@@ -0,0 +1,55 @@
+import time
+import unittest
+
+from fake_modem import FakeModem
+from gsm_modem import SMSEngine
+from modem_pool import ModemPool
+
+class ModemPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.modems = [FakeModem().start() for _ in range(2)]
+        for modem in self.modems:
+            self.addCleanup(modem.stop)
+        self.pool = ModemPool([modem.port_name for modem in self.modems], SMSEngine, max_failures=1,
+                              health_check_interval=0.2)
+        self.assertEqual(self.pool.open(), 2)
+        self.addCleanup(self.pool.close)
+
+    def sent(self) -> list:
+        return [len(modem.sent_messages) for modem in self.modems]
+
+    def test_sends_are_spread_over_the_modems(self):
+        for index in range(4):
+            self.assertTrue(self.pool.send_sms("+38344111222", f"alert {index}"))
+        self.assertEqual(self.sent(), [2, 2])
+
+    def test_failed_modem_is_taken_out_and_recovers(self):
+        first, second = self.modems
+        first.offline = True
+        self.pool.health_check_interval = 60  # keep the failed modem out while sending
+        # The first send goes to the offline modem and fails, the rest fail over
+        self.assertFalse(self.pool.send_sms("+38344111222", "lost"))
+        self.assertEqual(self.pool.healthy_count, 1)
+        for index in range(3):
+            self.assertTrue(self.pool.send_sms("+38344111222", f"alert {index}"))
+        self.assertEqual(self.sent(), [0, 3])
+
+    def test_health_check_puts_modem_back(self):
+        first, _ = self.modems
+        first.offline = True
+        self.assertFalse(self.pool.send_sms("+38344111222", "lost"))
+        self.assertFalse(self.pool.modems[0].healthy)
+        first.offline = False
+        deadline = time.monotonic() + 10
+        while not self.pool.modems[0].healthy and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertEqual(self.pool.healthy_count, 2)
+
+    def test_no_healthy_modem(self):
+        for modem in self.modems:
+            modem.offline = True
+        self.pool.health_check_interval = 60
+        self.assertFalse(self.pool.send_sms("+38344111222", "lost"))
+        self.assertFalse(self.pool.send_sms("+38344111222", "lost"))
+        self.assertEqual(self.pool.healthy_count, 0)
+        self.assertFalse(self.pool.send_sms("+38344111222", "lost"))
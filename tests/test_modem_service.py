@@ -0,0 +1,52 @@
+import queue
+import threading
+import unittest
+
+from fake_modem import FakeModem
+from gsm_modem import SMSEngine
+from modem_service import ModemService
+
+class ModemServiceTest(unittest.TestCase):
+    def setUp(self):
+        self.modem = FakeModem().start()
+        self.addCleanup(self.modem.stop)
+        self.service = ModemService(self.modem.port_name, SMSEngine)
+        self.assertTrue(self.service.open())
+        self.addCleanup(self.service.close)
+
+    def test_send_sms_publishes_reference(self):
+        references = []
+        self.service.subscribe('+CMGS:', references.append)
+        self.assertTrue(self.service.send_sms("+38344111222", "BP 190/120"))
+        self.assertEqual(self.modem.sent_messages, [("+38344111222", "BP 190/120")])
+        self.assertEqual(references, ["+CMGS: 1"])
+
+    def test_received_messages_are_delivered(self):
+        received = threading.Event()
+        messages = []
+        self.service.subscribe_messages(lambda message: (messages.append(message), received.set()))
+        self.modem.deliver_sms("+38344111222", "ACK 4")
+        self.assertTrue(received.wait(5))
+        self.assertEqual(messages[0].body, "ACK 4")
+
+    def test_call_after_close_returns_none(self):
+        self.service.close()
+        self.assertIsNone(self.service.call(lambda engine: True))
+
+    def test_call_racing_close_does_not_block(self):
+        service = self.service
+        closed = threading.Event()
+
+        class RacingQueue(queue.Queue):
+            # Let close() run between the running check and the enqueue, as a preempted caller would
+            def put(self, item, *args, **kwargs):
+                closer = threading.Thread(target=lambda: (service.close(), closed.set()))
+                closer.start()
+                closed.wait(0.5)
+                super().put(item, *args, **kwargs)
+
+        service._jobs = RacingQueue()
+        # Raises TimeoutError if the job was queued after close() drained the queue
+        service.call(lambda engine: True, timeout=5)
+        self.assertTrue(closed.wait(5))
+        self.assertIsNone(service.call(lambda engine: True))
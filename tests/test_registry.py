@@ -0,0 +1,63 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from registry import PatientRegistry
+
+DOCTORS = "id,name,surname,phone_number\n1,Driton,Alija,+38344922805\n"
+PATIENTS = "id,name,surname,date_of_birth,room_number,responsible_person_id\n{rows}"
+
+class PatientRegistryTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.writes = 0
+        self.patients_file = os.path.join(self.directory, "patients.csv")
+        self.doctors_file = os.path.join(self.directory, "responsible_persons.csv")
+        self.write(self.doctors_file, DOCTORS)
+        self.write_patients("1,Alice,Garcia,1975-05-15,101,1\n")
+        self.registry = PatientRegistry(self.patients_file, self.doctors_file, check_interval=0)
+
+    def write(self, filename: str, text: str):
+        with open(filename, 'w') as output:
+            output.write(text)
+        # Give every write its own modification time, whatever the file system's resolution
+        self.writes += 1
+        os.utime(filename, ns=(self.writes * 10**9, self.writes * 10**9))
+
+    def write_patients(self, rows: str):
+        self.write(self.patients_file, PATIENTS.format(rows=rows))
+
+    def test_reloads_changed_file(self):
+        self.assertEqual([patient.id for patient in self.registry.patients()], [1])
+        self.write_patients("1,Alice,Garcia,1975-05-15,101,1\n2,Bob,Smith,1980-01-02,102,1\n")
+        self.assertEqual([patient.id for patient in self.registry.patients()], [1, 2])
+        self.assertIs(self.registry.patient(2).responsible_person, self.registry.doctor(1))
+        self.assertEqual(self.registry.loads, 2)
+
+    def test_malformed_file_keeps_previous_data(self):
+        self.assertEqual(len(self.registry), 1)
+        self.write_patients("1,Alice,Garcia,1975-13-15,101,1\n")
+        self.assertEqual([patient.name for patient in self.registry.patients()], ["Alice"])
+        self.assertEqual(self.registry.loads, 1)
+        # Not read again until the file changes
+        self.registry.patients()
+        self.assertEqual(self.registry.loads, 1)
+
+        self.write_patients("1,Alice,Garcia,1975-12-15,101,1\n")
+        self.assertEqual(self.registry.patient(1).date_of_birth.month, 12)
+        self.assertEqual(self.registry.loads, 2)
+
+    def test_missing_file_keeps_previous_data(self):
+        self.assertEqual(len(self.registry), 1)
+        os.remove(self.patients_file)
+        self.assertEqual(len(self.registry), 1)
+        self.write_patients("3,Carol,Jones,1990-07-01,103,1\n")
+        self.assertEqual([patient.id for patient in self.registry.patients()], [3])
+
+    def test_missing_column(self):
+        self.assertEqual(len(self.registry), 1)
+        self.write(self.patients_file, "id,name\n1,Alice\n")
+        self.assertFalse(self.registry.reload())
+        self.assertEqual(len(self.registry), 1)
@@ -0,0 +1,64 @@
+import csv
+import os
+import shutil
+import tempfile
+import unittest
+
+from replay import replay_file, replay_files, write_alert_times
+
+HEADER = "patient_id,timestamp,systolic,diastolic,heart_rate,temperature,oxygen_saturation,respiratory_rate\n"
+WARD_A = ("1,2025-03-22 13:36:07,185,112,88,37.1,97,16\n"
+          "2,2025-03-22 13:36:07,121,79,72,36.8,98,14\n"
+          "1,2025-03-22 13:36:27,165,102,90,38.9,96,18\n")
+WARD_B = ("3,2025-03-22 14:00:00,190,120,80,36.9,97,15\n"
+          "3,2025-03-22 14:01:00,192,121,81,36.9,97,15\n"
+          "4,2025-03-22 14:01:00,120,80,130,36.7,98,14\n"
+          "3,2025-03-22 14:06:00,191,118,79,36.9,97,15\n")
+
+def summary(result) -> dict:
+    return {replayed.rule: (replayed.hits, replayed.alerts, replayed.times, replayed.patients)
+            for replayed in result.rules}
+
+class ReplayFilesTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.paths = [self.write("ward_a.csv", WARD_A), self.write("ward_b.csv", WARD_B)]
+
+    def write(self, name: str, rows: str) -> str:
+        filename = os.path.join(self.directory, name)
+        with open(filename, 'w') as output:
+            output.write(HEADER + rows)
+        return filename
+
+    def test_worker_processes_match_sequential_replay(self):
+        parallel = replay_files(self.paths, workers=2)
+        self.assertEqual([result.source for result in parallel], self.paths)
+        for path, result in zip(self.paths, parallel):
+            expected = replay_file(path)
+            self.assertEqual(result.readings, expected.readings)
+            self.assertEqual(summary(result), summary(expected))
+        self.assertEqual(summary(parallel[0]), summary(replay_files(self.paths, workers=1)[0]))
+
+    def test_cooldown_applies_within_each_file(self):
+        result = replay_files(self.paths, workers=2)[1]
+        emergency = summary(result)['hypertensive_emergency']
+        # The repeat one minute later is suppressed, the one six minutes later is sent
+        self.assertEqual((emergency[0], emergency[1], emergency[3]), (3, 2, [3, 3]))
+        self.assertEqual(emergency[2][1] - emergency[2][0], 360_000)
+        self.assertEqual(summary(result)['tachycardia'][:2], (1, 1))
+
+    def test_write_alert_times(self):
+        filename = os.path.join(self.directory, "alerts.csv")
+        self.assertEqual(write_alert_times(replay_files(self.paths, workers=2), filename), 6)
+        with open(filename, newline='') as alerts:
+            rows = list(csv.reader(alerts))
+        self.assertEqual(rows, [
+            ['source', 'timestamp', 'patient_id', 'rule', 'severity'],
+            [self.paths[0], '2025-03-22 13:36:07', '1', 'hypertensive_emergency', 'EMERGENCY'],
+            [self.paths[0], '2025-03-22 13:36:27', '1', 'moderate_hypertension', 'MODERATE'],
+            [self.paths[0], '2025-03-22 13:36:27', '1', 'fever', 'MODERATE'],
+            [self.paths[1], '2025-03-22 14:00:00', '3', 'hypertensive_emergency', 'EMERGENCY'],
+            [self.paths[1], '2025-03-22 14:01:00', '4', 'tachycardia', 'MODERATE'],
+            [self.paths[1], '2025-03-22 14:06:00', '3', 'hypertensive_emergency', 'EMERGENCY'],
+        ])
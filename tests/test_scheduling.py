@@ -0,0 +1,132 @@
+import asyncio
+import contextlib
+import io
+import unittest
+
+from async_monitor import monitor_blood_pressure_async
+from patient_monitoring import patients
+from scheduling import TickScheduler
+
+class FakeClock:
+    """Monotonic clock that only moves when a test advances it or sleeps on it."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+    async def sleep(self, seconds: float):
+        self.sleeps.append(seconds)
+        self.now += seconds
+        await asyncio.sleep(0)
+
+class TickSchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def run_tick(self, scheduler: TickScheduler, duration: float) -> int:
+        self.clock.advance(scheduler.delay())
+        scheduler.start_tick()
+        self.clock.advance(duration)
+        return scheduler.finish_tick()
+
+    def test_ticks_do_not_drift(self):
+        scheduler = TickScheduler(10, clock=self.clock)
+        for _ in range(5):
+            self.assertEqual(self.run_tick(scheduler, 3), 0)
+        # Tick k starts at k * interval however long the ticks take
+        self.assertEqual((self.clock.now, scheduler.next_tick), (43, 50))
+        self.assertEqual((scheduler.stats.ticks, scheduler.stats.overruns, scheduler.stats.max_jitter), (5, 0, 0))
+        self.assertEqual(scheduler.stats.max_duration, 3)
+
+    def test_coalesce_runs_one_late_tick(self):
+        scheduler = TickScheduler(10, coalesce=True, clock=self.clock)
+        # Due at 10 and 20, the tick finishes at 25: one of the two is dropped
+        self.assertEqual(self.run_tick(scheduler, 25), 1)
+        self.assertEqual(scheduler.next_tick, 20)
+        self.assertEqual(scheduler.delay(), 0)
+        self.assertEqual(self.run_tick(scheduler, 1), 0)
+        self.assertEqual(scheduler.stats.max_jitter, 5)
+        self.assertEqual(scheduler.next_tick, 30)
+
+    def test_skip_waits_for_the_next_slot(self):
+        scheduler = TickScheduler(10, coalesce=False, clock=self.clock)
+        self.assertEqual(self.run_tick(scheduler, 25), 2)
+        self.assertEqual(scheduler.next_tick, 30)
+        self.assertEqual(scheduler.delay(), 5)
+        self.assertEqual(self.run_tick(scheduler, 1), 0)
+        self.assertEqual(scheduler.stats.max_jitter, 0)
+
+    def test_overruns_and_skips_are_counted(self):
+        for coalesce, skipped in ((True, 1), (False, 3)):
+            self.clock = FakeClock()
+            scheduler = TickScheduler(10, coalesce=coalesce, clock=self.clock)
+            for duration in (15, 1, 25, 1):
+                self.run_tick(scheduler, duration)
+            self.assertEqual((scheduler.stats.overruns, scheduler.stats.skipped), (2, skipped))
+
+    def test_jitter_statistics(self):
+        scheduler = TickScheduler(10, clock=self.clock)
+        for late in (0, 2, 4):
+            self.clock.advance(scheduler.delay() + late)
+            scheduler.start_tick()
+            scheduler.finish_tick()
+        self.assertEqual(scheduler.stats.ticks, 3)
+        self.assertEqual(scheduler.stats.max_jitter, 4)
+        self.assertEqual(scheduler.stats.average_jitter, 2)
+
+class AsyncMonitorTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.calls = []
+
+    def monitor(self, read_reading, **options):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            stats = asyncio.run(monitor_blood_pressure_async(
+                duration_minutes=1, interval_seconds=20, read_reading=read_reading, clock=self.clock,
+                sleep=self.clock.sleep, **options))
+        return stats, output.getvalue()
+
+    def test_every_patient_is_read_each_tick(self):
+        async def read(patient):
+            self.calls.append((self.clock.now, patient.id))
+            return {'systolic': 190 if patient.id == 3 else 120, 'diastolic': 120 if patient.id == 3 else 80}
+
+        stats, output = self.monitor(read)
+        self.assertEqual(stats.ticks, 3)
+        self.assertEqual(sorted({when for when, _ in self.calls}), [0, 20, 40])
+        self.assertEqual(len(self.calls), 3 * len(patients))
+        self.assertEqual(stats.overruns, 0)
+        self.assertIn("(ID: 3)", output)
+        self.assertIn("1 alerts", output)
+
+    def test_slow_tick_is_coalesced(self):
+        async def read(patient):
+            self.calls.append(self.clock.now)
+            if self.clock.now == 0 and patient.id == patients[-1].id:
+                self.clock.advance(45)  # the first tick overruns two slots
+            return {'systolic': 120, 'diastolic': 80}
+
+        stats, _ = self.monitor(read)
+        # Due at 0, 20, 40: the tick at 20 is dropped and the one at 40 starts late
+        self.assertEqual(sorted(set(self.calls)), [0, 45])
+        self.assertEqual((stats.ticks, stats.overruns, stats.skipped), (2, 1, 1))
+        self.assertEqual(stats.max_jitter, 5)
+
+    def test_slow_tick_is_skipped(self):
+        async def read(patient):
+            self.calls.append(self.clock.now)
+            if self.clock.now == 0 and patient.id == patients[-1].id:
+                self.clock.advance(25)
+            return {'systolic': 120, 'diastolic': 80}
+
+        stats, _ = self.monitor(read, coalesce=False)
+        self.assertEqual(sorted(set(self.calls)), [0, 40])
+        self.assertEqual((stats.ticks, stats.overruns, stats.skipped), (2, 1, 1))
+        self.assertEqual(self.clock.sleeps[-1], 15)
@@ -0,0 +1,36 @@
+import datetime
+import unittest
+
+from patient_monitoring import Patient, ResponsiblePerson
+from sharded_monitor import ShardedMonitor, shard_patients
+
+DOCTOR = ResponsiblePerson(1, "Driton", "Alija", "+38344922805")
+
+def _patients(ids, room=lambda patient_id: 100 * (1 + patient_id % 4)) -> list:
+    return [Patient(patient_id, "Patient", str(patient_id), datetime.date(1970, 1, 1), room(patient_id), DOCTOR)
+            for patient_id in ids]
+
+class ShardPatientsTest(unittest.TestCase):
+    def test_floors_stay_together(self):
+        shards = shard_patients(_patients(range(1, 41)), 2)
+        self.assertEqual(sorted(len(shard) for shard in shards), [20, 20])
+        for shard in shards:
+            self.assertEqual(len({patient.room_number for patient in shard}), 2)
+
+class ShardedMonitorTest(unittest.TestCase):
+    def test_set_patients_reshards_running_workers(self):
+        with ShardedMonitor(_patients(range(1, 41)), workers=2, seed=1) as monitor:
+            self.assertEqual(monitor.tick()[0], 40)
+
+            self.assertFalse(monitor.set_patients(_patients(range(1, 41))))
+            self.assertTrue(monitor.set_patients(_patients(range(1, 61))))
+            self.assertEqual(monitor.tick()[0], 60)
+            self.assertTrue(monitor.set_patients(_patients(range(1, 11))))
+            self.assertEqual(monitor.tick()[0], 10)
+            self.assertEqual(sorted(monitor.patients_by_id), list(range(1, 11)))
+
+    def test_moving_a_patient_to_another_floor_reshards(self):
+        monitor = ShardedMonitor(_patients(range(1, 9)), workers=2)
+        moved = _patients(range(1, 9), room=lambda patient_id: 100 if patient_id == 1 else 100 * (1 + patient_id % 4))
+        self.assertTrue(monitor.set_patients(moved))
+        self.assertFalse(monitor.set_patients(moved))
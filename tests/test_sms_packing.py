@@ -0,0 +1,77 @@
+import unittest
+
+from alerts import (SMS_PART_SEPTETS, SMS_SINGLE_SEPTETS, Alert, AlertCoalescer, Severity, gsm7_length, pack_alerts,
+                    pack_sms)
+
+DOCTOR = "+38344111222"
+
+class PackSMSTest(unittest.TestCase):
+    def test_extended_characters_take_two_septets(self):
+        self.assertEqual(gsm7_length("BP 190/120"), 10)
+        self.assertEqual(gsm7_length("[ok] ~ {x} €"), 18)
+
+    def test_single_message_boundary(self):
+        full = "x" * SMS_SINGLE_SEPTETS
+        self.assertEqual(pack_sms([full]), [full])
+        parts = pack_sms(["x" * (SMS_SINGLE_SEPTETS + 1)])
+        self.assertEqual(len(parts), 2)
+        self.assertTrue(parts[0].startswith("(1/2) ") and parts[1].startswith("(2/2) "))
+
+    def test_extended_characters_count_towards_the_boundary(self):
+        self.assertEqual(len(pack_sms(["€" * (SMS_SINGLE_SEPTETS // 2)])), 1)
+        self.assertEqual(len(pack_sms(["€" * (SMS_SINGLE_SEPTETS // 2) + "x"])), 2)
+        # An extended character is never split from its escape
+        for part in pack_sms(["x" + "€" * 100]):
+            self.assertLessEqual(gsm7_length(part), SMS_PART_SEPTETS)
+
+    def test_parts_fit_with_their_prefix(self):
+        lines = [f"Patient {i}: BP 190/120 mmHg, hypertensive emergency" for i in range(12)]
+        parts = pack_sms(lines)
+        self.assertGreater(len(parts), 1)
+        for i, part in enumerate(parts, 1):
+            self.assertTrue(part.startswith(f"({i}/{len(parts)}) "))
+            self.assertLessEqual(gsm7_length(part), SMS_PART_SEPTETS)
+        # Lines are kept whole and in order
+        bodies = [part.split(") ", 1)[1] for part in parts]
+        self.assertEqual("\n".join(bodies).split("\n"), lines)
+
+    def test_prefix_grows_beyond_99_parts(self):
+        parts = pack_sms(["x" * 150] * 120)
+        self.assertGreater(len(parts), 99)
+        self.assertTrue(parts[0].startswith(f"(1/{len(parts)}) "))
+        self.assertTrue(parts[-1].startswith(f"({len(parts)}/{len(parts)}) "))
+        for part in parts:
+            self.assertLessEqual(gsm7_length(part), SMS_PART_SEPTETS)
+
+class PackAlertsTest(unittest.TestCase):
+    def test_single_alert_keeps_its_message(self):
+        [message] = pack_alerts(DOCTOR, [Alert(DOCTOR, "full message", Severity.MODERATE, 4, summary="short")])
+        self.assertEqual((message.message, message.patient_id, message.batch), ("full message", 4, ()))
+
+    def test_batch_lists_summaries_most_severe_first(self):
+        alerts = [Alert(DOCTOR, "moderate", Severity.MODERATE, 4, summary="P4 moderate"),
+                  Alert(DOCTOR, "emergency", Severity.EMERGENCY, 7, summary="P7 emergency")]
+        [message] = pack_alerts(DOCTOR, alerts)
+        self.assertEqual(message.message, "P7 emergency\nP4 moderate")
+        self.assertEqual(message.severity, Severity.EMERGENCY)
+        self.assertIsNone(message.patient_id)
+        self.assertEqual([alert.patient_id for alert in message.batch], [7, 4])
+
+    def test_long_batch_records_the_alerts_of_each_part(self):
+        alerts = [Alert(DOCTOR, "", Severity.MODERATE, i, summary=f"Patient {i}: " + "x" * 60) for i in range(6)]
+        messages = pack_alerts(DOCTOR, alerts)
+        self.assertGreater(len(messages), 1)
+        listed = [alert.patient_id for message in messages for alert in message.batch]
+        self.assertEqual(sorted(set(listed)), list(range(6)))
+
+    def test_coalescer_batches_per_doctor(self):
+        coalescer = AlertCoalescer()
+        other = "+38344555666"
+        for patient_id, phone_number in ((1, DOCTOR), (2, other), (3, DOCTOR)):
+            coalescer.offer(Alert(phone_number, f"alert {patient_id}", Severity.MODERATE, patient_id,
+                                  summary=f"P{patient_id}"))
+        messages = {message.phone_number: message for message in coalescer.flush()}
+        self.assertEqual(set(messages), {DOCTOR, other})
+        self.assertEqual(messages[DOCTOR].message, "P1\nP3")
+        self.assertEqual(messages[other].message, "alert 2")
+        self.assertEqual(coalescer.flush(), [])
@@ -0,0 +1,57 @@
+import random
+import unittest
+
+import numpy as np
+
+from trends import RollingStats, TrendTracker
+
+class RollingStatsTest(unittest.TestCase):
+    def test_matches_least_squares_fit(self):
+        rng = random.Random(1)
+        stats = RollingStats(window=30)
+        times = [20.0 * i for i in range(50)]
+        values = [120 + 0.01 * t + rng.gauss(0, 5) for t in times]
+        for t, y in zip(times, values):
+            stats.update(t, y)
+        t, y = np.array(times[-30:]), np.array(values[-30:])
+        (slope, _), residuals = np.polyfit(t, y, 1, full=True)[:2]
+        stderr = np.sqrt(residuals[0] / (len(t) - 2) / ((t - t.mean()) ** 2).sum())
+        self.assertAlmostEqual(stats.slope, slope, places=9)
+        self.assertAlmostEqual(stats.slope_stderr, stderr, places=9)
+        self.assertAlmostEqual(stats.std, y.std(ddof=1), places=9)
+
+    def test_slope_needs_three_samples(self):
+        stats = RollingStats(window=12)
+        stats.update(0.0, 120)
+        stats.update(20.0, 130)
+        self.assertEqual(stats.significant_slope(), 0.0)
+        self.assertEqual(stats.significant_slope(0), stats.slope)
+
+class TrendTrackerTest(unittest.TestCase):
+    def feed(self, tracker: TrendTracker, minutes: float, rise_per_hour: float, seed: int = 0) -> dict:
+        rng = random.Random(seed)
+        derived = {}
+        for tick in range(int(minutes * 3)):
+            seconds = 20.0 * tick
+            systolic = 125 + rise_per_hour * seconds / 3600 + rng.gauss(0, 8)
+            derived = tracker.update(1, {'systolic': systolic, 'diastolic': 80}, seconds)
+        return derived
+
+    def rising_alerts(self, significance: float) -> int:
+        # Short windows of flat, noisy readings that would match the rising_systolic slope condition
+        return sum(self.feed(TrendTracker(window=12, significance=significance), 10, 0, seed)['systolic_slope'] >= 20
+                   for seed in range(100))
+
+    def test_noise_over_a_short_window_is_not_a_trend(self):
+        # Minutes of noisy readings give slopes of hundreds of mmHg/h either way
+        self.assertGreater(self.rising_alerts(significance=0), 30)
+        self.assertLess(self.rising_alerts(significance=3), 3)
+
+    def test_steady_rise_is_reported(self):
+        derived = self.feed(TrendTracker(), 60, 40)
+        self.assertGreater(derived['systolic_slope'], 20)
+        self.assertEqual(derived['diastolic_slope'], 0.0)
+
+    def test_significance_can_be_disabled(self):
+        derived = self.feed(TrendTracker(window=12, significance=0), 10, 0)
+        self.assertNotEqual(derived['systolic_slope'], 0.0)
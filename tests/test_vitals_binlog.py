@@ -0,0 +1,111 @@
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from replay import replay_file
+from vitals_binlog import (BinaryVitalsLog, BinaryVitalsReader, Segment, binlog_to_csv, csv_to_binlog,
+                          read_csv_chunks)
+
+HEADER = "patient_id,timestamp,systolic,diastolic,heart_rate,temperature,oxygen_saturation,respiratory_rate\n"
+ROWS = ("1,2025-03-22 13:36:07,185,112,88,37.1,97,16\n"
+        "2,2025-03-22 13:36:07,121,79,72,36.8,98,14\n"
+        "1,2025-03-22 13:36:27,165,102,90,38.9,96,18\n")
+
+class CSVChunksTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def write(self, text: str, name: str = "vital_signs.csv", newline: str = None) -> str:
+        filename = os.path.join(self.directory, name)
+        with open(filename, 'w', newline=newline) as output:
+            output.write(text)
+        return filename
+
+    def read(self, filename: str, chunk_rows: int = 100_000) -> dict:
+        chunks = list(read_csv_chunks(filename, chunk_rows))
+        return {name: [value for chunk in chunks for value in chunk[name].tolist()] for name in chunks[0]}
+
+    def test_reads_columns(self):
+        columns = self.read(self.write(HEADER + ROWS))
+        self.assertEqual(columns['patient_id'], [1, 2, 1])
+        self.assertEqual(columns['systolic'], [185, 121, 165])
+        self.assertEqual(columns['temperature'], [37.1, 36.8, 38.9])
+        self.assertEqual(columns['timestamp'][2] - columns['timestamp'][0], 20_000)
+
+    def test_skips_blank_lines(self):
+        expected = self.read(self.write(HEADER + ROWS))
+        for text in (HEADER + ROWS + "\n", HEADER + ROWS + "\n  \n", HEADER + ROWS.replace("\n", "\n\n", 1)):
+            self.assertEqual(self.read(self.write(text)), expected)
+            self.assertEqual(self.read(self.write(text), chunk_rows=1), expected)
+
+    def test_reads_crlf_line_endings(self):
+        expected = self.read(self.write(HEADER + ROWS))
+        self.assertEqual(self.read(self.write(HEADER + ROWS + "\n", newline='\r\n')), expected)
+
+    def test_rejects_short_rows(self):
+        with self.assertRaises(ValueError):
+            self.read(self.write(HEADER + "1,2025-03-22 13:36:07,185\n"))
+
+    def test_binlog_round_trip_writes_crlf(self):
+        source = self.write(HEADER + ROWS + "\n")
+        log_dir = os.path.join(self.directory, "log")
+        self.assertEqual(csv_to_binlog(source, log_dir), 3)
+        copy = os.path.join(self.directory, "copy.csv")
+        self.assertEqual(binlog_to_csv(log_dir, copy), 3)
+        # The same line endings as save_vital_signs_to_csv
+        with open(copy, 'rb') as converted:
+            self.assertEqual(converted.read(), (HEADER + ROWS).replace("\n", "\r\n").encode())
+
+    def test_replay_file_with_trailing_blank_line(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = replay_file(self.write(HEADER + ROWS + "\n"))
+        self.assertEqual(result.readings, 3)
+        alerts = {replayed.rule: replayed.alerts for replayed in result.rules if replayed.alerts}
+        self.assertEqual(alerts, {'hypertensive_emergency': 1, 'moderate_hypertension': 1, 'fever': 1})
+
+class SegmentTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        with BinaryVitalsLog(self.directory, segment_records=2) as log:
+            log.extend({'patient_id': [1, 2, 1, 2, 1], 'timestamp': [1000, 1000, 2000, 2000, 3000],
+                        'systolic': [120, 130, 140, 150, 160], 'diastolic': [80] * 5, 'heart_rate': [70] * 5,
+                        'temperature': [36.6] * 5, 'oxygen_saturation': [98] * 5, 'respiratory_rate': [14] * 5})
+        self.reader = BinaryVitalsReader(self.directory)
+
+    def test_close_unmaps_the_segment(self):
+        with Segment(self.reader.segment_paths()[0]) as segment:
+            mapping = segment._map
+            self.assertEqual(segment.records['systolic'].tolist(), [120, 130])
+        self.assertTrue(mapping.closed)
+        self.assertIsNone(segment.records)
+        segment.close()
+
+    def test_close_keeps_views_readable(self):
+        segment = Segment(self.reader.segment_paths()[0])
+        records = segment.records
+        segment.close()
+        self.assertEqual(records['systolic'].tolist(), [120, 130])
+
+    def test_scan_closes_each_segment(self):
+        opened = []
+        original_init = Segment.__init__
+
+        def tracking_init(segment, path):
+            original_init(segment, path)
+            opened.append(segment._map)
+
+        with mock.patch.object(Segment, '__init__', tracking_init):
+            systolic = [records['systolic'].tolist() for _, records in self.reader.scan(patient_id=1)]
+            self.assertEqual(systolic, [[120], [140], [160]])
+            self.assertTrue(all(mapping.closed for mapping in opened))
+            for _, records in self.reader.scan():
+                self.assertFalse(opened[-1].closed)
+                records = None  # a view still held keeps its segment mapped
+            self.assertEqual(len(opened), 6)
+            self.assertTrue(all(mapping.closed for mapping in opened))
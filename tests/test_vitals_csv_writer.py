@@ -0,0 +1,88 @@
+import contextlib
+import datetime
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from patient_monitoring import VitalSigns, VitalSignsCSVWriter, save_vital_signs_to_csv
+
+def readings(count: int, start: int = 0) -> list:
+    timestamp = datetime.datetime(2025, 3, 22, 13, 36, 7, 250_000)
+    return [VitalSigns(i % 7 + 1, timestamp + datetime.timedelta(seconds=20 * i), 110 + i % 80, 70 + i % 40,
+                       60 + i % 40, round(36.0 + (i % 12) / 10, 1), 95 + i % 6, 12 + i % 9)
+            for i in range(start, start + count)]
+
+class ManualClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+class VitalSignsCSVWriterTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.filename = os.path.join(self.directory, "vital_signs.csv")
+
+    def contents(self, filename=None) -> bytes:
+        with open(filename or self.filename, 'rb') as csvfile:
+            return csvfile.read()
+
+    def test_output_matches_save_vital_signs_to_csv(self):
+        expected = os.path.join(self.directory, "expected.csv")
+        with contextlib.redirect_stdout(io.StringIO()):
+            save_vital_signs_to_csv(readings(25), expected)
+            save_vital_signs_to_csv(readings(10, 25), expected)
+        with VitalSignsCSVWriter(self.filename) as writer:
+            writer.write(readings(1)[0])
+            writer.write_many(readings(24, 1))
+        # Reopening appends without a second header
+        with VitalSignsCSVWriter(self.filename) as writer:
+            writer.write_many(readings(10, 25))
+        self.assertEqual(self.contents(), self.contents(expected))
+        self.assertEqual(writer.rows_written, 10)
+
+    def test_buffer_is_flushed_at_flush_rows(self):
+        clock = ManualClock()
+        with VitalSignsCSVWriter(self.filename, flush_rows=10, flush_interval=60, clock=clock) as writer:
+            header = len(self.contents())
+            writer.write_many(readings(9))
+            self.assertEqual((writer.rows_written, len(self.contents())), (0, header))
+            writer.write(readings(1, 9)[0])
+            self.assertEqual(writer.rows_written, 10)
+            self.assertEqual(self.contents().count(b"\r\n"), 11)
+            writer.write_many(readings(25, 10))
+            self.assertEqual(writer.rows_written, 35)
+        self.assertEqual(self.contents().count(b"\r\n"), 36)
+
+    def test_buffer_is_flushed_after_flush_interval(self):
+        clock = ManualClock()
+        with VitalSignsCSVWriter(self.filename, flush_rows=1000, flush_interval=5, clock=clock) as writer:
+            writer.write_many(readings(3))
+            clock.now = 4.9
+            writer.write(readings(1, 3)[0])
+            self.assertEqual(writer.rows_written, 0)
+            clock.now = 5.0
+            writer.write(readings(1, 4)[0])
+            self.assertEqual(writer.rows_written, 5)
+            self.assertEqual(self.contents().count(b"\r\n"), 6)
+            # The interval restarts at each flush
+            clock.now = 9.0
+            writer.write(readings(1, 5)[0])
+            self.assertEqual(writer.rows_written, 5)
+
+    def test_flush_without_open_file_does_nothing(self):
+        writer = VitalSignsCSVWriter(self.filename)
+        writer.flush()
+        writer.write(readings(1)[0])
+        writer.flush()
+        self.assertFalse(os.path.exists(self.filename))
+        writer.open()
+        writer.close()
+        writer.flush()
+        writer.close()
+        self.assertEqual(writer.rows_written, 1)
+        self.assertEqual(self.contents().count(b"\r\n"), 2)
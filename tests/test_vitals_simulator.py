@@ -0,0 +1,64 @@
+import unittest
+
+import numpy as np
+
+from patient_monitoring import BLOOD_PRESSURE_CATEGORIES, VITAL_SIGN_RANGES
+from vitals_simulator import (BATCH_COLUMNS, simulate_blood_pressure_batch, simulate_vital_signs_batch,
+                              simulate_ward_batch)
+
+def category_of(systolic: np.ndarray) -> np.ndarray:
+    # The systolic ranges of the categories do not overlap
+    category = np.full(len(systolic), -1)
+    for index, (_, _, (low, high), _) in enumerate(BLOOD_PRESSURE_CATEGORIES):
+        category[(systolic >= low) & (systolic <= high)] = index
+    return category
+
+class SimulateVitalSignsTest(unittest.TestCase):
+    def test_values_are_in_the_normal_ranges(self):
+        batch = simulate_vital_signs_batch(np.arange(20_000), rng=1)
+        self.assertEqual(batch.patient_id.tolist(), list(range(20_000)))
+        for name, (low, high) in VITAL_SIGN_RANGES.items():
+            values = getattr(batch, name)
+            self.assertEqual(len(values), 20_000)
+            self.assertGreaterEqual(values.min(), low, name)
+            self.assertLessEqual(values.max(), high, name)
+        self.assertTrue((batch.systolic > batch.diastolic).all())
+        # Every value of the integer ranges turns up in a large cohort
+        self.assertEqual(sorted(set(batch.oxygen_saturation.tolist())), list(range(95, 101)))
+
+    def test_same_seed_gives_same_batch(self):
+        first, second = (simulate_vital_signs_batch([3, 1, 2], rng=42) for _ in range(2))
+        for name in BATCH_COLUMNS:
+            self.assertEqual(getattr(first, name).tolist(), getattr(second, name).tolist(), name)
+        other = simulate_vital_signs_batch([3, 1, 2], rng=43)
+        self.assertNotEqual([getattr(first, name).tolist() for name in BATCH_COLUMNS],
+                            [getattr(other, name).tolist() for name in BATCH_COLUMNS])
+
+class SimulateBloodPressureTest(unittest.TestCase):
+    def test_readings_fall_in_their_category(self):
+        systolic, diastolic = simulate_blood_pressure_batch(50_000, rng=2)
+        category = category_of(systolic)
+        self.assertTrue((category >= 0).all())
+        for index, (name, _, _, (low, high)) in enumerate(BLOOD_PRESSURE_CATEGORIES):
+            in_category = diastolic[category == index]
+            self.assertGreaterEqual(in_category.min(), low, name)
+            self.assertLessEqual(in_category.max(), high, name)
+        self.assertTrue((systolic > diastolic).all())
+
+    def test_categories_follow_their_weights(self):
+        systolic, _ = simulate_blood_pressure_batch(100_000, rng=3)
+        shares = np.bincount(category_of(systolic), minlength=len(BLOOD_PRESSURE_CATEGORIES)) / 100_000
+        total = sum(category[1] for category in BLOOD_PRESSURE_CATEGORIES)
+        for (name, weight, _, _), share in zip(BLOOD_PRESSURE_CATEGORIES, shares):
+            self.assertAlmostEqual(share, weight / total, delta=0.01, msg=name)
+
+    def test_ward_batch_combines_both(self):
+        batch = simulate_ward_batch(np.arange(5_000), rng=4)
+        self.assertTrue((category_of(batch.systolic) >= 0).all())
+        self.assertTrue((batch.systolic > batch.diastolic).all())
+        for name in ('heart_rate', 'temperature', 'oxygen_saturation', 'respiratory_rate'):
+            low, high = VITAL_SIGN_RANGES[name]
+            values = getattr(batch, name)
+            self.assertTrue(((values >= low) & (values <= high)).all(), name)
+        self.assertEqual(simulate_ward_batch([1, 2], rng=4).systolic.tolist(),
+                         simulate_ward_batch([1, 2], rng=4).systolic.tolist())
@@ -0,0 +1,89 @@
+import unittest
+
+import numpy as np
+
+from vitals_store import INDEX_BYTES, ROW_BYTES, VitalsStore
+
+def rows(patient_ids, timestamps, systolic=None) -> dict:
+    count = len(patient_ids)
+    return {
+        'patient_id': patient_ids,
+        'timestamp': timestamps,
+        'systolic': systolic if systolic is not None else [120] * count,
+        'diastolic': [80] * count,
+        'heart_rate': [70] * count,
+        'temperature': [36.6] * count,
+        'oxygen_saturation': [98] * count,
+        'respiratory_rate': [14] * count,
+    }
+
+class VitalsStoreTest(unittest.TestCase):
+    def test_wrap_around_keeps_newest_readings_in_order(self):
+        store = VitalsStore(capacity=5)
+        for tick in range(4):
+            store.extend(rows([1, 2], [tick * 1000] * 2, systolic=[100 + tick, 200 + tick]))
+        self.assertEqual((len(store), store.evicted), (5, 3))
+        self.assertEqual(store.window(1)['systolic'].tolist(), [102, 103])
+        self.assertEqual(store.window(2)['systolic'].tolist(), [201, 202, 203])
+        self.assertEqual(store.window(2)['timestamp'].tolist(), [1000, 2000, 3000])
+        self.assertEqual(store.window(3)['systolic'].tolist(), [])
+
+    def test_batch_larger_than_store(self):
+        store = VitalsStore(capacity=3)
+        store.extend(rows([1], [0]))
+        store.extend(rows([1, 2, 1, 2, 1], [1, 2, 3, 4, 5], systolic=[1, 2, 3, 4, 5]))
+        self.assertEqual((len(store), store.evicted), (3, 3))
+        self.assertEqual(store.window(1)['systolic'].tolist(), [3, 5])
+        self.assertEqual(store.window(2)['systolic'].tolist(), [4])
+
+    def test_memory_budget_sets_capacity(self):
+        store = VitalsStore(max_bytes=10 * (ROW_BYTES + INDEX_BYTES))
+        self.assertEqual(store.capacity, 10)
+        self.assertLessEqual(store.memory_bytes, 10 * (ROW_BYTES + INDEX_BYTES))
+        store.extend(rows(list(range(25)), list(range(25))))
+        self.assertEqual((len(store), store.evicted), (10, 15))
+        self.assertEqual(store.window(14)['timestamp'].tolist(), [])
+        self.assertEqual(store.window(15)['timestamp'].tolist(), [15])
+
+    def test_window_boundaries(self):
+        store = VitalsStore(capacity=10)
+        store.extend(rows([4] * 5, [0, 59_999, 60_000, 120_000, 120_001]))
+        window = store.window(4, minutes=1, now_ms=120_000)
+        # Both ends are inclusive; readings after now_ms are outside the window
+        self.assertEqual(window['timestamp'].tolist(), [60_000, 120_000])
+        self.assertEqual(len(store.window(4)['timestamp']), 5)
+        self.assertEqual(store.window(4, minutes=0, now_ms=0)['timestamp'].tolist(), [0])
+
+    def test_evict_older_than(self):
+        store = VitalsStore(capacity=4)
+        store.extend(rows([1, 2, 1, 2], [1000, 2000, 3000, 4000]))
+        self.assertEqual(store.evict_older_than(3000), 2)
+        self.assertEqual(store.window(1)['timestamp'].tolist(), [3000])
+        # Space freed by eviction is reused without overwriting live readings
+        store.extend(rows([1, 1], [5000, 6000]))
+        self.assertEqual((len(store), store.evicted), (4, 2))
+        self.assertEqual(store.window(1)['timestamp'].tolist(), [3000, 5000, 6000])
+        self.assertEqual(store.evict_older_than(10_000), 4)
+        self.assertEqual(len(store.window(1)['timestamp']), 0)
+
+    def test_evict_stops_at_first_recent_reading(self):
+        store = VitalsStore(capacity=4)
+        store.extend(rows([1, 1, 1], [1000, 5000, 2000]))
+        self.assertEqual(store.evict_older_than(3000), 1)
+        self.assertEqual(store.window(1)['timestamp'].tolist(), [5000, 2000])
+
+    def test_window_matches_full_scan(self):
+        rng = np.random.default_rng(7)
+        store = VitalsStore(capacity=500)
+        patient_ids, timestamps = [], []
+        for tick in range(30):
+            ids = rng.integers(0, 20, size=int(rng.integers(1, 60))).tolist()
+            patient_ids += ids
+            timestamps += [tick * 1000] * len(ids)
+            store.extend(rows(ids, [tick * 1000] * len(ids)))
+        patient_ids, timestamps = np.array(patient_ids[-500:]), np.array(timestamps[-500:])
+        for patient_id in range(20):
+            expected = timestamps[(patient_ids == patient_id) & (timestamps >= 20_000)]
+            window = store.window(patient_id, minutes=10 / 60, now_ms=30_000)
+            self.assertEqual(window['timestamp'].tolist(), expected.tolist())
+            self.assertTrue((window['patient_id'] == patient_id).all())
@@ -0,0 +1,190 @@
+import math
+import time
+from array import array
+from typing import Dict, Optional, Tuple
+
+from alert_rules import TREND_STATISTICS
+
+# Vital sign fields tracked by default
+DEFAULT_TREND_FIELDS = ('systolic', 'diastolic')
+
+# Readings per window by default: 30 minutes at the monitor's 20 second interval.
+# Over a few minutes the slope of noisy readings is hundreds of mmHg/h either way
+DEFAULT_TREND_WINDOW = 90
+
+# Standard errors a slope must exceed before it is reported as a trend
+DEFAULT_SLOPE_SIGNIFICANCE = 3.0
+
+class RollingStats:
+    """
+    EWMA, mean, variance and least-squares slope of one series.
+
+    The mean, variance and slope cover the last `window` samples. Each
+    update adds the new sample and removes the one leaving the window with
+    Welford-style updates, so it costs O(1) whatever the window size, and
+    memory is two fixed arrays of `window` floats.
+
+    Args:
+        window (int): Number of samples in the sliding window
+        alpha (float): EWMA weight of the newest sample
+    """
+    __slots__ = ('window', 'alpha', 'ewma', 'count', 'mean_t', 'mean_y', 'm2_t', 'm2_y', 'c_ty',
+                 '_origin', '_times', '_values', '_next')
+
+    def __init__(self, window: int = DEFAULT_TREND_WINDOW, alpha: float = 0.3):
+        self.window = window
+        self.alpha = alpha
+        self.ewma = None
+        self.count = 0
+        self.mean_t = self.mean_y = 0.0
+        self.m2_t = self.m2_y = self.c_ty = 0.0  # sums of squared deviations and co-deviation
+        self._origin = None
+        # Unboxed doubles: a long window costs 16 bytes per reading
+        self._times = array('d', [0.0]) * window
+        self._values = array('d', [0.0]) * window
+        self._next = 0
+
+    def update(self, t: float, y: float):
+        """Add the sample y taken at t seconds."""
+        if self._origin is None:
+            self._origin = t
+        # Times relative to the first sample keep the sums small
+        t -= self._origin
+        self.ewma = y if self.ewma is None else self.alpha * y + (1 - self.alpha) * self.ewma
+        if self.count == self.window:
+            self._remove(self._times[self._next], self._values[self._next])
+        self._times[self._next], self._values[self._next] = t, y
+        self._next = (self._next + 1) % self.window
+        self._add(t, y)
+
+    def _add(self, t: float, y: float):
+        self.count += 1
+        dt = t - self.mean_t
+        dy = y - self.mean_y
+        self.mean_t += dt / self.count
+        self.mean_y += dy / self.count
+        self.m2_t += dt * (t - self.mean_t)
+        self.m2_y += dy * (y - self.mean_y)
+        self.c_ty += dt * (y - self.mean_y)
+
+    def _remove(self, t: float, y: float):
+        self.count -= 1
+        if self.count == 0:
+            self.mean_t = self.mean_y = self.m2_t = self.m2_y = self.c_ty = 0.0
+            return
+        dt = t - self.mean_t
+        dy = y - self.mean_y
+        self.mean_t -= dt / self.count
+        self.mean_y -= dy / self.count
+        self.m2_t = max(0.0, self.m2_t - dt * (t - self.mean_t))
+        self.m2_y = max(0.0, self.m2_y - dy * (y - self.mean_y))
+        self.c_ty -= dt * (y - self.mean_y)
+
+    @property
+    def mean(self) -> float:
+        return self.mean_y
+
+    @property
+    def variance(self) -> float:
+        return self.m2_y / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    @property
+    def slope(self) -> float:
+        """Change per second of the least-squares line through the window."""
+        return self.c_ty / self.m2_t if self.m2_t > 0 else 0.0
+
+    @property
+    def slope_stderr(self) -> float:
+        """Standard error of the slope from the scatter around the line, inf below three samples."""
+        if self.count < 3 or self.m2_t <= 0:
+            return math.inf
+        residuals = max(0.0, self.m2_y - self.c_ty * self.c_ty / self.m2_t)
+        return math.sqrt(residuals / (self.count - 2) / self.m2_t)
+
+    def significant_slope(self, significance: float = DEFAULT_SLOPE_SIGNIFICANCE) -> float:
+        """The slope if it is more than `significance` standard errors from zero, else 0."""
+        slope = self.slope
+        if significance > 0 and abs(slope) <= significance * self.slope_stderr:
+            return 0.0
+        return slope
+
+    def statistics(self, significance: float = DEFAULT_SLOPE_SIGNIFICANCE) -> Dict[str, float]:
+        """
+        The TREND_STATISTICS of the series, rounded to one decimal.
+
+        The slope is per hour and 0 unless it is significant, see significant_slope().
+        """
+        values = {'ewma': self.ewma, 'mean': self.mean, 'std': self.std,
+                  'slope': self.significant_slope(significance) * 3600}
+        return {statistic: round(values[statistic], 1) for statistic in TREND_STATISTICS}
+
+class TrendTracker:
+    """
+    Streaming per-patient trend statistics for the alert rules.
+
+    update() feeds a reading into one RollingStats per patient and field and
+    returns the derived fields ('systolic_ewma', 'systolic_slope', ...) once
+    `min_readings` samples are in the window. Merged into the reading they
+    let RuleSet.evaluate raise trend alerts, such as a steady climb that
+    stays under the hypertension thresholds, through the normal alert path.
+
+    The slope is reported as 0 until it stands out from the scatter of the
+    readings, so a short or noisy window does not raise trend alerts; the
+    window should span at least half an hour of readings.
+
+    Args:
+        fields (tuple): Vital sign fields to track
+        window (int): Readings in the sliding window of each patient
+        alpha (float): EWMA weight of the newest reading
+        min_readings (int): Readings needed before statistics are reported,
+            half the window by default
+        significance (float): Standard errors the slope must exceed to be
+            reported, 0 to always report it
+    """
+
+    def __init__(self, fields=DEFAULT_TREND_FIELDS, window: int = DEFAULT_TREND_WINDOW, alpha: float = 0.3,
+                 min_readings: Optional[int] = None, significance: float = DEFAULT_SLOPE_SIGNIFICANCE):
+        self.fields = tuple(fields)
+        self.window = window
+        self.alpha = alpha
+        self.significance = significance
+        self.min_readings = min_readings or max(2, window // 2)
+        self._stats: Dict[Tuple[int, str], RollingStats] = {}
+
+    def __len__(self):
+        return len(self._stats) // len(self.fields) if self.fields else 0
+
+    def update(self, patient_id: int, reading: dict, timestamp: Optional[float] = None) -> Dict[str, float]:
+        """
+        Add a patient's reading and return the derived trend fields.
+
+        Args:
+            patient_id (int): Patient of the reading
+            reading (dict): Vital sign field to value
+            timestamp (float): Seconds of the reading, time.monotonic() by default
+        """
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        derived = {}
+        for field_name in self.fields:
+            if field_name not in reading:
+                continue
+            stats = self._stats.get((patient_id, field_name))
+            if stats is None:
+                stats = self._stats[(patient_id, field_name)] = RollingStats(self.window, self.alpha)
+            stats.update(timestamp, reading[field_name])
+            if stats.count >= self.min_readings:
+                for statistic, value in stats.statistics(self.significance).items():
+                    derived[f'{field_name}_{statistic}'] = value
+        return derived
+
+    def stats(self, patient_id: int, field_name: str) -> Optional[RollingStats]:
+        return self._stats.get((patient_id, field_name))
+
+    def forget(self, patient_id: int):
+        """Drop a discharged patient's statistics."""
+        for field_name in self.fields:
+            self._stats.pop((patient_id, field_name), None)
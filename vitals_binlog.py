@@ -0,0 +1,363 @@
+import csv
+import datetime
+import glob
+import itertools
+import mmap
+import os
+import struct
+from typing import Dict, Iterator, List, Mapping, Optional
+
+import numpy as np
+
+from patient_monitoring import VITAL_SIGNS_FIELDS, VitalSigns
+
+# Fixed-width record; time is milliseconds after the segment base time and
+# temperature is stored in hundredths of a degree
+RECORD_DTYPE = np.dtype([
+    ('patient_id', '<u4'),
+    ('time_offset', '<u4'),
+    ('systolic', '<u2'),
+    ('diastolic', '<u2'),
+    ('heart_rate', '<u2'),
+    ('temperature', '<i2'),
+    ('oxygen_saturation', 'u1'),
+    ('respiratory_rate', 'u1'),
+])
+
+# Segment header: magic, version, record size, base time (epoch ms)
+SEGMENT_MAGIC = b'VLOG'
+SEGMENT_VERSION = 1
+SEGMENT_HEADER = struct.Struct('<4sHHq16x')
+
+# Index header written next to a closed segment: record count, min/max epoch ms,
+# number of distinct patients; followed by the sorted distinct patient ids
+INDEX_HEADER = struct.Struct('<Qqqi')
+
+SEGMENT_PATTERN = "vitals-{:06d}.vlog"
+DEFAULT_SEGMENT_RECORDS = 1_000_000
+MAX_TIME_OFFSET = np.iinfo(np.uint32).max
+
+def _epoch_ms(timestamp: datetime.datetime) -> int:
+    return int(timestamp.timestamp() * 1000)
+
+def _index_path(segment_path: str) -> str:
+    return segment_path[:-len('.vlog')] + '.vidx'
+
+class BinaryVitalsLog:
+    """
+    Append-only binary log of vital signs split into segment files.
+
+    Each segment holds fixed-width RECORD_DTYPE records after a small header.
+    When a segment is closed, a sidecar index with its time range and the
+    patients it contains is written so readers can skip it.
+
+    Args:
+        directory (str): Directory holding the segment files
+        segment_records (int): Records per segment before a new one is started
+    """
+
+    def __init__(self, directory: str, segment_records: int = DEFAULT_SEGMENT_RECORDS):
+        self.directory = directory
+        self.segment_records = segment_records
+        os.makedirs(directory, exist_ok=True)
+        existing = sorted(glob.glob(os.path.join(directory, "vitals-*.vlog")))
+        self._next_sequence = int(os.path.basename(existing[-1])[7:13]) + 1 if existing else 0
+        self._file = None
+        self._path = None
+        self._base_ms = 0
+        self._records = 0
+        self._min_ms = self._max_ms = 0
+        self._patients = set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def append(self, vs: VitalSigns):
+        self.extend({
+            'patient_id': [vs.patient_id], 'timestamp': [_epoch_ms(vs.timestamp)],
+            'systolic': [vs.systolic], 'diastolic': [vs.diastolic], 'heart_rate': [vs.heart_rate],
+            'temperature': [vs.temperature], 'oxygen_saturation': [vs.oxygen_saturation],
+            'respiratory_rate': [vs.respiratory_rate],
+        })
+
+    def extend(self, batch, timestamp=None):
+        """
+        Append many readings at once.
+
+        Args:
+            batch: A VitalsBatch or a mapping of column name to values
+            timestamp: Epoch milliseconds or datetime for every row, required
+                when the batch has no timestamp column
+        """
+        def column(name):
+            return batch.get(name) if isinstance(batch, Mapping) else getattr(batch, name, None)
+
+        patient_ids = np.asarray(column('patient_id'))
+        timestamps = column('timestamp')
+        if timestamps is None:
+            if isinstance(timestamp, datetime.datetime):
+                timestamp = _epoch_ms(timestamp)
+            timestamps = np.full(len(patient_ids), timestamp, dtype=np.int64)
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+
+        start = 0
+        while start < len(patient_ids):
+            if self._file is None:
+                self._open_segment(int(timestamps[start]))
+            room = self.segment_records - self._records
+            # A segment covers at most MAX_TIME_OFFSET ms after its base time
+            offsets = timestamps[start:start + room] - self._base_ms
+            fits = np.flatnonzero((offsets < 0) | (offsets > MAX_TIME_OFFSET))
+            count = int(fits[0]) if len(fits) else len(offsets)
+            if count == 0:
+                self._close_segment()
+                continue
+            end = start + count
+
+            records = np.empty(count, dtype=RECORD_DTYPE)
+            records['patient_id'] = patient_ids[start:end]
+            records['time_offset'] = offsets[:count]
+            for name in ('systolic', 'diastolic', 'heart_rate', 'oxygen_saturation', 'respiratory_rate'):
+                records[name] = np.asarray(column(name))[start:end]
+            records['temperature'] = np.round(np.asarray(column('temperature'))[start:end] * 100)
+            self._file.write(records.tobytes())
+
+            self._records += count
+            self._min_ms = min(self._min_ms, int(timestamps[start:end].min()))
+            self._max_ms = max(self._max_ms, int(timestamps[start:end].max()))
+            self._patients.update(np.unique(records['patient_id']).tolist())
+            if self._records >= self.segment_records:
+                self._close_segment()
+            start = end
+
+    def flush(self):
+        if self._file:
+            self._file.flush()
+
+    def close(self):
+        self._close_segment()
+
+    def _open_segment(self, base_ms: int):
+        self._path = os.path.join(self.directory, SEGMENT_PATTERN.format(self._next_sequence))
+        self._next_sequence += 1
+        self._file = open(self._path, 'wb')
+        self._file.write(SEGMENT_HEADER.pack(SEGMENT_MAGIC, SEGMENT_VERSION, RECORD_DTYPE.itemsize, base_ms))
+        self._base_ms = self._min_ms = self._max_ms = base_ms
+        self._records = 0
+        self._patients = set()
+
+    def _close_segment(self):
+        if self._file is None:
+            return
+        self._file.close()
+        patients = np.array(sorted(self._patients), dtype='<u4')
+        with open(_index_path(self._path), 'wb') as index_file:
+            index_file.write(INDEX_HEADER.pack(self._records, self._min_ms, self._max_ms, len(patients)))
+            index_file.write(patients.tobytes())
+        self._file = None
+
+# One segment opened for reading; `records` is a zero-copy view of the mapped file
+class Segment:
+    def __init__(self, path: str):
+        self.path = path
+        self._map = None
+        self.records = None
+        with open(path, 'rb') as segment_file:
+            size = os.fstat(segment_file.fileno()).st_size
+            if size < SEGMENT_HEADER.size:
+                raise ValueError(f"Not a vitals log segment: {path}")
+            self._map = mmap.mmap(segment_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, record_size, self.base_ms = SEGMENT_HEADER.unpack_from(self._map, 0)
+        if magic != SEGMENT_MAGIC or version != SEGMENT_VERSION or record_size != RECORD_DTYPE.itemsize:
+            self.close()
+            raise ValueError(f"Not a vitals log segment: {path}")
+        count = (size - SEGMENT_HEADER.size) // RECORD_DTYPE.itemsize
+        self.records = np.frombuffer(self._map, dtype=RECORD_DTYPE, count=count, offset=SEGMENT_HEADER.size)
+        self.min_ms, self.max_ms, self.patients = self._load_index(count)
+
+    def _load_index(self, count: int):
+        index_path = _index_path(self.path)
+        if os.path.exists(index_path):
+            with open(index_path, 'rb') as index_file:
+                data = index_file.read()
+            records, min_ms, max_ms, patient_count = INDEX_HEADER.unpack_from(data)
+            if records == count:
+                patients = np.frombuffer(data, dtype='<u4', count=patient_count, offset=INDEX_HEADER.size)
+                return min_ms, max_ms, patients
+        # Segment still being written: build the index from the records
+        offsets = self.records['time_offset']
+        if not count:
+            return self.base_ms, self.base_ms, np.empty(0, dtype='<u4')
+        return (self.base_ms + int(offsets.min()), self.base_ms + int(offsets.max()),
+                np.unique(self.records['patient_id']))
+
+    def close(self):
+        """
+        Unmap the segment and release its file descriptor.
+
+        Record views handed out earlier, such as the unfiltered records of
+        BinaryVitalsReader.scan, keep the mapping alive until they are released.
+        """
+        self.records = None
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                pass  # unmapped when the last view of the records is garbage collected
+            self._map = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def may_contain(self, patient_id=None, start_ms=None, end_ms=None) -> bool:
+        if start_ms is not None and self.max_ms < start_ms:
+            return False
+        if end_ms is not None and self.min_ms >= end_ms:
+            return False
+        if patient_id is not None:
+            position = np.searchsorted(self.patients, patient_id)
+            return position < len(self.patients) and self.patients[position] == patient_id
+        return True
+
+class BinaryVitalsReader:
+    """
+    Read a binary vitals log through memory-mapped segments.
+
+    Args:
+        directory (str): Directory holding the segment files
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def segment_paths(self) -> List[str]:
+        return sorted(glob.glob(os.path.join(self.directory, "vitals-*.vlog")))
+
+    # Open every segment; the caller closes them
+    def segments(self) -> List[Segment]:
+        return [Segment(path) for path in self.segment_paths()]
+
+    def scan(self, patient_id: Optional[int] = None, start_ms: Optional[int] = None,
+             end_ms: Optional[int] = None) -> Iterator[tuple]:
+        """
+        Yield (base_ms, records) for every segment that may hold matching readings.
+
+        Records are zero-copy views when no filter is given; filters are
+        applied with vectorized masks over the mapped records. Each segment
+        is closed when the next one is asked for; views of its records that
+        are still held keep it mapped until they are released.
+        """
+        for path in self.segment_paths():
+            with Segment(path) as segment:
+                if not segment.may_contain(patient_id, start_ms, end_ms):
+                    continue
+                records = segment.records
+                mask = None
+                if patient_id is not None:
+                    mask = records['patient_id'] == patient_id
+                if start_ms is not None:
+                    in_range = records['time_offset'] >= max(0, start_ms - segment.base_ms)
+                    mask = in_range if mask is None else mask & in_range
+                if end_ms is not None:
+                    in_range = records['time_offset'].astype(np.int64) < end_ms - segment.base_ms
+                    mask = in_range if mask is None else mask & in_range
+                # Hold no view of the mapping here, so it can be closed once the caller is done
+                del records
+                yield segment.base_ms, (segment.records if mask is None else segment.records[mask])
+
+    def read(self, patient_id: Optional[int] = None, start_ms: Optional[int] = None,
+             end_ms: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Return matching readings as columns with epoch ms timestamps and °C temperatures."""
+        columns = {name: [] for name in VITAL_SIGNS_FIELDS}
+        for base_ms, records in self.scan(patient_id, start_ms, end_ms):
+            columns['timestamp'].append(base_ms + records['time_offset'].astype(np.int64))
+            columns['temperature'].append(records['temperature'] / 100)
+            for name in VITAL_SIGNS_FIELDS:
+                if name not in ('timestamp', 'temperature'):
+                    columns[name].append(records[name])
+        return {name: np.concatenate(values) if values else np.empty(0)
+                for name, values in columns.items()}
+
+def _split_csv_lines(lines: List[str]) -> List[str]:
+    # Row-major field values of the lines; plain numeric rows are split without the csv module
+    text = ''.join(lines)
+    if '"' not in text:
+        values = text.replace('\n', ',').split(',')[:-1]
+        if len(values) == len(lines) * len(VITAL_SIGNS_FIELDS):
+            return values
+    return [value for row in csv.reader(lines) for value in row]
+
+# Read a vital signs CSV file as column arrays of up to chunk_rows readings
+def read_csv_chunks(csv_filename: str, chunk_rows: int = 100_000) -> Iterator[Dict[str, np.ndarray]]:
+    parse_time = {}
+    width = len(VITAL_SIGNS_FIELDS)
+    with open(csv_filename) as csvfile:
+        header = next(csv.reader([csvfile.readline()]), [])
+        if header != VITAL_SIGNS_FIELDS:
+            raise ValueError(f"Unexpected columns in {csv_filename}: {header}")
+        while True:
+            chunk = list(itertools.islice(csvfile, chunk_rows))
+            if not chunk:
+                break
+            # Blank lines, such as a trailing empty line, are not readings
+            lines = [line for line in chunk if not line.isspace()]
+            if not lines:
+                continue
+            if not lines[-1].endswith('\n'):
+                lines[-1] += '\n'
+            values = _split_csv_lines(lines)
+            if len(values) != len(lines) * width:
+                raise ValueError(f"Rows without {width} columns in {csv_filename}")
+            # Readings of one tick share a timestamp, so parse each text once
+            timestamp_texts = values[1::width]
+            for text in dict.fromkeys(timestamp_texts):
+                if text not in parse_time:
+                    parse_time[text] = _epoch_ms(datetime.datetime.strptime(text, "%Y-%m-%d %H:%M:%S"))
+            yield {
+                'patient_id': np.array(values[0::width], dtype=np.int64),
+                'timestamp': np.fromiter(map(parse_time.__getitem__, timestamp_texts), np.int64,
+                                         len(timestamp_texts)),
+                'systolic': np.array(values[2::width], dtype=np.int64),
+                'diastolic': np.array(values[3::width], dtype=np.int64),
+                'heart_rate': np.array(values[4::width], dtype=np.int64),
+                'temperature': np.array(values[5::width], dtype=np.float64),
+                'oxygen_saturation': np.array(values[6::width], dtype=np.int64),
+                'respiratory_rate': np.array(values[7::width], dtype=np.int64),
+            }
+            if len(parse_time) > 100_000:
+                parse_time.clear()
+
+# Convert a vital signs CSV file to a binary log
+def csv_to_binlog(csv_filename: str, directory: str, chunk_rows: int = 100_000) -> int:
+    rows = 0
+    with BinaryVitalsLog(directory) as log:
+        for columns in read_csv_chunks(csv_filename, chunk_rows):
+            log.extend(columns)
+            rows += len(columns['patient_id'])
+    return rows
+
+# Convert a binary log back to the vital signs CSV format
+def binlog_to_csv(directory: str, csv_filename: str) -> int:
+    rows = 0
+    format_time = {}
+    with open(csv_filename, 'w', newline='') as csvfile:
+        csvfile.write(",".join(VITAL_SIGNS_FIELDS) + "\r\n")
+        for base_ms, records in BinaryVitalsReader(directory).scan():
+            timestamps = (base_ms + records['time_offset'].astype(np.int64)).tolist()
+            temperatures = (records['temperature'] / 100).round(1).tolist()
+            lines = []
+            for ts, record, temperature in zip(timestamps, records.tolist(), temperatures):
+                if ts not in format_time:
+                    format_time[ts] = datetime.datetime.fromtimestamp(ts / 1000).isoformat(' ', 'seconds')
+                patient_id, _, systolic, diastolic, heart_rate, _, oxygen, respiratory = record
+                lines.append(f"{patient_id},{format_time[ts]},{systolic},{diastolic},{heart_rate},"
+                             f"{temperature},{oxygen},{respiratory}\r\n")
+            csvfile.write("".join(lines))
+            rows += len(records)
+    return rows
@@ -0,0 +1,119 @@
+import datetime
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+
+from patient_monitoring import BLOOD_PRESSURE_CATEGORIES, VITAL_SIGN_RANGES, VitalSigns
+
+# Column arrays of vital signs, one row per reading. Simulated batches have one
+# row per patient and no timestamp column; ingested ones carry epoch ms per row
+@dataclass
+class VitalsBatch:
+    patient_id: np.ndarray
+    systolic: np.ndarray
+    diastolic: np.ndarray
+    heart_rate: np.ndarray
+    temperature: np.ndarray
+    oxygen_saturation: np.ndarray
+    respiratory_rate: np.ndarray
+    timestamp: Optional[np.ndarray] = None
+
+    def __len__(self):
+        return len(self.patient_id)
+
+    def to_vital_signs(self, timestamp: datetime.datetime = None) -> List[VitalSigns]:
+        """Convert the batch to VitalSigns objects, sharing one timestamp unless the batch has its own."""
+        if self.timestamp is not None:
+            timestamps = [datetime.datetime.fromtimestamp(ms / 1000) for ms in self.timestamp.tolist()]
+        else:
+            timestamps = [timestamp or datetime.datetime.now()] * len(self)
+        columns = zip(self.patient_id.tolist(), timestamps, self.systolic.tolist(), self.diastolic.tolist(),
+                      self.heart_rate.tolist(), self.temperature.tolist(),
+                      self.oxygen_saturation.tolist(), self.respiratory_rate.tolist())
+        return [VitalSigns(pid, ts, sys_bp, dia_bp, hr, temp, spo2, rr)
+                for pid, ts, sys_bp, dia_bp, hr, temp, spo2, rr in columns]
+
+    @classmethod
+    def concatenate(cls, batches: List['VitalsBatch']) -> 'VitalsBatch':
+        """Join batches row-wise; the result has timestamps only if every batch has them."""
+        with_timestamps = all(batch.timestamp is not None for batch in batches)
+        return cls(*(np.concatenate([getattr(batch, name) for batch in batches]) for name in BATCH_COLUMNS),
+                   timestamp=np.concatenate([b.timestamp for b in batches]) if with_timestamps else None)
+
+# Value columns of a VitalsBatch, in constructor order
+BATCH_COLUMNS = ('patient_id', 'systolic', 'diastolic', 'heart_rate', 'temperature',
+                 'oxygen_saturation', 'respiratory_rate')
+
+def _integers(rng: np.random.Generator, bounds, size) -> np.ndarray:
+    low, high = bounds
+    return rng.integers(low, high + 1, size=size, dtype=np.int16)
+
+# Vectorized counterpart of simulate_vital_signs for a whole cohort
+def simulate_vital_signs_batch(patient_ids, rng=None) -> VitalsBatch:
+    """
+    Simulate normal-range vital signs for many patients in one call.
+
+    Args:
+        patient_ids: Sequence or array of patient ids
+        rng: numpy Generator, seed or None, passed to np.random.default_rng
+    """
+    rng = np.random.default_rng(rng)
+    patient_ids = np.asarray(patient_ids, dtype=np.int32)
+    count = len(patient_ids)
+    ranges = VITAL_SIGN_RANGES
+
+    systolic = _integers(rng, ranges['systolic'], count)
+    diastolic = _integers(rng, ranges['diastolic'], count)
+
+    # Ensure diastolic is always lower than systolic by redrawing the offenders
+    invalid = diastolic >= systolic
+    while invalid.any():
+        diastolic[invalid] = _integers(rng, ranges['diastolic'], int(invalid.sum()))
+        invalid = diastolic >= systolic
+
+    return VitalsBatch(
+        patient_id=patient_ids,
+        systolic=systolic,
+        diastolic=diastolic,
+        heart_rate=_integers(rng, ranges['heart_rate'], count),
+        temperature=np.round(rng.uniform(*ranges['temperature'], size=count), 1),
+        oxygen_saturation=_integers(rng, ranges['oxygen_saturation'], count),
+        respiratory_rate=_integers(rng, ranges['respiratory_rate'], count),
+    )
+
+# Vectorized counterpart of simulate_blood_pressure for a whole cohort
+def simulate_blood_pressure_batch(count: int, rng=None) -> tuple:
+    """
+    Simulate blood pressure readings with the weighted hypertension categories.
+
+    Args:
+        count (int): Number of readings
+        rng: numpy Generator, seed or None, passed to np.random.default_rng
+
+    Returns:
+        tuple: (systolic, diastolic) int16 arrays
+    """
+    rng = np.random.default_rng(rng)
+    weights = np.array([category[1] for category in BLOOD_PRESSURE_CATEGORIES], dtype=float)
+    bounds = np.array([category[2] + category[3] for category in BLOOD_PRESSURE_CATEGORIES])
+
+    category = rng.choice(len(weights), size=count, p=weights / weights.sum())
+    systolic_low, systolic_high, diastolic_low, diastolic_high = bounds[category].T
+    systolic = rng.integers(systolic_low, systolic_high + 1).astype(np.int16)
+    diastolic = rng.integers(diastolic_low, diastolic_high + 1).astype(np.int16)
+
+    # Ensure diastolic is always lower than systolic
+    invalid = diastolic >= systolic
+    while invalid.any():
+        diastolic[invalid] = np.maximum(10, diastolic[invalid] - 10)
+        invalid = diastolic >= systolic
+
+    return systolic, diastolic
+
+# Normal vital signs with blood pressure drawn from the monitor's hypertension categories
+def simulate_ward_batch(patient_ids, rng=None) -> VitalsBatch:
+    rng = np.random.default_rng(rng)
+    batch = simulate_vital_signs_batch(patient_ids, rng)
+    batch.systolic, batch.diastolic = simulate_blood_pressure_batch(len(batch), rng)
+    return batch
@@ -0,0 +1,192 @@
+import datetime
+import time
+from typing import Dict, List, Mapping, Optional
+
+import numpy as np
+
+from patient_monitoring import VitalSigns
+
+# Column layout of the store; timestamps are epoch milliseconds
+STORE_COLUMNS = [
+    ('patient_id', np.int32),
+    ('timestamp', np.int64),
+    ('systolic', np.int16),
+    ('diastolic', np.int16),
+    ('heart_rate', np.int16),
+    ('temperature', np.float32),
+    ('oxygen_saturation', np.uint8),
+    ('respiratory_rate', np.uint8),
+]
+ROW_BYTES = sum(np.dtype(dtype).itemsize for _, dtype in STORE_COLUMNS)
+
+# Bytes per reading of the per-patient row index (the previous reading's sequence number)
+INDEX_BYTES = 8
+
+# Default memory budget for the store
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+def to_epoch_ms(timestamp: datetime.datetime) -> int:
+    return int(timestamp.timestamp() * 1000)
+
+def from_epoch_ms(epoch_ms: int) -> datetime.datetime:
+    return datetime.datetime.fromtimestamp(epoch_ms / 1000)
+
+class VitalsStore:
+    """
+    Fixed-size columnar ring buffer of vital sign readings.
+
+    Every field is kept in a preallocated NumPy column, so a reading costs
+    ROW_BYTES bytes instead of a Python object. When the store is full the
+    oldest readings are overwritten.
+
+    Each reading gets a sequence number and links to the previous reading of
+    the same patient, so a window() query follows that patient's chain instead
+    of scanning the whole ring.
+
+    Args:
+        max_bytes (int): Memory budget including the row index, used when
+            capacity is not given
+        capacity (int): Number of readings to keep
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, capacity: Optional[int] = None):
+        self.capacity = capacity or max(1, max_bytes // (ROW_BYTES + INDEX_BYTES))
+        self.columns: Dict[str, np.ndarray] = {
+            name: np.zeros(self.capacity, dtype=dtype) for name, dtype in STORE_COLUMNS
+        }
+        self.evicted = 0
+        self._start = 0  # physical index of the oldest reading
+        self._size = 0
+        self._next_sequence = 0  # sequence number of the next reading; it is stored at sequence % capacity
+        self._previous = np.full(self.capacity, -1, dtype=np.int64)  # previous sequence of the same patient
+        self._latest: Dict[int, int] = {}  # patient -> sequence number of the newest reading
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def memory_bytes(self) -> int:
+        return sum(column.nbytes for column in self.columns.values()) + self._previous.nbytes
+
+    def append(self, vital_signs: VitalSigns):
+        self.extend({
+            'patient_id': [vital_signs.patient_id],
+            'timestamp': [to_epoch_ms(vital_signs.timestamp)],
+            'systolic': [vital_signs.systolic],
+            'diastolic': [vital_signs.diastolic],
+            'heart_rate': [vital_signs.heart_rate],
+            'temperature': [vital_signs.temperature],
+            'oxygen_saturation': [vital_signs.oxygen_saturation],
+            'respiratory_rate': [vital_signs.respiratory_rate],
+        })
+
+    def extend(self, batch, timestamp=None):
+        """
+        Append many readings at once.
+
+        Args:
+            batch: A VitalsBatch or a mapping of column name to values
+            timestamp: Epoch milliseconds or datetime for every row, required
+                when the batch has no timestamp column
+        """
+        def column(name):
+            return batch.get(name) if isinstance(batch, Mapping) else getattr(batch, name, None)
+
+        values = {name: column(name) for name, _ in STORE_COLUMNS}
+        count = len(values['patient_id'])
+        if values['timestamp'] is None:
+            if isinstance(timestamp, datetime.datetime):
+                timestamp = to_epoch_ms(timestamp)
+            values['timestamp'] = np.full(count, timestamp if timestamp is not None
+                                          else int(time.time() * 1000), dtype=np.int64)
+
+        # Only the newest readings survive a batch larger than the store
+        skip = max(0, count - self.capacity)
+        count -= skip
+        end = (self._start + self._size) % self.capacity
+        first = min(count, self.capacity - end)
+        for name, _ in STORE_COLUMNS:
+            data = np.asarray(values[name])[skip:]
+            self.columns[name][end:end + first] = data[:first]
+            self.columns[name][:count - first] = data[first:]
+
+        overflow = max(0, self._size + count - self.capacity)
+        self.evicted += overflow + skip
+        self._start = (self._start + overflow) % self.capacity
+        self._size = min(self.capacity, self._size + count)
+        self._index(np.asarray(values['patient_id'])[skip:])
+
+    def _index(self, patient_ids: np.ndarray):
+        # Link the newest len(patient_ids) readings to the previous reading of their patient
+        count = len(patient_ids)
+        if not count:
+            return
+        sequences = np.arange(self._next_sequence, self._next_sequence + count, dtype=np.int64)
+        self._next_sequence += count
+        order = np.argsort(patient_ids, kind='stable')
+        sorted_ids, sorted_sequences = patient_ids[order], sequences[order]
+        starts = np.flatnonzero(np.r_[True, sorted_ids[1:] != sorted_ids[:-1]])
+        ends = np.r_[starts[1:], count] - 1
+        group_ids = sorted_ids[starts].tolist()
+        previous = np.r_[-1, sorted_sequences[:-1]]
+        previous[starts] = [self._latest.get(patient_id, -1) for patient_id in group_ids]
+        self._previous[sorted_sequences % self.capacity] = previous
+        self._latest.update(zip(group_ids, sorted_sequences[ends].tolist()))
+
+    def _patient_rows(self, patient_id: int) -> np.ndarray:
+        # Physical rows of the patient's readings still in the store, oldest first
+        oldest = self._next_sequence - self._size
+        sequence = self._latest.get(patient_id, -1)
+        sequences = []
+        while sequence >= oldest:
+            sequences.append(sequence)
+            sequence = self._previous.item(sequence % self.capacity)
+        return np.array(sequences[::-1], dtype=np.int64) % self.capacity
+
+    def _logical_order(self) -> np.ndarray:
+        return (self._start + np.arange(self._size)) % self.capacity
+
+    def evict_older_than(self, epoch_ms: int) -> int:
+        """
+        Drop readings older than epoch_ms. Returns the number dropped.
+
+        Readings are dropped from the oldest end and the scan stops at the
+        first reading at or after epoch_ms, so an older reading that arrived
+        out of time order after it stays until the readings before it go.
+        """
+        timestamps = self.columns['timestamp'][self._logical_order()]
+        recent = timestamps >= epoch_ms
+        dropped = int(np.argmax(recent)) if recent.any() else self._size
+        self._start = (self._start + dropped) % self.capacity
+        self._size -= dropped
+        self.evicted += dropped
+        return dropped
+
+    def window(self, patient_id: int, minutes: Optional[float] = None,
+               now_ms: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """
+        Return one patient's readings in the order they were added.
+
+        Args:
+            patient_id (int): Patient to query
+            minutes (float): Only readings from the last N minutes, all if None
+            now_ms (int): End of the window in epoch milliseconds, defaults to now
+
+        Returns:
+            dict: Column name to array of the matching readings
+        """
+        rows = self._patient_rows(patient_id)
+        if minutes is not None:
+            now_ms = int(time.time() * 1000) if now_ms is None else now_ms
+            timestamps = self.columns['timestamp'][rows]
+            rows = rows[(timestamps >= now_ms - int(minutes * 60000)) & (timestamps <= now_ms)]
+        return {name: column[rows] for name, column in self.columns.items()}
+
+    def readings(self, patient_id: int, minutes: Optional[float] = None) -> List[VitalSigns]:
+        """Like window(), but as VitalSigns objects."""
+        data = self.window(patient_id, minutes)
+        return [
+            VitalSigns(pid, from_epoch_ms(ts), sys_bp, dia_bp, hr, round(temp, 1), spo2, rr)
+            for pid, ts, sys_bp, dia_bp, hr, temp, spo2, rr
+            in zip(*(data[name].tolist() for name, _ in STORE_COLUMNS))
+        ]